@@ -0,0 +1,324 @@
+"""
+故障库近似最近邻(ANN)索引
+本地numpy实现的IVF（倒排文件）索引：球面k-means把归一化向量划分到nlist个簇，
+检索时只对最近的nprobe个簇中的记录做精确打分，nprobe即召回率与延迟之间的调节旋钮。
+索引只保存簇中心和每条记录所属的簇，向量本身仍由故障库存储提供。
+"""
+
+import os
+import json
+import uuid
+import logging
+import threading
+from typing import Tuple, Optional, Dict
+import numpy as np
+
+from .fault_store import InterProcessLock
+
+
+class IVFIndex:
+    """IVF倒排索引（余弦相似度，输入向量需已L2归一化）"""
+
+    # 增量添加的记录先放在待合并区，超过该数量时重建倒排表
+    PENDING_MERGE_SIZE = 1024
+
+    def __init__(self, centroids: np.ndarray, assignments: np.ndarray = None, trained_size: int = 0,
+                 version: str = None):
+        self.centroids = np.asarray(centroids, dtype=np.float32)
+        self.assignments = np.asarray(assignments if assignments is not None else [], dtype=np.int32)
+        self.trained_size = trained_size or len(self.assignments)
+        # 每次训练生成新的版本号，用于判断磁盘上的分配文件是否属于同一组簇中心
+        self.version = version
+        self._build_lists()
+
+    @property
+    def nlist(self) -> int:
+        return len(self.centroids)
+
+    @property
+    def ntotal(self) -> int:
+        return len(self.assignments)
+
+    @classmethod
+    def train(cls, matrix: np.ndarray, nlist: int = None, iterations: int = 10,
+              max_training_points: int = 100000, seed: int = 0) -> 'IVFIndex':
+        """
+        用球面k-means训练簇中心并把全部向量加入索引
+
+        Args:
+            matrix: (n, dim) 已归一化的向量矩阵
+            nlist: 簇数量，默认约为4*sqrt(n)
+        """
+        n = len(matrix)
+        if nlist is None:
+            nlist = int(4 * np.sqrt(n))
+        nlist = max(1, min(nlist, n))
+
+        rng = np.random.default_rng(seed)
+        if n > max_training_points:
+            sample = np.asarray(matrix[rng.choice(n, max_training_points, replace=False)], dtype=np.float32)
+        else:
+            sample = np.asarray(matrix, dtype=np.float32)
+
+        centroids = sample[rng.choice(len(sample), nlist, replace=False)].copy()
+        for _ in range(iterations):
+            labels = cls._assign(sample, centroids)
+            sums = np.zeros_like(centroids)
+            np.add.at(sums, labels, sample)
+            counts = np.bincount(labels, minlength=nlist)
+            # 空簇重新随机取一个样本作为中心
+            empty = counts == 0
+            if np.any(empty):
+                sums[empty] = sample[rng.choice(len(sample), int(empty.sum()))]
+            norms = np.linalg.norm(sums, axis=1, keepdims=True)
+            norms[norms == 0] = 1.0
+            centroids = sums / norms
+
+        index = cls(centroids)
+        index.add(matrix)
+        index.trained_size = n
+        return index
+
+    @staticmethod
+    def _assign(matrix: np.ndarray, centroids: np.ndarray, chunk_size: int = 8192) -> np.ndarray:
+        """把向量分配到最相似的簇中心"""
+        labels = np.empty(len(matrix), dtype=np.int32)
+        for start in range(0, len(matrix), chunk_size):
+            chunk = np.asarray(matrix[start:start + chunk_size], dtype=np.float32)
+            labels[start:start + chunk_size] = np.argmax(chunk @ centroids.T, axis=1)
+        return labels
+
+    def add(self, matrix: np.ndarray) -> np.ndarray:
+        """追加向量（记录编号顺延），返回新记录所属的簇"""
+        matrix = np.asarray(matrix, dtype=np.float32).reshape(-1, self.centroids.shape[1])
+        labels = self._assign(matrix, self.centroids)
+        self.assignments = np.concatenate([self.assignments, labels])
+        if self.ntotal - self._indexed > self.PENDING_MERGE_SIZE:
+            self._build_lists()
+        return labels
+
+    def _build_lists(self) -> None:
+        """按簇构建CSR形式的倒排表"""
+        self._order = np.argsort(self.assignments, kind='stable').astype(np.int64)
+        self._offsets = np.searchsorted(self.assignments[self._order], np.arange(self.nlist + 1))
+        self._indexed = self.ntotal
+
+    def probe(self, query: np.ndarray, nprobe: int) -> np.ndarray:
+        """返回最近nprobe个簇中的候选记录编号"""
+        nprobe = max(1, min(nprobe, self.nlist))
+        scores = self.centroids @ np.asarray(query, dtype=np.float32)
+        if nprobe < self.nlist:
+            clusters = np.argpartition(-scores, nprobe - 1)[:nprobe]
+        else:
+            clusters = np.arange(self.nlist)
+
+        parts = [self._order[self._offsets[c]:self._offsets[c + 1]] for c in clusters]
+        if self._indexed < self.ntotal:
+            pending = np.arange(self._indexed, self.ntotal)
+            parts.append(pending[np.isin(self.assignments[self._indexed:], clusters)])
+        return np.sort(np.concatenate(parts)) if parts else np.empty(0, dtype=np.int64)
+
+
+class AnnIndexManager:
+    """
+    管理按(向量化方法, 维度)分区的IVF索引
+
+    索引持久化在故障库旁的ann目录中:
+        <file>.json           索引元信息（簇数、训练时的记录数、版本号）
+        <file>.centroids.npy  簇中心
+        <file>.assign.i32     每条记录所属的簇（按记录顺序追加写入）
+        .lock                 读写索引文件时持有的跨进程锁
+
+    多个worker进程各自在内存中补齐索引，但只有文件长度恰好等于新记录起始行号、且版本号与磁盘一致时
+    才追加分配文件，同一批记录不会被写入多次。FaultDatabase按索引目录在进程内共享同一个管理器。
+    """
+
+    def __init__(self, index_dir: str, min_records: int = 20000, nlist: int = None,
+                 nprobe: int = 8, retrain_factor: float = 4.0):
+        """
+        Args:
+            index_dir: 索引目录
+            min_records: 记录数达到该值才使用ANN索引，否则精确检索
+            nlist: 簇数量，None时按记录数自动确定
+            nprobe: 默认检索的簇数量
+            retrain_factor: 记录数增长到训练时的该倍数后重新训练簇中心
+        """
+        self.logger = logging.getLogger(__name__)
+        self.index_dir = index_dir
+        self.min_records = min_records
+        self.nlist = nlist
+        self.nprobe = nprobe
+        self.retrain_factor = retrain_factor
+        self._indexes: Dict[Tuple[str, int], IVFIndex] = {}
+        self._training: Dict[Tuple[str, int], threading.Thread] = {}
+        self._lock = threading.Lock()
+        self._file_lock = InterProcessLock(os.path.join(index_dir, '.lock'))
+
+    def _paths(self, vector_method: str, dim: int) -> Tuple[str, str, str]:
+        safe_method = ''.join(c if c.isalnum() or c in '-_' else '_' for c in vector_method) or 'unknown'
+        stem = os.path.join(self.index_dir, f'{safe_method}_{dim}')
+        return f'{stem}.json', f'{stem}.centroids.npy', f'{stem}.assign.i32'
+
+    def _read_meta(self, meta_path: str) -> Optional[Dict]:
+        if not os.path.exists(meta_path):
+            return None
+        with open(meta_path, 'r', encoding='utf-8') as f:
+            return json.load(f)
+
+    def _load(self, vector_method: str, dim: int) -> Optional[IVFIndex]:
+        meta_path, centroids_path, assign_path = self._paths(vector_method, dim)
+        try:
+            with self._file_lock:
+                meta = self._read_meta(meta_path)
+                if meta is None or not os.path.exists(centroids_path):
+                    return None
+                if meta.get('vector_method') != vector_method or int(meta.get('dim', -1)) != dim:
+                    return None
+                centroids = np.load(centroids_path)
+                assignments = np.fromfile(assign_path, dtype='<i4') if os.path.exists(assign_path) else None
+            return IVFIndex(centroids, assignments, meta.get('trained_size', 0), meta.get('version'))
+        except Exception as e:
+            self.logger.warning(f"ANN索引加载失败，将重新构建: {e}")
+            return None
+
+    def _save(self, vector_method: str, dim: int, index: IVFIndex) -> None:
+        """写入新训练的索引：各文件先写临时文件再替换，元信息最后替换"""
+        meta_path, centroids_path, assign_path = self._paths(vector_method, dim)
+        with self._file_lock:
+            with open(centroids_path + '.tmp', 'wb') as f:
+                np.save(f, index.centroids)
+            index.assignments.astype('<i4').tofile(assign_path + '.tmp')
+            with open(meta_path + '.tmp', 'w', encoding='utf-8') as f:
+                json.dump({
+                    'vector_method': vector_method,
+                    'dim': dim,
+                    'nlist': index.nlist,
+                    'trained_size': index.trained_size,
+                    'version': index.version
+                }, f)
+            os.replace(centroids_path + '.tmp', centroids_path)
+            os.replace(assign_path + '.tmp', assign_path)
+            os.replace(meta_path + '.tmp', meta_path)
+
+    def _append_assignments(self, vector_method: str, dim: int, index: IVFIndex,
+                            labels: np.ndarray, offset: int) -> None:
+        """
+        把新记录的簇分配追加到磁盘
+
+        只有磁盘上的索引与index是同一次训练的结果、且分配文件恰好有offset条记录时才写入；
+        其他进程已经写入了这些记录，或者磁盘上是重新训练后的索引时跳过
+        """
+        meta_path, _, assign_path = self._paths(vector_method, dim)
+        with self._file_lock:
+            meta = self._read_meta(meta_path)
+            if meta is None or meta.get('version') != index.version:
+                return
+            size = os.path.getsize(assign_path) if os.path.exists(assign_path) else 0
+            if size != offset * 4:
+                return
+            with open(assign_path, 'ab') as f:
+                f.write(np.asarray(labels, dtype='<i4').tobytes())
+
+    def get_index(self, vector_method: str, matrix: np.ndarray) -> Optional[IVFIndex]:
+        """
+        获取与故障库向量同步的索引
+
+        训练（k-means）不在请求线程中进行：索引不存在时在后台线程中训练，
+        训练完成前返回None；记录数增长过多时继续使用现有索引，同时在后台重新训练。
+
+        Args:
+            vector_method: 向量化方法
+            matrix: (n, dim) 已归一化的故障库向量
+
+        Returns:
+            IVFIndex，记录数不足、索引尚未训练完成或出错时返回None（调用方回退到精确检索）
+        """
+        n, dim = matrix.shape
+        if n < self.min_records:
+            return None
+
+        key = (vector_method, dim)
+        with self._lock:
+            try:
+                index = self._indexes.get(key)
+                if index is None:
+                    index = self._load(vector_method, dim)
+
+                if index is not None and index.ntotal > n:
+                    # 其他进程已经把更新的记录写入索引文件，而本进程的故障库缓存还没有刷新；
+                    # 故障库只追加，前n条的分配仍然有效
+                    index = IVFIndex(index.centroids, index.assignments[:n], index.trained_size, index.version)
+
+                if index is None:
+                    self._indexes.pop(key, None)
+                    self._schedule_training(vector_method, matrix)
+                    return None
+
+                if index.ntotal < n:
+                    # 补齐其他进程或批量导入新增的记录
+                    offset = index.ntotal
+                    labels = index.add(matrix[offset:])
+                    self._append_assignments(vector_method, dim, index, labels, offset)
+                if n >= index.trained_size * self.retrain_factor:
+                    self._schedule_training(vector_method, matrix)
+
+                self._indexes[key] = index
+                return index
+            except Exception as e:
+                self.logger.error(f"ANN索引同步失败，使用精确检索: {e}")
+                return None
+
+    def _schedule_training(self, vector_method: str, matrix: np.ndarray) -> None:
+        """在后台线程中训练索引（需持有锁），同一分区同时只有一个训练任务"""
+        key = (vector_method, matrix.shape[1])
+        if key in self._training:
+            return
+        thread = threading.Thread(target=self._train, args=(vector_method, matrix),
+                                  name=f'ann-train-{vector_method}-{matrix.shape[1]}', daemon=True)
+        self._training[key] = thread
+        thread.start()
+
+    def _train(self, vector_method: str, matrix: np.ndarray) -> None:
+        n, dim = matrix.shape
+        key = (vector_method, dim)
+        try:
+            self.logger.info(f"正在后台构建ANN索引: {vector_method}/{dim}, 记录数 {n}")
+            index = IVFIndex.train(matrix, self.nlist)
+            index.version = uuid.uuid4().hex
+            # 训练期间新增的记录由下一次get_index补齐
+            with self._lock:
+                self._save(vector_method, dim, index)
+                self._indexes[key] = index
+            self.logger.info(f"ANN索引构建完成: {vector_method}/{dim}")
+        except Exception as e:
+            self.logger.error(f"ANN索引构建失败，使用精确检索: {e}")
+        finally:
+            with self._lock:
+                self._training.pop(key, None)
+
+    def add(self, vector_method: str, vectors: np.ndarray, offset: int) -> None:
+        """
+        新增故障记录后增量更新已存在的索引
+
+        Args:
+            offset: 新记录在该分区向量矩阵中的起始行号。索引记录数与之不一致时（并发检索已经通过get_index
+                补齐了这些记录，或者索引落后于故障库）不做任何修改，由下一次get_index同步
+        """
+        vectors = np.asarray(vectors, dtype=np.float32)
+        vectors = vectors.reshape(-1, vectors.shape[-1])
+        norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+        norms[norms == 0] = 1.0
+        vectors = vectors / norms
+
+        key = (vector_method, vectors.shape[1])
+        with self._lock:
+            index = self._indexes.get(key)
+            if index is None or index.ntotal != offset:
+                return
+            try:
+                labels = index.add(vectors)
+                self._append_assignments(vector_method, vectors.shape[1], index, labels, offset)
+            except Exception as e:
+                # 写入失败时丢弃内存中的索引，下次检索时重新同步
+                self._indexes.pop(key, None)
+                self.logger.error(f"ANN索引增量更新失败: {e}")
@@ -0,0 +1,18 @@
+from django.apps import AppConfig
+from django.conf import settings
+
+
+class ApiConfig(AppConfig):
+    default_auto_field = "django.db.models.BigAutoField"
+    name = "api"
+
+    def ready(self):
+        # 按配置在worker启动时预加载日志分析模型，否则在首次请求时懒加载
+        if getattr(settings, 'LOG_ANALYSIS_EAGER_LOAD', False):
+            from .text2vec_integration import engine_registry
+            engine_registry.warm_up()
+        
+        # 按配置在启动时创建共享的Neo4j驱动并检查连通性，否则在首次访问知识图谱时创建
+        if getattr(settings, 'NEO4J_EAGER_CONNECT', False):
+            from .knowledge_graph import driver_registry
+            driver_registry.warm_up()
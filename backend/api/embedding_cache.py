@@ -0,0 +1,116 @@
+"""
+日志向量缓存
+以清洗后文本、向量化方法和模型版本的哈希为键缓存向量，重复提交的基线日志和重复上传
+不再经过transformer编码。内存中为LRU缓存，可选的磁盘层在进程重启和多个worker之间共享。
+"""
+
+import os
+import hashlib
+import logging
+import threading
+from collections import OrderedDict
+from typing import Optional, Dict, Any
+import numpy as np
+
+
+class EmbeddingCache:
+    """两级（内存LRU + 可选磁盘）向量缓存"""
+
+    def __init__(self, max_entries: int = 1024, disk_dir: str = None):
+        """
+        Args:
+            max_entries: 内存中最多缓存的向量数，0表示不使用内存层
+            disk_dir: 磁盘缓存目录（可选），None表示不使用磁盘层
+        """
+        self.logger = logging.getLogger(__name__)
+        self.max_entries = max_entries
+        self.disk_dir = disk_dir
+        self._entries: "OrderedDict[str, np.ndarray]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+
+    @staticmethod
+    def make_key(text: str, vector_method: str, model_revision: str = '') -> str:
+        """由清洗后文本、向量化方法和模型版本生成缓存键"""
+        digest = hashlib.sha256()
+        for part in (vector_method, model_revision, text):
+            digest.update(part.encode('utf-8', errors='surrogatepass'))
+            digest.update(b'\0')
+        return digest.hexdigest()
+
+    def _disk_path(self, key: str) -> str:
+        return os.path.join(self.disk_dir, key[:2], f'{key}.npy')
+
+    def get(self, key: str) -> Optional[np.ndarray]:
+        """查询缓存，未命中返回None"""
+        with self._lock:
+            vector = self._entries.get(key)
+            if vector is not None:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return vector
+
+        if self.disk_dir:
+            path = self._disk_path(key)
+            if os.path.exists(path):
+                try:
+                    vector = np.load(path)
+                    vector.setflags(write=False)
+                    with self._lock:
+                        self.disk_hits += 1
+                    self._remember(key, vector)
+                    return vector
+                except Exception as e:
+                    self.logger.warning(f"读取磁盘向量缓存失败 {path}: {e}")
+
+        with self._lock:
+            self.misses += 1
+        return None
+
+    def put(self, key: str, vector: np.ndarray) -> None:
+        """写入缓存"""
+        vector = np.array(vector, copy=True)
+        vector.setflags(write=False)
+        self._remember(key, vector)
+
+        if self.disk_dir:
+            path = self._disk_path(key)
+            if not os.path.exists(path):
+                try:
+                    os.makedirs(os.path.dirname(path), exist_ok=True)
+                    tmp_path = f'{path}.{os.getpid()}.{threading.get_ident()}.tmp'
+                    with open(tmp_path, 'wb') as f:
+                        np.save(f, vector)
+                    os.replace(tmp_path, path)
+                except Exception as e:
+                    self.logger.warning(f"写入磁盘向量缓存失败 {path}: {e}")
+
+    def _remember(self, key: str, vector: np.ndarray) -> None:
+        if self.max_entries <= 0:
+            return
+        with self._lock:
+            self._entries[key] = vector
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def clear(self) -> None:
+        """清空内存层（磁盘层保留）"""
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self) -> Dict[str, Any]:
+        """命中/未命中统计"""
+        with self._lock:
+            lookups = self.hits + self.disk_hits + self.misses
+            return {
+                'entries': len(self._entries),
+                'max_entries': self.max_entries,
+                'disk_enabled': bool(self.disk_dir),
+                'hits': self.hits,
+                'disk_hits': self.disk_hits,
+                'misses': self.misses,
+                'hit_rate': round((self.hits + self.disk_hits) / lookups, 4) if lookups else 0.0
+            }
@@ -0,0 +1,148 @@
+"""
+备用向量化器（未加载SentenceTransformer时使用）
+在故障库上只拟合一次字符n-gram TF-IDF词表并持久化，之后只调用transform；
+尚未拟合时使用无状态的哈希编码：有sklearn时为字符n-gram哈希(hashed_tfidf)，否则为crc32词袋哈希(hashed_words)。
+各方式输出的向量维度固定，方法名不同的向量不能相互比较。
+"""
+
+import os
+import zlib
+import pickle
+import hashlib
+import logging
+import threading
+from typing import List
+import numpy as np
+
+
+class FallbackVectorizer:
+    """字符n-gram TF-IDF / 哈希向量化器"""
+
+    ANALYZER = 'char_wb'
+    NGRAM_RANGE = (2, 4)
+
+    def __init__(self, persist_path: str = None, n_features: int = 384):
+        """
+        Args:
+            persist_path: 拟合后的词表保存路径（可选），None时只使用哈希编码
+            n_features: 输出向量维度
+        """
+        self.logger = logging.getLogger(__name__)
+        self.persist_path = persist_path
+        self.n_features = n_features
+        self._fitted = None
+        self._fingerprint = None
+        self._hasher = None
+        self._lock = threading.Lock()
+        self._load()
+
+    @property
+    def is_fitted(self) -> bool:
+        return self._fitted is not None
+
+    @property
+    def method_name(self) -> str:
+        """向量化方法名，拟合的词表不同则方法名不同，避免与旧词表的向量混用"""
+        if self.is_fitted:
+            return f"fitted_tfidf_{self._fingerprint}"
+        # 两种哈希编码的向量空间不同，方法名必须区分
+        return "hashed_tfidf" if self._get_hasher() is not None else "hashed_words"
+
+    def _load(self) -> None:
+        if not self.persist_path or not os.path.exists(self.persist_path):
+            return
+        try:
+            with open(self.persist_path, 'rb') as f:
+                data = f.read()
+            vectorizer = pickle.loads(data)
+            self._fitted = vectorizer
+            self._fingerprint = hashlib.sha1(data).hexdigest()[:8]
+            self.logger.info(f"已加载拟合的TF-IDF词表: {self.persist_path}")
+        except Exception as e:
+            self.logger.warning(f"TF-IDF词表加载失败，使用哈希编码: {e}")
+
+    def fit(self, texts: List[str]) -> str:
+        """
+        在语料上拟合TF-IDF词表并持久化
+
+        Returns:
+            新的向量化方法名
+        """
+        from sklearn.feature_extraction.text import TfidfVectorizer
+
+        texts = [text for text in texts if text and text.strip()]
+        if not texts:
+            raise ValueError("拟合语料为空")
+
+        vectorizer = TfidfVectorizer(
+            analyzer=self.ANALYZER,
+            ngram_range=self.NGRAM_RANGE,
+            max_features=self.n_features,
+            sublinear_tf=True
+        )
+        vectorizer.fit(texts)
+        data = pickle.dumps(vectorizer)
+
+        if self.persist_path:
+            os.makedirs(os.path.dirname(self.persist_path), exist_ok=True)
+            tmp_path = self.persist_path + '.tmp'
+            with open(tmp_path, 'wb') as f:
+                f.write(data)
+            os.replace(tmp_path, self.persist_path)
+
+        with self._lock:
+            self._fitted = vectorizer
+            self._fingerprint = hashlib.sha1(data).hexdigest()[:8]
+        self.logger.info(f"TF-IDF词表拟合完成，语料 {len(texts)} 条，词表大小 {len(vectorizer.vocabulary_)}")
+        return self.method_name
+
+    def transform(self, texts: List[str]) -> np.ndarray:
+        """将文本批量转换为 (n, n_features) 的向量矩阵"""
+        if self.is_fitted:
+            matrix = self._fitted.transform(texts).toarray()
+            if matrix.shape[1] < self.n_features:
+                # 语料较小时词表不足n_features，补零保持固定维度
+                matrix = np.pad(matrix, ((0, 0), (0, self.n_features - matrix.shape[1])))
+            return matrix.astype(np.float32)
+
+        hasher = self._get_hasher()
+        if hasher is not None:
+            return hasher.transform(texts).toarray().astype(np.float32)
+        # 如果sklearn不可用，使用简单的哈希方法
+        return np.vstack([stable_hash_vector(text, self.n_features) for text in texts])
+
+    def _get_hasher(self):
+        """sklearn的字符n-gram哈希编码器，sklearn不可用时返回None"""
+        if self._hasher is None:
+            try:
+                from sklearn.feature_extraction.text import HashingVectorizer
+            except ImportError:
+                self._hasher = False
+                return None
+            self._hasher = HashingVectorizer(
+                analyzer=self.ANALYZER,
+                ngram_range=self.NGRAM_RANGE,
+                n_features=self.n_features,
+                alternate_sign=False,
+                norm='l2'
+            )
+        return self._hasher if self._hasher is not False else None
+
+
+def stable_hash_vector(text: str, vector_size: int = 384) -> np.ndarray:
+    """
+    简单的词袋哈希向量化方法
+
+    使用crc32而不是内置hash()，后者在每个进程中随机加盐，不同进程生成的向量无法比较
+    """
+    vector = np.zeros(vector_size, dtype=np.float32)
+
+    for word in text.lower().split():
+        vector[zlib.crc32(word.encode('utf-8')) % vector_size] += 1
+
+    # 归一化
+    norm = np.linalg.norm(vector)
+    if norm > 0:
+        vector = vector / norm
+
+    return vector
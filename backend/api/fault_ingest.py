@@ -0,0 +1,263 @@
+"""
+故障日志批量导入
+从目录或压缩包（.zip/.tar/.tar.gz/.tgz）读取带故障类型标签的日志，
+分块批量编码后整块写入故障库，并记录已提交的条目以便崩溃后断点续传
+
+标签来源（二选一）:
+    1. 根目录下的labels.csv，列为 file,fault_type（file为相对路径）
+    2. 目录结构 <故障类型>/<日志文件>，一级子目录名即故障类型
+"""
+
+import os
+import csv
+import io
+import json
+import hashlib
+import logging
+import tarfile
+import zipfile
+from typing import List, Tuple, Optional, Dict, Any, Callable, Iterator
+
+
+MANIFEST_NAME = 'labels.csv'
+
+
+class LabelledLogSource:
+    """带标签的日志来源（目录或压缩包）"""
+
+    def __init__(self, path: str, encoding: str = 'utf-8'):
+        self.logger = logging.getLogger(__name__)
+        self.path = os.path.abspath(path)
+        self.encoding = encoding
+        self._zip = None
+        self._tar = None
+        self._tar_members = {}
+
+        if os.path.isdir(self.path):
+            self.kind = 'dir'
+        elif zipfile.is_zipfile(self.path):
+            self.kind = 'zip'
+            self._zip = zipfile.ZipFile(self.path)
+        elif tarfile.is_tarfile(self.path):
+            self.kind = 'tar'
+            self._tar = tarfile.open(self.path, 'r:*')
+            self._tar_members = {m.name: m for m in self._tar.getmembers() if m.isfile()}
+        else:
+            raise ValueError(f"不支持的日志来源（需要目录、zip或tar压缩包）: {path}")
+
+    def close(self) -> None:
+        if self._zip is not None:
+            self._zip.close()
+        if self._tar is not None:
+            self._tar.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.close()
+
+    def _list_files(self) -> List[str]:
+        """列出全部文件的相对路径（使用/分隔）"""
+        if self.kind == 'dir':
+            files = []
+            for root, _, names in os.walk(self.path):
+                for name in names:
+                    rel = os.path.relpath(os.path.join(root, name), self.path)
+                    files.append(rel.replace(os.sep, '/'))
+            return sorted(files)
+        if self.kind == 'zip':
+            return sorted(name for name in self._zip.namelist() if not name.endswith('/'))
+        return sorted(self._tar_members)
+
+    def _read_bytes(self, key: str) -> bytes:
+        if self.kind == 'dir':
+            with open(os.path.join(self.path, key), 'rb') as f:
+                return f.read()
+        if self.kind == 'zip':
+            return self._zip.read(key)
+        return self._tar.extractfile(self._tar_members[key]).read()
+
+    def read(self, key: str) -> str:
+        """读取日志内容"""
+        return self._read_bytes(key).decode(self.encoding, errors='replace')
+
+    def list_entries(self) -> List[Tuple[str, str]]:
+        """
+        列出全部(条目键, 故障类型)
+
+        Returns:
+            按条目键排序的列表，条目键为日志文件在来源中的相对路径
+        """
+        files = self._list_files()
+
+        # 压缩包内常见的单一顶层目录（如 logs/<故障类型>/...）不作为故障类型
+        prefix = ''
+        tops = {f.split('/', 1)[0] for f in files}
+        if self.kind != 'dir' and len(tops) == 1 and all('/' in f for f in files):
+            candidate = tops.pop() + '/'
+            if candidate + MANIFEST_NAME in files or all(f[len(candidate):].count('/') >= 1 for f in files):
+                prefix = candidate
+
+        manifest_key = prefix + MANIFEST_NAME
+        if manifest_key in files:
+            text = self.read(manifest_key)
+            entries = []
+            for row in csv.DictReader(io.StringIO(text)):
+                name = (row.get('file') or '').strip()
+                fault_type = (row.get('fault_type') or '').strip()
+                if name and fault_type:
+                    entries.append((prefix + name, fault_type))
+            return sorted(entries)
+
+        entries = []
+        for key in files:
+            rel = key[len(prefix):]
+            if '/' not in rel or rel.startswith('.') or '/.' in rel:
+                continue
+            fault_type = rel.split('/', 1)[0]
+            entries.append((key, fault_type))
+        return entries
+
+
+class IngestCheckpoint:
+    """
+    导入进度记录（追加写入的文本文件）
+
+        <条目键>                          已写入故障库的条目
+        #pending {"before": n, "keys": [...]}  开始写入一块：写入前的故障库记录数和将按顺序写入的条目键
+        #end                              该块写入完成（其条目键已追加在前面）
+
+    在写入故障库和记录进度之间中断时，文件以未结束的#pending结尾，load按故障库当前记录数与before的差
+    确定该块实际写入了前几条并补记，续传时不会重复写入（要求导入期间没有其他写入者）。
+    """
+
+    PENDING_PREFIX = '#pending '
+    END_MARK = '#end'
+
+    def __init__(self, state_path: str):
+        self.state_path = state_path
+
+    @classmethod
+    def for_source(cls, state_dir: str, source_path: str) -> 'IngestCheckpoint':
+        """按来源路径生成默认的进度文件"""
+        digest = hashlib.sha1(os.path.abspath(source_path).encode('utf-8')).hexdigest()[:16]
+        return cls(os.path.join(state_dir, f'{digest}.done'))
+
+    def _read(self) -> Tuple[set, Optional[Dict[str, Any]]]:
+        done, pending = set(), None
+        if not os.path.exists(self.state_path):
+            return done, pending
+        with open(self.state_path, 'r', encoding='utf-8') as f:
+            for line in f:
+                line = line.rstrip('\n')
+                if not line:
+                    continue
+                if line.startswith(self.PENDING_PREFIX):
+                    pending = json.loads(line[len(self.PENDING_PREFIX):])
+                elif line == self.END_MARK:
+                    pending = None
+                else:
+                    done.add(line)
+        return done, pending
+
+    def load(self, record_count: Callable[[], int] = None) -> set:
+        """
+        读取已写入故障库的条目键
+
+        Args:
+            record_count: 返回故障库当前记录数，用于恢复中断的块；不提供时视为该块没有写入
+        """
+        done, pending = self._read()
+        if pending is not None:
+            landed = 0
+            if record_count is not None:
+                landed = min(max(record_count() - pending['before'], 0), len(pending['keys']))
+            keys = pending['keys'][:landed]
+            self.commit(keys)
+            done.update(keys)
+        return done
+
+    def _append(self, lines: List[str]) -> None:
+        os.makedirs(os.path.dirname(self.state_path) or '.', exist_ok=True)
+        with open(self.state_path, 'a', encoding='utf-8') as f:
+            f.writelines(f'{line}\n' for line in lines)
+            f.flush()
+            os.fsync(f.fileno())
+
+    def begin(self, keys: List[str], records_before: int) -> None:
+        """写入故障库之前记录将要写入的条目"""
+        self._append([self.PENDING_PREFIX + json.dumps({'before': records_before, 'keys': keys}, ensure_ascii=False)])
+
+    def commit(self, keys: List[str]) -> None:
+        """记录已写入故障库的条目并结束当前块"""
+        self._append(list(keys) + [self.END_MARK])
+
+    def reset(self) -> None:
+        if os.path.exists(self.state_path):
+            os.remove(self.state_path)
+
+
+def iter_chunks(items: List, chunk_size: int) -> Iterator[List]:
+    for start in range(0, len(items), chunk_size):
+        yield items[start:start + chunk_size]
+
+
+def ingest_source(engine, source: LabelledLogSource, checkpoint: Optional[IngestCheckpoint] = None,
+                  chunk_size: int = 1000, batch_size: int = None,
+                  progress: Callable[[Dict[str, Any]], None] = None) -> Dict[str, Any]:
+    """
+    把来源中的日志批量写入故障库
+
+    Args:
+        engine: LogAnalysisEngine
+        source: 日志来源
+        checkpoint: 断点续传进度（可选），已记录的条目会被跳过
+        chunk_size: 每次写入故障库的条目数，一块写入成功后才记录进度
+        batch_size: 编码批大小
+        progress: 每块完成后的回调，参数为当前统计
+
+    Returns:
+        导入统计；读取或编码失败的条目不记入进度，续传时会重试
+    """
+    logger = logging.getLogger(__name__)
+    fault_db = engine.fault_db
+    entries = source.list_entries()
+    done = checkpoint.load(fault_db.count_records) if checkpoint is not None else set()
+    pending = [entry for entry in entries if entry[0] not in done]
+
+    stats = {
+        'total': len(entries),
+        'skipped': len(entries) - len(pending),
+        'processed': 0,
+        'added': 0,
+        'failed': []
+    }
+
+    for chunk in iter_chunks(pending, chunk_size):
+        items, keys = [], []
+        for key, fault_type in chunk:
+            try:
+                items.append((source.read(key), fault_type))
+                keys.append(key)
+            except Exception as e:
+                logger.warning(f"读取日志失败 {key}: {e}")
+                stats['failed'].append(key)
+
+        records, failed = engine.encode_fault_records(items, batch_size=batch_size)
+        failed = set(failed)
+        stats['failed'].extend(keys[i] for i in sorted(failed))
+        added_keys = [key for i, key in enumerate(keys) if i not in failed]
+
+        if checkpoint is not None and added_keys:
+            checkpoint.begin(added_keys, fault_db.count_records())
+        added = fault_db.add_fault_records(records, vector_method=engine.vector_method)
+        if checkpoint is not None and added_keys:
+            checkpoint.commit(added_keys)
+
+        stats['processed'] += len(chunk)
+        stats['added'] += added
+        if progress is not None:
+            progress(stats)
+
+    return stats
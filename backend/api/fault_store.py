@@ -0,0 +1,639 @@
+"""
+故障库存储后端
+CsvFaultStore: 原始的CSV格式（每行一个逗号拼接的向量字符串）
+BinaryFaultStore: 列式二进制格式，向量按(向量化方法, 维度)分区存放在连续的float32矩阵文件中，
+                  通过内存映射读取；fault_type/timestamp等元数据存放在旁路表中，追加写入无需重写矩阵
+"""
+
+import os
+import csv
+import json
+import logging
+import shutil
+import threading
+import time
+from collections import Counter
+from typing import List, Tuple, Optional, Dict, Any, Iterator, Iterable, NamedTuple
+import numpy as np
+
+try:
+    import fcntl
+except ImportError:  # Windows
+    fcntl = None
+
+
+CSV_HEADER = ['vector', 'fault_type', 'timestamp', 'log_sample', 'vector_dim', 'vector_method']
+
+
+class InterProcessLock:
+    """
+    基于fcntl.flock的跨进程互斥锁，同一线程内可重入
+    Windows上没有fcntl，只提供进程内互斥
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self._lock = threading.RLock()
+        self._depth = 0
+        self._file = None
+
+    def __enter__(self):
+        self._lock.acquire()
+        if self._depth == 0:
+            try:
+                os.makedirs(os.path.dirname(self.path) or '.', exist_ok=True)
+                self._file = open(self.path, 'a')
+                if fcntl is not None:
+                    fcntl.flock(self._file, fcntl.LOCK_EX)
+            except BaseException:
+                if self._file is not None:
+                    self._file.close()
+                    self._file = None
+                self._lock.release()
+                raise
+        self._depth += 1
+        return self
+
+    def __exit__(self, *exc_info):
+        self._depth -= 1
+        if self._depth == 0:
+            if fcntl is not None:
+                fcntl.flock(self._file, fcntl.LOCK_UN)
+            self._file.close()
+            self._file = None
+        self._lock.release()
+
+
+class FaultRecord(NamedTuple):
+    """单条故障记录"""
+    vector: np.ndarray
+    fault_type: str
+    timestamp: str
+    log_sample: str
+    vector_method: str
+
+
+class CsvFaultStore:
+    """CSV格式故障库（原始格式）"""
+
+    def __init__(self, database_path: str):
+        self.logger = logging.getLogger(__name__)
+        self.database_path = database_path
+        self._lock = InterProcessLock(database_path + '.lock')
+        self._ensure_database_exists()
+
+    def _ensure_database_exists(self):
+        """确保数据库目录和文件存在"""
+        os.makedirs(os.path.dirname(self.database_path), exist_ok=True)
+
+        if not os.path.exists(self.database_path):
+            # 创建空的CSV文件
+            with open(self.database_path, 'w', newline='', encoding='utf-8') as f:
+                writer = csv.writer(f)
+                writer.writerow(CSV_HEADER)
+
+    def signature(self) -> Tuple:
+        """文件签名（修改时间、大小），用于判断缓存是否失效"""
+        return _file_signature(self.database_path)
+
+    def lock(self) -> InterProcessLock:
+        """故障库文件的跨进程写锁"""
+        return self._lock
+
+    def append(self, records: Iterable[FaultRecord]) -> int:
+        """追加故障记录，返回写入条数"""
+        count = 0
+        with self._lock, open(self.database_path, 'a', newline='', encoding='utf-8') as f:
+            writer = csv.writer(f)
+            for record in records:
+                # 将向量转换为字符串
+                vector_str = ','.join(map(str, record.vector))
+                writer.writerow([vector_str, record.fault_type, record.timestamp,
+                                 record.log_sample, len(record.vector), record.vector_method])
+                count += 1
+        return count
+
+    def iter_records(self) -> Iterator[FaultRecord]:
+        """逐条读取故障记录（跳过无效记录）"""
+        if not os.path.exists(self.database_path):
+            return
+
+        with open(self.database_path, 'r', encoding='utf-8') as f:
+            reader = csv.reader(f)
+            next(reader, None)  # 跳过标题行
+
+            for row in reader:
+                if len(row) < 2:
+                    continue
+                try:
+                    vector = np.array([float(x) for x in row[0].split(',')])
+                except ValueError as e:
+                    self.logger.warning(f"跳过无效记录: {e}")
+                    continue
+                yield FaultRecord(
+                    vector=vector,
+                    fault_type=row[1],
+                    timestamp=row[2] if len(row) >= 3 else '',
+                    log_sample=row[3] if len(row) >= 4 else '',
+                    vector_method=row[5] if len(row) >= 6 else 'unknown'
+                )
+
+    def load_records(self, target_dim: int = None, vector_method: str = None) -> Tuple[List[np.ndarray], List[str]]:
+        """加载所有故障记录，支持维度和向量化方法过滤"""
+        vectors = []
+        fault_types = []
+
+        if not os.path.exists(self.database_path):
+            return vectors, fault_types
+
+        with open(self.database_path, 'r', encoding='utf-8') as f:
+            reader = csv.reader(f)
+            header = next(reader, None)  # 读取标题行
+
+            for row in reader:
+                if len(row) >= 2:
+                    try:
+                        # 解析向量
+                        vector_str = row[0]
+                        vector = np.array([float(x) for x in vector_str.split(',')])
+                        fault_type = row[1]
+
+                        # 检查维度匹配
+                        if target_dim is not None and len(vector) != target_dim:
+                            self.logger.debug(f"跳过维度不匹配的记录: {len(vector)} != {target_dim}")
+                            continue
+
+                        # 检查向量化方法匹配（如果有的话）
+                        if len(row) >= 6 and vector_method is not None:
+                            record_method = row[5]
+                            if record_method != vector_method:
+                                self.logger.debug(f"跳过方法不匹配的记录: {record_method} != {vector_method}")
+                                continue
+
+                        vectors.append(vector)
+                        fault_types.append(fault_type)
+
+                    except (ValueError, IndexError) as e:
+                        self.logger.warning(f"跳过无效记录: {e}")
+                        continue
+
+        return vectors, fault_types
+
+    def load_matrix(self, target_dim: int, vector_method: str = None) -> Tuple[np.ndarray, List[str]]:
+        """加载指定维度的故障记录，向量以(n, dim)的float32矩阵返回"""
+        vectors, fault_types = self.load_records(target_dim, vector_method)
+        if not vectors:
+            return np.empty((0, target_dim), dtype=np.float32), fault_types
+        return np.asarray(vectors, dtype=np.float32), fault_types
+
+    def get_stats(self) -> Dict[str, Any]:
+        """统计记录总数、故障类型分布和维度分布"""
+        fault_type_counts = Counter()
+        dimension_counts = Counter()
+        total_records = 0
+
+        if not os.path.exists(self.database_path):
+            return {'total_records': 0, 'fault_type_counts': fault_type_counts, 'dimension_counts': dimension_counts}
+
+        with open(self.database_path, 'r', encoding='utf-8') as f:
+            reader = csv.reader(f)
+            header = next(reader, None)  # 跳过标题行
+
+            for row in reader:
+                if len(row) >= 2:
+                    fault_type_counts[row[1]] += 1
+                    total_records += 1
+
+                    # 统计维度信息
+                    if len(row) >= 5:
+                        try:
+                            dim = int(row[4])
+                            dimension_counts[dim] += 1
+                        except (ValueError, IndexError):
+                            pass
+
+        return {
+            'total_records': total_records,
+            'fault_type_counts': fault_type_counts,
+            'dimension_counts': dimension_counts
+        }
+
+
+class BinaryFaultStore:
+    """
+    列式二进制故障库
+
+    目录结构:
+        manifest.json            分区清单: [{file, vector_method, dim}]
+        <file>.f32               连续的float32向量矩阵（小端，按行追加）
+        <file>.meta.csv          元数据旁路表: row, fault_type, timestamp, log_sample
+
+    元数据中的row列记录对应向量在矩阵中的行号，先写向量再写元数据，
+    进程在两次写入之间崩溃时多出的向量行没有元数据引用，读取时会被忽略。
+    初始化、新建分区和追加写入都持有目录旁的<store_dir>.lock文件锁，多个worker进程之间互斥。
+    """
+
+    VECTOR_DTYPE = np.dtype('<f4')
+    MANIFEST_NAME = 'manifest.json'
+    META_HEADER = ['row', 'fault_type', 'timestamp', 'log_sample']
+
+    def __init__(self, store_dir: str):
+        self.logger = logging.getLogger(__name__)
+        self.store_dir = store_dir
+        self._lock = InterProcessLock(os.path.normpath(store_dir) + '.lock')
+        os.makedirs(store_dir, exist_ok=True)
+        self._partitions = self._read_manifest()
+
+    @property
+    def manifest_path(self) -> str:
+        return os.path.join(self.store_dir, self.MANIFEST_NAME)
+
+    def exists(self) -> bool:
+        """存储是否已初始化（存在分区清单）"""
+        return os.path.exists(self.manifest_path)
+
+    def lock(self) -> InterProcessLock:
+        """存储的跨进程写锁"""
+        return self._lock
+
+    def initialize(self, source=None, batch_size: int = 1000) -> Optional[int]:
+        """
+        初始化存储，可选从另一个存储后端（如CSV故障库）导入全部记录
+
+        导入先写入临时目录<store_dir>.importing，完成后整体替换到store_dir，
+        中途崩溃时store_dir仍未初始化，下次启动会重新导入；多个进程同时初始化时只有一个执行导入。
+
+        Returns:
+            导入的记录数，存储已经初始化时返回None
+        """
+        with self._lock:
+            if self.exists():
+                self._refresh_manifest()
+                return None
+            if source is None:
+                self._write_manifest()
+                return 0
+
+            tmp_dir = os.path.normpath(self.store_dir) + '.importing'
+            if os.path.exists(tmp_dir):
+                self.logger.warning(f"上次导入未完成，重新导入: {tmp_dir}")
+                shutil.rmtree(tmp_dir)
+            target = BinaryFaultStore(tmp_dir)
+            count = copy_records(source, target, batch_size)
+            target._write_manifest()
+            if os.path.exists(target._lock.path):
+                os.remove(target._lock.path)
+
+            # store_dir中没有清单，只可能是空目录或之前未完成写入的残留
+            shutil.rmtree(self.store_dir, ignore_errors=True)
+            os.replace(tmp_dir, self.store_dir)
+            self._refresh_manifest()
+            return count
+
+    def _read_manifest(self) -> Dict[Tuple[str, int], str]:
+        if not os.path.exists(self.manifest_path):
+            return {}
+        with open(self.manifest_path, 'r', encoding='utf-8') as f:
+            manifest = json.load(f)
+        return {
+            (item['vector_method'], int(item['dim'])): item['file']
+            for item in manifest.get('partitions', [])
+        }
+
+    def _write_manifest(self) -> None:
+        manifest = {
+            'format': 1,
+            'partitions': [
+                {'file': stem, 'vector_method': method, 'dim': dim}
+                for (method, dim), stem in self._partitions.items()
+            ]
+        }
+        tmp_path = self.manifest_path + '.tmp'
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(manifest, f, ensure_ascii=False, indent=2)
+        os.replace(tmp_path, self.manifest_path)
+
+    def _refresh_manifest(self) -> None:
+        """重新读取清单（其他进程可能新建了分区）"""
+        self._partitions = self._read_manifest()
+
+    def signature(self) -> Tuple:
+        """清单和全部分区文件的签名，用于判断缓存是否失效"""
+        self._refresh_manifest()
+        files = [self.manifest_path]
+        for stem in sorted(self._partitions.values()):
+            files.extend(self._paths(stem))
+        return tuple(_file_signature(path) for path in files)
+
+    def _paths(self, stem: str) -> Tuple[str, str]:
+        return (os.path.join(self.store_dir, f'{stem}.f32'),
+                os.path.join(self.store_dir, f'{stem}.meta.csv'))
+
+    def _ensure_partition(self, vector_method: str, dim: int) -> str:
+        """获取分区文件名，不存在时创建分区（需持有锁，清单在锁内重新读取，不会覆盖其他进程新建的分区）"""
+        self._refresh_manifest()
+        key = (vector_method, dim)
+        if key in self._partitions:
+            return self._partitions[key]
+
+        safe_method = ''.join(c if c.isalnum() or c in '-_' else '_' for c in vector_method) or 'unknown'
+        stem = f'{safe_method}_{dim}'
+        existing = set(self._partitions.values())
+        suffix = 1
+        while stem in existing:
+            suffix += 1
+            stem = f'{safe_method}_{dim}_{suffix}'
+
+        vec_path, meta_path = self._paths(stem)
+        open(vec_path, 'ab').close()
+        # 追加模式打开，只在空文件中写标题行，不截断已有的元数据
+        with open(meta_path, 'a', newline='', encoding='utf-8') as f:
+            if f.tell() == 0:
+                csv.writer(f).writerow(self.META_HEADER)
+
+        self._partitions[key] = stem
+        self._write_manifest()
+        return stem
+
+    def append(self, records: Iterable[FaultRecord]) -> int:
+        """追加故障记录（按分区批量写入），返回写入条数"""
+        groups: Dict[Tuple[str, int], List[FaultRecord]] = {}
+        for record in records:
+            groups.setdefault((record.vector_method, len(record.vector)), []).append(record)
+
+        count = 0
+        with self._lock:
+            for (vector_method, dim), group in groups.items():
+                stem = self._ensure_partition(vector_method, dim)
+                vec_path, meta_path = self._paths(stem)
+                matrix = np.asarray([r.vector for r in group], dtype=self.VECTOR_DTYPE).reshape(len(group), dim)
+
+                with open(vec_path, 'ab') as vf:
+                    # 以文件实际长度确定起始行号，忽略崩溃残留的不完整行
+                    row_bytes = dim * self.VECTOR_DTYPE.itemsize
+                    size = vf.seek(0, os.SEEK_END)
+                    start_row = -(-size // row_bytes)
+                    if size % row_bytes:
+                        vf.write(b'\0' * (start_row * row_bytes - size))
+                    vf.write(matrix.tobytes())
+                    vf.flush()
+                    os.fsync(vf.fileno())
+
+                with open(meta_path, 'a', newline='', encoding='utf-8') as mf:
+                    writer = csv.writer(mf)
+                    for offset, record in enumerate(group):
+                        writer.writerow([start_row + offset, record.fault_type,
+                                         record.timestamp, record.log_sample])
+                    mf.flush()
+                    os.fsync(mf.fileno())
+                count += len(group)
+        return count
+
+    def _read_meta(self, meta_path: str, max_row: int) -> Tuple[List[int], List[str], List[str], List[str]]:
+        """读取元数据旁路表，只保留向量已写入的行"""
+        rows, fault_types, timestamps, samples = [], [], [], []
+        if not os.path.exists(meta_path):
+            return rows, fault_types, timestamps, samples
+
+        with open(meta_path, 'r', newline='', encoding='utf-8') as f:
+            reader = csv.reader(f)
+            next(reader, None)  # 跳过标题行
+            try:
+                for row in reader:
+                    if len(row) < 4:
+                        continue
+                    try:
+                        idx = int(row[0])
+                    except ValueError:
+                        continue
+                    if idx < max_row:
+                        rows.append(idx)
+                        fault_types.append(row[1])
+                        timestamps.append(row[2])
+                        samples.append(row[3])
+            except csv.Error as e:
+                # 末尾写入不完整的记录
+                self.logger.warning(f"元数据表读取中断 {meta_path}: {e}")
+        return rows, fault_types, timestamps, samples
+
+    def _load_partition(self, stem: str, dim: int) -> Tuple[np.ndarray, List[str], List[str], List[str]]:
+        """以内存映射方式加载一个分区"""
+        vec_path, meta_path = self._paths(stem)
+        row_bytes = dim * self.VECTOR_DTYPE.itemsize
+        vec_rows = os.path.getsize(vec_path) // row_bytes if os.path.exists(vec_path) else 0
+        rows, fault_types, timestamps, samples = self._read_meta(meta_path, vec_rows)
+
+        if not rows:
+            return np.empty((0, dim), dtype=self.VECTOR_DTYPE), fault_types, timestamps, samples
+
+        matrix = np.memmap(vec_path, dtype=self.VECTOR_DTYPE, mode='r', shape=(vec_rows, dim))
+        if rows[-1] == len(rows) - 1:
+            # 常见情况：行号连续，直接返回映射视图
+            matrix = matrix[:len(rows)]
+        else:
+            matrix = np.asarray(matrix[rows])
+        return matrix, fault_types, timestamps, samples
+
+    def _matching_partitions(self, target_dim: int = None, vector_method: str = None) -> List[Tuple[str, int, str]]:
+        self._refresh_manifest()
+        return [
+            (method, dim, stem)
+            for (method, dim), stem in self._partitions.items()
+            if (target_dim is None or dim == target_dim) and (vector_method is None or method == vector_method)
+        ]
+
+    def load_matrix(self, target_dim: int, vector_method: str = None) -> Tuple[np.ndarray, List[str]]:
+        """加载指定维度的故障记录，向量以(n, dim)的float32矩阵返回"""
+        matrices, fault_types = [], []
+        for method, dim, stem in self._matching_partitions(target_dim, vector_method):
+            matrix, types, _, _ = self._load_partition(stem, dim)
+            if len(types):
+                matrices.append(matrix)
+                fault_types.extend(types)
+
+        if not matrices:
+            return np.empty((0, target_dim), dtype=self.VECTOR_DTYPE), fault_types
+        if len(matrices) == 1:
+            return matrices[0], fault_types
+        return np.concatenate(matrices), fault_types
+
+    def load_records(self, target_dim: int = None, vector_method: str = None) -> Tuple[List[np.ndarray], List[str]]:
+        """加载所有故障记录，支持维度和向量化方法过滤"""
+        vectors, fault_types = [], []
+        for method, dim, stem in self._matching_partitions(target_dim, vector_method):
+            matrix, types, _, _ = self._load_partition(stem, dim)
+            vectors.extend(matrix)
+            fault_types.extend(types)
+        return vectors, fault_types
+
+    def iter_records(self) -> Iterator[FaultRecord]:
+        """逐条读取故障记录"""
+        for method, dim, stem in self._matching_partitions():
+            matrix, fault_types, timestamps, samples = self._load_partition(stem, dim)
+            for i, fault_type in enumerate(fault_types):
+                yield FaultRecord(
+                    vector=np.asarray(matrix[i]),
+                    fault_type=fault_type,
+                    timestamp=timestamps[i],
+                    log_sample=samples[i],
+                    vector_method=method
+                )
+
+    def get_stats(self) -> Dict[str, Any]:
+        """统计记录总数、故障类型分布和维度分布（只读取元数据表）"""
+        fault_type_counts = Counter()
+        dimension_counts = Counter()
+
+        for method, dim, stem in self._matching_partitions():
+            vec_path, meta_path = self._paths(stem)
+            row_bytes = dim * self.VECTOR_DTYPE.itemsize
+            vec_rows = os.path.getsize(vec_path) // row_bytes if os.path.exists(vec_path) else 0
+            _, fault_types, _, _ = self._read_meta(meta_path, vec_rows)
+            fault_type_counts.update(fault_types)
+            dimension_counts[dim] += len(fault_types)
+
+        return {
+            'total_records': sum(fault_type_counts.values()),
+            'fault_type_counts': fault_type_counts,
+            'dimension_counts': +dimension_counts
+        }
+
+
+class FaultLibraryCache:
+    """
+    进程级故障库缓存
+
+    缓存解析后的向量矩阵、故障类型、统计信息以及由它们派生的对象（如相似度检索索引）。
+    通过存储文件签名（修改时间、大小）判断是否被其他进程修改，签名检查间隔为check_interval秒，
+    稳态下识别请求不需要任何磁盘读取；本进程写入时直接更新统计并只丢弃受影响维度的矩阵。
+    """
+
+    def __init__(self, store, check_interval: float = 1.0):
+        self.store = store
+        self.check_interval = check_interval
+        self.generation = 0
+        self._lock = threading.RLock()
+        self._signature = None
+        self._checked_at = None
+        self._matrices: Dict[Tuple[int, Optional[str]], Tuple[np.ndarray, List[str]]] = {}
+        self._derived: Dict[Any, Any] = {}
+        self._stats = None
+
+    def _validate(self, force: bool = False) -> None:
+        """按间隔（force时立即）检查文件签名，被外部修改时清空缓存（需持有锁）"""
+        now = time.monotonic()
+        if not force and self._checked_at is not None and now - self._checked_at < self.check_interval:
+            return
+        self._checked_at = now
+        signature = self.store.signature()
+        if signature != self._signature:
+            self._clear()
+            self._signature = signature
+
+    def _clear(self) -> None:
+        self._matrices.clear()
+        self._derived.clear()
+        self._stats = None
+        self.generation += 1
+
+    def invalidate(self) -> None:
+        """强制下次访问时重新读取存储"""
+        with self._lock:
+            self._clear()
+            self._signature = None
+            self._checked_at = None
+
+    def load_matrix(self, target_dim: int, vector_method: str = None) -> Tuple[np.ndarray, List[str]]:
+        """获取指定维度的向量矩阵与故障类型（命中缓存时不读取磁盘）"""
+        key = (target_dim, vector_method)
+        with self._lock:
+            self._validate()
+            if key not in self._matrices:
+                self._matrices[key] = self.store.load_matrix(target_dim, vector_method)
+            return self._matrices[key]
+
+    def get_derived(self, key, factory):
+        """
+        获取由故障库数据派生的缓存对象，缓存失效时通过factory()重新构建
+
+        Args:
+            key: 缓存键，包含维度时应为(name, dim, ...)形式，以便写入时按维度失效
+            factory: 无参构建函数
+        """
+        with self._lock:
+            self._validate()
+            if key not in self._derived:
+                self._derived[key] = factory()
+            return self._derived[key]
+
+    def get_stats(self) -> Dict[str, Any]:
+        """获取统计信息（命中缓存时为O(1)）"""
+        with self._lock:
+            self._validate()
+            if self._stats is None:
+                self._stats = self.store.get_stats()
+            return {
+                'total_records': self._stats['total_records'],
+                'fault_type_counts': Counter(self._stats['fault_type_counts']),
+                'dimension_counts': Counter(self._stats['dimension_counts'])
+            }
+
+    def append(self, records: List[FaultRecord]) -> int:
+        """写入存储并同步更新缓存"""
+        return self.append_with_offsets(records)[0]
+
+    def append_with_offsets(self, records: List[FaultRecord]) -> Tuple[int, Dict[Tuple[str, int], int]]:
+        """
+        写入存储并同步更新缓存
+
+        Returns:
+            (写入条数, {(向量化方法, 维度): 写入前该分区的记录数})，即新记录在load_matrix(dim, method)矩阵中的起始行号
+        """
+        with self._lock, self.store.lock():
+            # 写入后会把当前签名记为已同步，写入前必须确认缓存包含其他进程之前的全部写入；
+            # 持有存储写锁，检查和写入之间不会有其他进程追加
+            self._validate(force=True)
+            offsets = {}
+            for record in records:
+                key = (record.vector_method, len(record.vector))
+                if key not in offsets:
+                    offsets[key] = len(self.load_matrix(key[1], key[0])[1])
+            count = self.store.append(records)
+
+            if self._stats is not None:
+                for record in records:
+                    self._stats['total_records'] += 1
+                    self._stats['fault_type_counts'][record.fault_type] += 1
+                    self._stats['dimension_counts'][len(record.vector)] += 1
+
+            dims = {len(record.vector) for record in records}
+            for key in [k for k in self._matrices if k[0] in dims]:
+                del self._matrices[key]
+            for key in [k for k in self._derived if isinstance(k, tuple) and len(k) > 1 and k[1] in dims]:
+                del self._derived[key]
+
+            self._signature = self.store.signature()
+            self.generation += 1
+            return count, offsets
+
+
+def _file_signature(path: str) -> Optional[Tuple[int, int]]:
+    try:
+        stat = os.stat(path)
+    except OSError:
+        return None
+    return stat.st_mtime_ns, stat.st_size
+
+
+def copy_records(source, target, batch_size: int = 1000) -> int:
+    """在两个存储后端之间复制全部记录（用于CSV导入/导出），返回复制条数"""
+    total = 0
+    batch = []
+    for record in source.iter_records():
+        batch.append(record)
+        if len(batch) >= batch_size:
+            total += target.append(batch)
+            batch = []
+    if batch:
+        total += target.append(batch)
+    return total
@@ -0,0 +1,98 @@
+"""
+知识图谱读缓存
+知识图谱读多写少，页面每次加载都要查询全部type/reason/solution节点和关系。NodeManager/RelationshipManager
+的查询结果按查询内容缓存，超过KG_CACHE_TTL秒过期；同一进程内任何写操作都会使全部缓存失效（代数加一），
+其他进程中的写操作最多在TTL之后可见。
+"""
+
+import copy
+import json
+import time
+import threading
+from collections import OrderedDict
+from typing import Any, Dict, Optional, Tuple
+from django.conf import settings
+
+
+class GraphQueryCache:
+    """带TTL和写失效的查询结果缓存（LRU）"""
+
+    def __init__(self, ttl: float = None, max_entries: int = None):
+        """
+        Args:
+            ttl: 缓存有效期（秒），None时读取KG_CACHE_TTL，0表示不缓存
+            max_entries: 最多缓存的查询数，None时读取KG_CACHE_MAX_ENTRIES
+        """
+        self._ttl = ttl
+        self._max_entries = max_entries
+        self._entries: "OrderedDict[str, Tuple[float, Any]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.generation = 0
+        self.hits = 0
+        self.misses = 0
+
+    @property
+    def ttl(self) -> float:
+        return self._ttl if self._ttl is not None else (getattr(settings, 'KG_CACHE_TTL', 30) or 0)
+
+    @property
+    def max_entries(self) -> int:
+        if self._max_entries is not None:
+            return self._max_entries
+        return getattr(settings, 'KG_CACHE_MAX_ENTRIES', 256)
+
+    @staticmethod
+    def make_key(*parts) -> str:
+        """由查询类型和参数生成缓存键"""
+        return json.dumps(parts, sort_keys=True, ensure_ascii=False, default=str)
+
+    def get(self, key: str) -> Optional[Any]:
+        """查询缓存，未命中或已过期时返回None；返回副本，调用方可以修改"""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry[0] > time.monotonic():
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return copy.deepcopy(entry[1])
+            if entry is not None:
+                del self._entries[key]
+            self.misses += 1
+            return None
+
+    def set(self, key: str, value: Any, generation: int) -> None:
+        """
+        写入缓存
+
+        Args:
+            generation: 开始查询时的缓存代数，查询期间发生过写操作时不写入（避免缓存写之前读到的旧结果）
+        """
+        ttl = self.ttl
+        if ttl <= 0:
+            return
+        with self._lock:
+            if generation != self.generation:
+                return
+            self._entries[key] = (time.monotonic() + ttl, copy.deepcopy(value))
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def invalidate(self) -> None:
+        """写操作后调用：清空缓存并增加代数"""
+        with self._lock:
+            self._entries.clear()
+            self.generation += 1
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                'entries': len(self._entries),
+                'generation': self.generation,
+                'hits': self.hits,
+                'misses': self.misses,
+                'ttl': self.ttl
+            }
+
+
+# 进程级单例
+graph_cache = GraphQueryCache()
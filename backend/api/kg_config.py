@@ -11,6 +11,27 @@ NEO4J_CONFIG = {
     'password': os.getenv('NEO4J_PASSWORD', '12345678')
 }
 
+
+def _env_number(name, default, cast=float):
+    value = os.getenv(name)
+    return cast(value) if value not in (None, '') else default
+
+
+# Neo4j驱动连接池配置（进程内所有请求共享同一个驱动）
+NEO4J_POOL_CONFIG = {
+    # 连接池最大连接数
+    'max_connection_pool_size': _env_number('NEO4J_MAX_POOL_SIZE', 50, int),
+    # 连接最长存活时间（秒），超过后关闭重建，应小于服务端/防火墙的空闲超时
+    'max_connection_lifetime': _env_number('NEO4J_MAX_CONNECTION_LIFETIME', 3600),
+    # 从连接池获取连接的最长等待时间（秒）
+    'connection_acquisition_timeout': _env_number('NEO4J_CONNECTION_ACQUISITION_TIMEOUT', 60),
+    # 建立TCP连接的超时时间（秒）
+    'connection_timeout': _env_number('NEO4J_CONNECTION_TIMEOUT', 30)
+}
+
+# 批量写入时每个事务包含的记录数
+KG_BULK_CHUNK_SIZE = _env_number('NEO4J_BULK_CHUNK_SIZE', 1000, int)
+
 # 验证节点类型
 VALID_NODE_LABELS = ['type', 'reason', 'solution']
 
@@ -20,18 +41,21 @@ VALID_RELATIONSHIPS = {
     ('reason', 'solution'): 'DEAL'
 }
 
-# 节点属性配置
+# 节点属性配置（searchable: 模糊搜索(CONTAINS)使用的文本属性，migrate_kg_schema为其创建文本索引）
 NODE_SCHEMAS = {
     'type': {
         'required': ['name'],
-        'optional': ['description']
+        'optional': ['description'],
+        'searchable': ['name', 'description']
     },
     'reason': {
         'required': ['name'],
-        'optional': ['description', 'probability']
+        'optional': ['description', 'probability'],
+        'searchable': ['name', 'description']
     },
     'solution': {
         'required': ['name'],
-        'optional': ['description', 'steps', 'difficulty']
+        'optional': ['description', 'steps', 'difficulty'],
+        'searchable': ['name', 'description', 'steps']
     }
 }
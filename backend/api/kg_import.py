@@ -0,0 +1,220 @@
+"""
+知识图谱批量导入
+知识库按"故障类型-原因-解决方案"三元组整理，每行一条：
+
+    CSV:  type,reason,solution[,type_description,reason_probability,solution_steps,...]
+    JSON: [{"type": "...", "reason": "...", "solution": "...", "reason_probability": 0.6, ...}, ...]
+
+<label>_<属性> 列作为对应节点的属性，空值忽略。同名节点合并为一个，type->reason建立BECAUSE关系，
+reason->solution建立DEAL关系。JSON也可以直接给出节点和关系：
+
+    {"nodes": {"type": [{"name": ...}], ...},
+     "relationships": [{"from_label": "type", "to_label": "reason", "rel_type": "BECAUSE",
+                        "from": {"name": ...}, "to": {"name": ...}, "properties": {...}}]}
+
+节点和关系按标签/关系类型分组后通过NodeManager/RelationshipManager的批量接口写入。
+"""
+
+import csv
+import json
+from typing import Any, Dict, Iterable, List, Tuple
+
+from .kg_config import VALID_NODE_LABELS, VALID_RELATIONSHIPS, NODE_SCHEMAS
+from .knowledge_graph import BulkWriteError
+
+
+class KnowledgeBase:
+    """待导入的节点（按标签）和关系（按起止标签）"""
+
+    def __init__(self):
+        self.nodes: Dict[str, Dict[str, Dict[str, Any]]] = {label: {} for label in VALID_NODE_LABELS}
+        self.relationships: Dict[Tuple[str, str], List[Dict[str, Any]]] = {key: [] for key in VALID_RELATIONSHIPS}
+        self._edges = set()
+
+    def add_node(self, label: str, properties: Dict[str, Any]) -> None:
+        """添加节点，同名节点的属性合并（后出现的覆盖先出现的）"""
+        if label not in self.nodes:
+            raise ValueError(f'Invalid label: {label}. Must be one of: {VALID_NODE_LABELS}')
+        missing = [key for key in NODE_SCHEMAS[label]['required'] if properties.get(key) in (None, '')]
+        if missing:
+            raise ValueError(f'{label} node is missing required properties: {missing}')
+        self.nodes[label].setdefault(properties['name'], {}).update(properties)
+
+    def add_relationship(self, from_label: str, to_label: str, rel_type: str, from_properties: Dict,
+                         to_properties: Dict, properties: Dict = None) -> None:
+        if VALID_RELATIONSHIPS.get((from_label, to_label)) != rel_type:
+            raise ValueError(f'Invalid relationship: {from_label}-[{rel_type}]->{to_label}')
+        self.relationships[(from_label, to_label)].append(
+            {'from': from_properties, 'to': to_properties, 'properties': properties or {}})
+
+    def missing_endpoints(self) -> List[str]:
+        """关系中在知识库里找不到的起止节点（按匹配条件的全部属性比较）"""
+        missing = []
+        for (from_label, to_label), rows in self.relationships.items():
+            for row in rows:
+                for label, match in ((from_label, row['from']), (to_label, row['to'])):
+                    if not self._has_node(label, match):
+                        missing.append(f'{label} {match}')
+        return missing
+
+    def _has_node(self, label: str, match: Dict[str, Any]) -> bool:
+        if 'name' in match:
+            candidates = [self.nodes[label].get(match['name'])]
+        else:
+            candidates = self.nodes[label].values()
+        return any(node is not None and all(node.get(key) == value for key, value in match.items())
+                   for node in candidates)
+
+    def validate(self) -> None:
+        """
+        写入前检查关系的起止节点都在知识库中
+
+        Raises:
+            ValueError: 有找不到的节点（只列出前10个）
+        """
+        missing = self.missing_endpoints()
+        if missing:
+            more = f' (and {len(missing) - 10} more)' if len(missing) > 10 else ''
+            raise ValueError(f"relationship endpoints not found in knowledge base: {', '.join(missing[:10])}{more}")
+
+    def add_triple(self, row: Dict[str, Any]) -> None:
+        """添加一行三元组，缺少的环节跳过（如只有type和reason）"""
+        names = {}
+        for label in VALID_NODE_LABELS:
+            name = row.get(label)
+            if name in (None, ''):
+                continue
+            name = str(name).strip()
+            properties = {'name': name}
+            prefix = f'{label}_'
+            for key, value in row.items():
+                if key.startswith(prefix) and value not in (None, ''):
+                    properties[key[len(prefix):]] = value
+            self.add_node(label, properties)
+            names[label] = name
+
+        for (from_label, to_label), rel_type in VALID_RELATIONSHIPS.items():
+            if from_label in names and to_label in names:
+                edge = (from_label, names[from_label], to_label, names[to_label])
+                if edge not in self._edges:
+                    self._edges.add(edge)
+                    self.add_relationship(from_label, to_label, rel_type,
+                                          {'name': names[from_label]}, {'name': names[to_label]})
+
+    def counts(self) -> Dict[str, int]:
+        return {
+            'nodes': sum(len(nodes) for nodes in self.nodes.values()),
+            'relationships': sum(len(rows) for rows in self.relationships.values())
+        }
+
+
+def load_csv(lines: Iterable[str]) -> KnowledgeBase:
+    kb = KnowledgeBase()
+    for line_no, row in enumerate(csv.DictReader(lines), start=2):
+        try:
+            kb.add_triple({key.strip(): (value.strip() if isinstance(value, str) else value)
+                           for key, value in row.items() if key})
+        except ValueError as e:
+            raise ValueError(f'line {line_no}: {e}')
+    return kb
+
+
+def load_json(data: Any) -> KnowledgeBase:
+    kb = KnowledgeBase()
+    if isinstance(data, list):
+        for index, row in enumerate(data):
+            if not isinstance(row, dict):
+                raise ValueError(f'item {index}: triple must be an object')
+            try:
+                kb.add_triple(row)
+            except ValueError as e:
+                raise ValueError(f'item {index}: {e}')
+        return kb
+    if not isinstance(data, dict):
+        raise ValueError('JSON knowledge base must be a list of triples or an object with nodes/relationships')
+
+    nodes = data.get('nodes') or {}
+    if not isinstance(nodes, dict):
+        raise ValueError('nodes must be an object mapping label to a list of nodes')
+    for label, items in nodes.items():
+        if not isinstance(items, list):
+            raise ValueError(f'nodes.{label} must be a list of objects')
+        for index, properties in enumerate(items):
+            if not isinstance(properties, dict):
+                raise ValueError(f'nodes.{label} item {index}: node must be an object')
+            try:
+                kb.add_node(label, properties)
+            except ValueError as e:
+                raise ValueError(f'nodes.{label} item {index}: {e}')
+
+    relationships = data.get('relationships') or []
+    if not isinstance(relationships, list):
+        raise ValueError('relationships must be a list of objects')
+    for index, rel in enumerate(relationships):
+        if not isinstance(rel, dict):
+            raise ValueError(f'relationships item {index}: relationship must be an object')
+        if not isinstance(rel.get('from'), dict) or not isinstance(rel.get('to'), dict):
+            raise ValueError(f'relationships item {index}: from and to must be objects')
+        if not isinstance(rel.get('properties') or {}, dict):
+            raise ValueError(f'relationships item {index}: properties must be an object')
+        try:
+            kb.add_relationship(rel.get('from_label'), rel.get('to_label'), rel.get('rel_type'),
+                                rel['from'], rel['to'], rel.get('properties'))
+        except ValueError as e:
+            raise ValueError(f'relationships item {index}: {e}')
+    kb.validate()
+    return kb
+
+
+def load_file(path: str, fmt: str = None) -> KnowledgeBase:
+    """按扩展名（或fmt）读取CSV/JSON知识库"""
+    fmt = fmt or ('json' if path.lower().endswith('.json') else 'csv')
+    with open(path, 'r', encoding='utf-8-sig', newline='') as f:
+        if fmt == 'json':
+            return load_json(json.load(f))
+        return load_csv(f)
+
+
+def import_knowledge_base(kg, kb: KnowledgeBase, mode: str = 'merge', chunk_size: int = None) -> Dict[str, int]:
+    """
+    写入知识图谱：先写节点，再写关系
+
+    Args:
+        kg: KnowledgeGraphService
+        mode: merge按name合并已有节点和关系（可重复导入）；create总是新建
+
+    Returns:
+        写入的节点数和关系数
+
+    Raises:
+        ValueError: mode无效或关系的起止节点不在知识库中
+    """
+    if mode not in ('merge', 'create'):
+        raise ValueError("mode must be 'merge' or 'create'")
+    # 关系的起止节点不存在时在写入任何节点之前报错
+    kb.validate()
+    written = {'nodes': 0, 'relationships': 0}
+    try:
+        _import(kg, kb, mode, chunk_size, written)
+    except BulkWriteError as e:
+        # 加上之前各标签/关系类型已提交的记录数
+        e.written += written['nodes'] + written['relationships']
+        raise
+    return written
+
+
+def _import(kg, kb: KnowledgeBase, mode: str, chunk_size: int, written: Dict[str, int]) -> None:
+    for label, nodes in kb.nodes.items():
+        if not nodes:
+            continue
+        rows = list(nodes.values())
+        if mode == 'merge':
+            written['nodes'] += kg.nodes.bulk_merge(label, rows, chunk_size=chunk_size)
+        else:
+            written['nodes'] += kg.nodes.bulk_create(label, rows, chunk_size=chunk_size)
+    for (from_label, to_label), rows in kb.relationships.items():
+        if not rows:
+            continue
+        rel_type = VALID_RELATIONSHIPS[(from_label, to_label)]
+        bulk = kg.relationships.bulk_merge if mode == 'merge' else kg.relationships.bulk_create
+        written['relationships'] += bulk(from_label, to_label, rel_type, rows, chunk_size=chunk_size)
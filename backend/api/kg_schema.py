@@ -0,0 +1,168 @@
+"""
+知识图谱索引和约束
+NodeManager/RelationshipManager的查找、更新、删除和建立关系都按name匹配节点，模糊搜索对文本属性做CONTAINS，
+没有索引时都是按标签全扫描。索引由kg_config.NODE_SCHEMAS推导：
+
+    required属性    范围索引 kg_<label>_<prop>，或唯一约束 kg_<label>_<prop>_unique（--unique，同时提供索引）
+    searchable属性  文本索引 kg_<label>_<prop>_text（服务CONTAINS查询）
+
+migrate_kg_schema命令先读取数据库中已有的索引和约束（按标签和属性比较，不要求名称相同），只执行缺少的部分，
+可以重复执行。
+"""
+
+from typing import Any, Dict, List, Optional
+
+from .kg_config import NODE_SCHEMAS
+
+RANGE_TYPES = ('RANGE', 'BTREE')
+UNIQUE_TYPES = ('UNIQUENESS', 'NODE_PROPERTY_UNIQUENESS')
+
+
+def _quote(name: str) -> str:
+    return '`' + name.replace('`', '``') + '`'
+
+
+def desired_indexes(unique: bool = False) -> List[Dict[str, Any]]:
+    """
+    由NODE_SCHEMAS推导需要的索引
+
+    Returns:
+        [{'name', 'label', 'property', 'kind': 'range'|'unique'|'text', 'statement'}]
+    """
+    indexes = []
+    for label, schema in NODE_SCHEMAS.items():
+        for prop in schema['required']:
+            if unique:
+                name = f'kg_{label}_{prop}_unique'
+                statement = (f'CREATE CONSTRAINT {name} IF NOT EXISTS '
+                             f'FOR (n:{label}) REQUIRE n.{prop} IS UNIQUE')
+            else:
+                name = f'kg_{label}_{prop}'
+                statement = f'CREATE INDEX {name} IF NOT EXISTS FOR (n:{label}) ON (n.{prop})'
+            indexes.append({'name': name, 'label': label, 'property': prop,
+                            'kind': 'unique' if unique else 'range', 'statement': statement})
+        for prop in schema.get('searchable', []):
+            name = f'kg_{label}_{prop}_text'
+            indexes.append({'name': name, 'label': label, 'property': prop, 'kind': 'text',
+                            'statement': f'CREATE TEXT INDEX {name} IF NOT EXISTS FOR (n:{label}) ON (n.{prop})'})
+    return indexes
+
+
+def existing_indexes(client) -> List[Dict[str, Any]]:
+    """数据库中已有的单属性节点索引（含约束的支撑索引）"""
+    records = client.query(
+        "SHOW INDEXES YIELD name, type, entityType, labelsOrTypes, properties, state, "
+        "populationPercent, owningConstraint"
+    )
+    constraints = {
+        record['name'] for record in client.query("SHOW CONSTRAINTS YIELD name, type")
+        if record['type'] in UNIQUE_TYPES
+    }
+    indexes = []
+    for record in records:
+        if record['entityType'] != 'NODE' or not record['labelsOrTypes'] or len(record['properties'] or []) != 1:
+            continue
+        if record['type'] in RANGE_TYPES:
+            kind = 'unique' if record['owningConstraint'] in constraints else 'range'
+        elif record['type'] == 'TEXT':
+            kind = 'text'
+        else:
+            continue
+        indexes.append({
+            'name': record['name'],
+            'label': record['labelsOrTypes'][0],
+            'property': record['properties'][0],
+            'kind': kind,
+            'constraint': record['owningConstraint'],
+            'state': record['state'],
+            'population_percent': record['populationPercent']
+        })
+    return indexes
+
+
+def _find(existing: List[Dict], label: str, prop: str, kinds) -> Optional[Dict]:
+    for index in existing:
+        if index['label'] == label and index['property'] == prop and index['kind'] in kinds:
+            return index
+    return None
+
+
+def find_duplicates(client, label: str, prop: str, limit: int = 10) -> List[Dict]:
+    """唯一约束创建前检查重复值"""
+    return client.query(
+        f"MATCH (n:{label}) WHERE n.{prop} IS NOT NULL "
+        f"WITH n.{prop} AS value, count(*) AS count WHERE count > 1 "
+        f"RETURN value, count ORDER BY count DESC LIMIT $limit",
+        {'limit': limit}
+    )
+
+
+def plan_migration(client, unique: bool = False) -> List[Dict[str, Any]]:
+    """
+    对比已有索引，生成迁移步骤
+
+    Returns:
+        [{'action': 'create'|'drop'|'skip'|'blocked', 'name', 'label', 'property', 'kind',
+          'statement'(create/drop), 'reason'(skip/blocked)}]
+        已有普通范围索引而要求唯一约束时，先删除范围索引再创建约束；有重复值的属性不创建约束（blocked）
+    """
+    existing = existing_indexes(client)
+    steps = []
+    for index in desired_indexes(unique):
+        label, prop, kind = index['label'], index['property'], index['kind']
+        step = {'name': index['name'], 'label': label, 'property': prop, 'kind': kind}
+        # 唯一约束的支撑索引同样满足范围索引的需要
+        current = _find(existing, label, prop, ('range', 'unique') if kind == 'range' else (kind,))
+        if current is not None:
+            steps.append({**step, 'action': 'skip', 'reason': f"exists as {current['name']}"})
+            continue
+
+        if kind == 'unique':
+            duplicates = find_duplicates(client, label, prop)
+            if duplicates:
+                steps.append({**step, 'action': 'blocked', 'reason': 'duplicate values', 'duplicates': duplicates})
+                continue
+            plain = _find(existing, label, prop, ('range',))
+            if plain is not None:
+                steps.append({'action': 'drop', 'name': plain['name'], 'label': label, 'property': prop,
+                              'kind': 'range', 'statement': f"DROP INDEX {_quote(plain['name'])} IF EXISTS"})
+        steps.append({**step, 'action': 'create', 'statement': index['statement']})
+    return steps
+
+
+def apply_migration(client, steps: List[Dict[str, Any]]) -> int:
+    """按顺序执行create/drop步骤，返回执行的语句数"""
+    executed = 0
+    for step in steps:
+        if step['action'] in ('create', 'drop'):
+            client.query(step['statement'])
+            executed += 1
+    return executed
+
+
+def await_indexes(client, timeout: int = 300) -> None:
+    """等待所有索引填充完成（ONLINE）"""
+    client.query("CALL db.awaitIndexes($timeout)", {'timeout': timeout})
+
+
+def index_status(client) -> List[Dict[str, Any]]:
+    """
+    NODE_SCHEMAS需要的各索引当前状态，用于get_knowledge_graph_schema
+
+    Returns:
+        [{'label', 'property', 'kind', 'name', 'state', 'population_percent'}]，缺少的索引state为'MISSING'
+    """
+    existing = existing_indexes(client)
+    status = []
+    for index in desired_indexes():
+        kinds = ('unique', 'range') if index['kind'] == 'range' else (index['kind'],)
+        current = _find(existing, index['label'], index['property'], kinds)
+        status.append({
+            'label': index['label'],
+            'property': index['property'],
+            'kind': current['kind'] if current else index['kind'],
+            'name': current['name'] if current else None,
+            'state': current['state'] if current else 'MISSING',
+            'population_percent': current['population_percent'] if current else None
+        })
+    return status
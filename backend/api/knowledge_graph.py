@@ -1,28 +1,128 @@
 from neo4j import GraphDatabase
 from typing import Dict, Optional, List, Tuple, Any
+from datetime import datetime
+import re
+import atexit
 import logging
-from .kg_config import NEO4J_CONFIG
+import threading
+from .kg_config import NEO4J_CONFIG, NEO4J_POOL_CONFIG, VALID_NODE_LABELS, VALID_RELATIONSHIPS, KG_BULK_CHUNK_SIZE
+from .kg_cache import GraphQueryCache, graph_cache
 
 logger = logging.getLogger(__name__)
 
+
+class Neo4jDriverRegistry:
+    """
+    进程级Neo4j驱动注册表
+
+    驱动自带连接池，所有请求共享同一个驱动，避免每个请求都重新建立TCP连接、Bolt握手和认证；
+    只在创建驱动时用verify_connectivity检查一次连通性，进程退出时关闭驱动。
+    """
+
+    def __init__(self, config: Dict = None, pool_config: Dict = None):
+        self._config = config or NEO4J_CONFIG
+        self._pool_config = pool_config or NEO4J_POOL_CONFIG
+        self._lock = threading.Lock()
+        self._driver = None
+        self._connected_at = None
+        self._error = None
+
+    def get_driver(self):
+        """
+        获取共享驱动，首次调用时创建并检查连通性
+
+        Raises:
+            连接或认证失败时抛出neo4j驱动的异常（不缓存失败的驱动，下次调用重试）
+        """
+        driver = self._driver
+        if driver is not None:
+            return driver
+
+        with self._lock:
+            if self._driver is not None:
+                return self._driver
+            driver = GraphDatabase.driver(
+                self._config['uri'],
+                auth=(self._config['user'], self._config['password']),
+                **self._pool_config
+            )
+            try:
+                driver.verify_connectivity()
+            except Exception as e:
+                driver.close()
+                self._error = str(e)
+                logger.error(f"Failed to connect to Neo4j: {e}")
+                raise
+            self._driver = driver
+            self._connected_at = datetime.now().isoformat()
+            self._error = None
+            logger.info(f"Neo4j驱动已创建: {self._config['uri']}")
+            return driver
+
+    def warm_up(self) -> bool:
+        """预先创建驱动（用于AppConfig.ready），失败时只记录日志不抛出异常"""
+        try:
+            self.get_driver()
+            return True
+        except Exception:
+            return False
+
+    def close(self):
+        """关闭共享驱动及其连接池"""
+        with self._lock:
+            driver, self._driver = self._driver, None
+        if driver is not None:
+            driver.close()
+            logger.info("Neo4j驱动已关闭")
+
+    def status(self) -> Dict[str, Any]:
+        return {
+            'connected': self._driver is not None,
+            'uri': self._config['uri'],
+            'connected_at': self._connected_at,
+            'error': self._error,
+            'pool': dict(self._pool_config)
+        }
+
+
+# 进程级单例，进程退出时关闭连接池
+driver_registry = Neo4jDriverRegistry()
+atexit.register(driver_registry.close)
+
+
+class BulkWriteError(Exception):
+    """批量写入中途失败，written为失败前已提交的记录数"""
+
+    def __init__(self, message: str, written: int):
+        super().__init__(message)
+        self.written = written
+
+
 class Neo4jClient:
     def __init__(self, uri: str = None, user: str = None, password: str = None):
+        """
+        默认使用进程内共享的驱动（连接池）；显式指定连接参数时创建独立的驱动，close时关闭
+        """
         # 使用配置文件中的默认值
         self.uri = uri or NEO4J_CONFIG['uri']
         self.user = user or NEO4J_CONFIG['user']
         self.password = password or NEO4J_CONFIG['password']
+        self._owns_driver = any(value is not None for value in (uri, user, password))
         
         try:
-            self.driver = GraphDatabase.driver(self.uri, auth=(self.user, self.password))
-            # 测试连接
-            with self.driver.session() as session:
-                session.run("RETURN 1")
+            if self._owns_driver:
+                self.driver = GraphDatabase.driver(self.uri, auth=(self.user, self.password), **NEO4J_POOL_CONFIG)
+                # 测试连接
+                self.driver.verify_connectivity()
+            else:
+                self.driver = driver_registry.get_driver()
         except Exception as e:
             logger.error(f"Failed to connect to Neo4j: {e}")
             raise
 
     def close(self):
-        if hasattr(self, 'driver'):
+        # 共享驱动由driver_registry管理，这里只关闭自己创建的驱动
+        if hasattr(self, 'driver') and self._owns_driver:
             self.driver.close()
 
     def __enter__(self):
@@ -33,13 +133,43 @@ class Neo4jClient:
 
     def run(self, query: str, parameters: Optional[Dict] = None) -> List[Dict]:
         try:
-            with self.driver.session() as session:
-                records = session.run(query, parameters or {})
-                return self._format_records(records)
+            return self.query(query, parameters)
         except Exception as e:
             logger.error(f"Neo4j Query Error: {e}")
             return []
 
+    def query(self, query: str, parameters: Optional[Dict] = None) -> List[Dict]:
+        """执行查询，与run相同但查询失败时抛出异常"""
+        with self.driver.session() as session:
+            records = session.run(query, parameters or {})
+            return self._format_records(records)
+
+    def write_batches(self, query: str, rows: List[Dict], chunk_size: int = None) -> int:
+        """
+        分块批量写入：每块rows作为$rows参数在一个写事务中执行（查询需返回count列）
+
+        Returns:
+            各块count之和
+
+        Raises:
+            BulkWriteError: 某一块失败（之前的块已提交）
+        """
+        chunk_size = max(1, chunk_size or KG_BULK_CHUNK_SIZE)
+        written = 0
+        with self.driver.session() as session:
+            for start in range(0, len(rows), chunk_size):
+                try:
+                    written += session.execute_write(self._run_count, query, rows[start:start + chunk_size])
+                except Exception as e:
+                    logger.error(f"Neo4j Bulk Write Error: {e}")
+                    raise BulkWriteError(str(e), written)
+        return written
+
+    @staticmethod
+    def _run_count(tx, query: str, rows: List[Dict]) -> int:
+        record = tx.run(query, rows=rows).single()
+        return record["count"] if record else 0
+
     @staticmethod
     def _format_records(records) -> List[Dict]:
         result = []
@@ -65,14 +195,78 @@ class CypherUtils:
         params = {f"{prefix}{k}": v for k, v in props.items()}
         return clause, params
 
+    IDENTIFIER = re.compile(r'^[A-Za-z_][A-Za-z0-9_]*$')
 
-class NodeManager:
-    def __init__(self, client: Neo4jClient):
+    @classmethod
+    def build_row_where(cls, var: str, keys: Tuple[str, ...], row_field: str) -> str:
+        """UNWIND批量查询的匹配条件：var.k = row.row_field.k（属性名拼接进查询，必须是合法标识符）"""
+        for k in keys:
+            if not cls.IDENTIFIER.match(k):
+                raise ValueError(f"Invalid property name: {k}")
+        return " AND ".join(f"{var}.{k} = {row_field}.{k}" for k in keys)
+
+    @staticmethod
+    def group_by_keys(rows: List[Dict], field: str = None) -> Dict[Tuple[str, ...], List[Dict]]:
+        """按匹配条件的属性名集合分组，同一组可以用同一个UNWIND查询（保持组内顺序）"""
+        groups = {}
+        for row in rows:
+            conditions = row[field] if field else row
+            if not conditions:
+                raise ValueError("Match conditions must not be empty")
+            groups.setdefault(tuple(sorted(conditions)), []).append(row)
+        return groups
+
+
+class CachedManager:
+    """查询结果经过GraphQueryCache缓存，写操作后使缓存失效"""
+
+    def __init__(self, client: Neo4jClient, cache: Optional[GraphQueryCache] = None):
         self.client = client
+        self.cache = cache
 
+    def _cached_run(self, query: str, params: Dict) -> List[Dict]:
+        if self.cache is None:
+            return self.client.run(query, params)
+        key = self.cache.make_key(type(self).__name__, query, params)
+        records = self.cache.get(key)
+        if records is not None:
+            return records
+        generation = self.cache.generation
+        try:
+            records = self.client.query(query, params)
+        except Exception as e:
+            # 查询失败的结果不缓存
+            logger.error(f"Neo4j Query Error: {e}")
+            return []
+        self.cache.set(key, records, generation)
+        return records
+
+    def _write(self, query: str, params: Dict) -> List[Dict]:
+        try:
+            return self.client.run(query, params)
+        finally:
+            if self.cache is not None:
+                self.cache.invalidate()
+
+    def _write_batches(self, jobs: List[Tuple[str, List[Dict]]], chunk_size: int = None) -> int:
+        """依次执行多个(查询, 行)批量写入，返回写入总数；失败时BulkWriteError.written包含之前各查询的写入数"""
+        written = 0
+        try:
+            for query, rows in jobs:
+                written += self.client.write_batches(query, rows, chunk_size)
+        except BulkWriteError as e:
+            e.written += written
+            raise
+        finally:
+            if self.cache is not None:
+                self.cache.invalidate()
+        return written
+
+
+class NodeManager(CachedManager):
     def create(self, label: str, props: Dict):
         query = f"CREATE (n:{label} $props) RETURN n, labels(n) as node_labels"
-        return self.client.run(query, {"props": props})
+        return self._write(query, {"props": props})
 
     def find(self, label: str, conditions: Optional[Dict] = None):
         if conditions:
@@ -80,32 +274,64 @@ class NodeManager:
             query = f"MATCH (n:{label}) WHERE {where} RETURN n, labels(n) as node_labels"
         else:
             query, params = f"MATCH (n:{label}) RETURN n, labels(n) as node_labels", {}
-        return self.client.run(query, params)
+        return self._cached_run(query, params)
 
     def update(self, label: str, match_props: Dict, update_props: Dict):
         where, where_params = CypherUtils.build_where_and_params("n", match_props, "m_")
         set_clause, set_params = CypherUtils.build_set_clause_and_params("n", update_props, "u_")
         query = f"MATCH (n:{label}) WHERE {where} SET {set_clause} RETURN n, labels(n) as node_labels"
-        return self.client.run(query, {**where_params, **set_params})
+        return self._write(query, {**where_params, **set_params})
 
     def delete(self, label: str, conditions: Dict):
         where, params = CypherUtils.build_where_and_params("n", conditions)
         query = f"MATCH (n:{label}) WHERE {where} DETACH DELETE n"
-        return self.client.run(query, params)
+        return self._write(query, params)
 
     def fuzzy_find(self, label: str, field: str, pattern: str):
         query = f"MATCH (n:{label}) WHERE n.{field} CONTAINS $value RETURN n, labels(n) as node_labels"
-        return self.client.run(query, {"value": pattern})
+        return self._cached_run(query, {"value": pattern})
+
+    def bulk_create(self, label: str, rows: List[Dict], chunk_size: int = None) -> int:
+        """批量创建节点（每行与create相同），返回创建的节点数"""
+        query = f"UNWIND $rows AS props CREATE (n:{label}) SET n = props RETURN count(n) AS count"
+        return self._write_batches([(query, rows)], chunk_size)
+
+    def bulk_merge(self, label: str, rows: List[Dict], key: str = "name", chunk_size: int = None) -> int:
+        """
+        批量创建或更新节点：按key属性匹配，不存在时创建，存在时用行中的属性更新（与update相同，只覆盖给出的属性）
+
+        Returns:
+            创建或更新的节点数
+        """
+        if not CypherUtils.IDENTIFIER.match(key):
+            raise ValueError(f"Invalid property name: {key}")
+        if any(row.get(key) is None for row in rows):
+            raise ValueError(f"Every row must have the merge key '{key}'")
+        query = (
+            f"UNWIND $rows AS props "
+            f"MERGE (n:{label} {{{key}: props.{key}}}) "
+            f"SET n += props RETURN count(n) AS count"
+        )
+        return self._write_batches([(query, rows)], chunk_size)
+
+    def bulk_delete(self, label: str, conditions: List[Dict], chunk_size: int = None) -> int:
+        """批量删除节点（每行是与delete相同的匹配条件，同时删除关联关系），返回删除的节点数"""
+        jobs = []
+        for keys, rows in CypherUtils.group_by_keys(conditions).items():
+            where = CypherUtils.build_row_where("n", keys, "cond")
+            query = (
+                f"UNWIND $rows AS cond MATCH (n:{label}) WHERE {where} "
+                f"WITH DISTINCT n DETACH DELETE n RETURN count(*) AS count"
+            )
+            jobs.append((query, rows))
+        return self._write_batches(jobs, chunk_size)
 
     def get_all_labels(self):
         query = "CALL db.labels()"
         return self.client.run(query)
 
 
-class RelationshipManager:
-    def __init__(self, client: Neo4jClient):
-        self.client = client
-
+class RelationshipManager(CachedManager):
     def create(self, from_label: str, from_props: Dict,
                      to_label: str, to_props: Dict,
                      rel_type: str, rel_props: Optional[Dict] = None):
@@ -118,7 +344,7 @@ class RelationshipManager:
             f"RETURN a, labels(a) as a_labels, r, b, labels(b) as b_labels"
         )
         params = {**params_from, **params_to, "rel_props": rel_props or {}}
-        return self.client.run(query, params)
+        return self._write(query, params)
 
     def find(self, from_label: str, to_label: str, rel_type: str, rel_props: Optional[Dict] = None):
         query = f"MATCH (a:{from_label})-[r:{rel_type}]->(b:{to_label})"
@@ -128,7 +354,7 @@ class RelationshipManager:
             query += f" WHERE {where_rel}"
             params.update(rel_params)
         query += " RETURN a, labels(a) as a_labels, r, b, labels(b) as b_labels"
-        return self.client.run(query, params)
+        return self._cached_run(query, params)
 
     def delete(self, from_label: str, from_props: Dict,
                      to_label: str, to_props: Dict,
@@ -141,19 +367,123 @@ class RelationshipManager:
             f"DELETE r"
         )
         params = {**params_from, **params_to}
-        return self.client.run(query, params)
+        return self._write(query, params)
+
+    @staticmethod
+    def _group_rows(rows: List[Dict], with_properties: bool) -> Dict[Tuple, List[Dict]]:
+        """按起止节点条件的属性名集合分组（同一组用同一个UNWIND查询）"""
+        groups = {}
+        for row in rows:
+            if not row.get("from") or not row.get("to"):
+                raise ValueError("Every relationship needs non-empty 'from' and 'to' conditions")
+            item = {"from": row["from"], "to": row["to"]}
+            if with_properties:
+                item["properties"] = row.get("properties") or {}
+            groups.setdefault((tuple(sorted(row["from"])), tuple(sorted(row["to"]))), []).append(item)
+        return groups
+
+    def _bulk_relationships(self, from_label: str, to_label: str, rel_type: str, rows: List[Dict],
+                            action: str, chunk_size: int = None) -> int:
+        """
+        按起止节点条件分组执行批量关系写入
+
+        Args:
+            rows: [{'from': 起始节点条件, 'to': 目标节点条件, 'properties': 关系属性(可选)}]
+            action: 每行匹配到(a, b)之后执行的子句
+        """
+        jobs = []
+        for (from_keys, to_keys), group in self._group_rows(rows, with_properties=True).items():
+            where_from = CypherUtils.build_row_where("a", from_keys, "row.from")
+            where_to = CypherUtils.build_row_where("b", to_keys, "row.to")
+            query = (
+                f"UNWIND $rows AS row "
+                f"MATCH (a:{from_label}), (b:{to_label}) WHERE {where_from} AND {where_to} "
+                f"{action} RETURN count(*) AS count"
+            )
+            jobs.append((query, group))
+        return self._write_batches(jobs, chunk_size)
+
+    def bulk_create(self, from_label: str, to_label: str, rel_type: str, rows: List[Dict],
+                    chunk_size: int = None) -> int:
+        """批量创建关系（每行与create相同，匹配到的每对节点之间创建一条关系），返回创建的关系数"""
+        return self._bulk_relationships(from_label, to_label, rel_type, rows,
+                                        f"CREATE (a)-[r:{rel_type}]->(b) SET r = row.properties", chunk_size)
+
+    def bulk_merge(self, from_label: str, to_label: str, rel_type: str, rows: List[Dict],
+                   chunk_size: int = None) -> int:
+        """批量创建关系，已存在的关系不重复创建（只更新给出的属性），返回创建或更新的关系数"""
+        return self._bulk_relationships(from_label, to_label, rel_type, rows,
+                                        f"MERGE (a)-[r:{rel_type}]->(b) SET r += row.properties", chunk_size)
+
+    def bulk_delete(self, from_label: str, to_label: str, rel_type: str, rows: List[Dict],
+                    chunk_size: int = None) -> int:
+        """批量删除关系（每行与delete相同），返回删除的关系数"""
+        jobs = []
+        for (from_keys, to_keys), group in self._group_rows(rows, with_properties=False).items():
+            where_from = CypherUtils.build_row_where("a", from_keys, "row.from")
+            where_to = CypherUtils.build_row_where("b", to_keys, "row.to")
+            query = (
+                f"UNWIND $rows AS row "
+                f"MATCH (a:{from_label})-[r:{rel_type}]->(b:{to_label}) WHERE {where_from} AND {where_to} "
+                f"WITH DISTINCT r DELETE r RETURN count(*) AS count"
+            )
+            jobs.append((query, group))
+        return self._write_batches(jobs, chunk_size)
 
     def get_all_relationship_types(self):
         query = "CALL db.relationshipTypes()"
         return self.client.run(query)
 
 
+class GraphManager(CachedManager):
+    """整图查询"""
+
+    @staticmethod
+    def full_graph_query() -> str:
+        """
+        一次查询返回全部type/reason/solution节点和它们之间的有效关系（按elementId去重），
+        节点和关系只在各自的列表中出现一次，关系通过source/target引用节点id
+        """
+        node_filter = " OR ".join(f"n:{label}" for label in VALID_NODE_LABELS)
+        rel_filter = " OR ".join(
+            f"(n:{from_label} AND type(r) = '{rel_type}' AND m:{to_label})"
+            for (from_label, to_label), rel_type in VALID_RELATIONSHIPS.items()
+        )
+        return (
+            f"MATCH (n) WHERE {node_filter} "
+            f"OPTIONAL MATCH (n)-[r]->(m) WHERE {rel_filter} "
+            f"WITH collect(DISTINCT n) AS nodes, collect(DISTINCT r) AS rels "
+            f"RETURN [x IN nodes | {{id: elementId(x), labels: labels(x), properties: properties(x)}}] AS nodes, "
+            f"[x IN rels | {{id: elementId(x), type: type(x), source: elementId(startNode(x)), "
+            f"target: elementId(endNode(x)), properties: properties(x)}}] AS relationships"
+        )
+
+    def full_graph(self) -> Dict[str, List[Dict]]:
+        """
+        Returns:
+            {'nodes': [{id, labels, properties}], 'relationships': [{id, type, source, target, properties}]}
+        """
+        records = self._cached_run(self.full_graph_query(), {})
+        if not records:
+            return {'nodes': [], 'relationships': []}
+        return {'nodes': records[0]['nodes'], 'relationships': records[0]['relationships']}
+
+
 class KnowledgeGraphService:
-    def __init__(self):
+    def __init__(self, cache: Optional[GraphQueryCache] = graph_cache):
+        """
+        Args:
+            cache: 查询缓存（默认进程内共享的graph_cache），None表示不缓存
+        """
         # 可以从Django settings中获取连接配置
         self.client = Neo4jClient()
-        self.nodes = NodeManager(self.client)
-        self.relationships = RelationshipManager(self.client)
+        self.nodes = NodeManager(self.client, cache)
+        self.relationships = RelationshipManager(self.client, cache)
+        self.graph = GraphManager(self.client, cache)
+
+    def get_full_graph(self) -> Dict[str, List[Dict]]:
+        """一次往返获取整个type→reason→solution图（节点和关系按id引用）"""
+        return self.graph.full_graph()
 
     def close(self):
         self.client.close()
@@ -0,0 +1,146 @@
+"""
+日志文件流式上传
+分析接口原先把整个日志作为JSON字符串放在请求体中，大日志在内存中至少存在三份（原始请求体、解码后的字符串、
+按行拆分的列表）。上传接口接受multipart文件或原始请求体（可选gzip/zstd压缩），边读边解压、逐行交给解析器；
+需要多次遍历的清洗流程先把解压后的内容写入临时文件（小文件留在内存中）。
+
+压缩格式按Content-Encoding请求头或文件头魔数识别，zstd需要安装zstandard库。
+"""
+
+import io
+import gzip
+import shutil
+import tempfile
+from typing import Iterator, Optional, TextIO, BinaryIO
+from django.conf import settings
+
+
+GZIP_MAGIC = b'\x1f\x8b'
+ZSTD_MAGIC = b'\x28\xb5\x2f\xfd'
+
+READ_CHUNK_SIZE = 1024 * 1024
+
+
+class UploadTooLarge(ValueError):
+    """解压后的日志超过LOG_UPLOAD_MAX_BYTES"""
+
+
+class UnsupportedEncoding(ValueError):
+    """不支持的压缩格式"""
+
+
+def max_upload_bytes() -> Optional[int]:
+    return getattr(settings, 'LOG_UPLOAD_MAX_BYTES', 1024 * 1024 * 1024)
+
+
+def spool_memory_bytes() -> int:
+    return getattr(settings, 'LOG_UPLOAD_SPOOL_MEMORY', 8 * 1024 * 1024)
+
+
+class _SourceReader(io.RawIOBase):
+    """把只有read(n)方法的对象（HttpRequest、UploadedFile、解压流）包装为标准的二进制流，并限制读取总量"""
+
+    def __init__(self, source, limit: Optional[int] = None):
+        self._source = source
+        self._limit = limit
+        self.bytes_read = 0
+
+    def readable(self) -> bool:
+        return True
+
+    def readinto(self, buffer) -> int:
+        data = self._source.read(len(buffer))
+        n = len(data)
+        buffer[:n] = data
+        self.bytes_read += n
+        if self._limit is not None and self.bytes_read > self._limit:
+            raise UploadTooLarge(f"日志超过允许的最大大小 {self._limit} 字节")
+        return n
+
+
+def open_binary_stream(source, content_encoding: str = None) -> BinaryIO:
+    """
+    打开上传内容的解压后二进制流
+
+    Args:
+        source: 支持read(n)的对象（HttpRequest或UploadedFile）
+        content_encoding: Content-Encoding请求头（可选），未指定时按文件头魔数识别
+
+    Returns:
+        解压后的二进制流，读取总量超过LOG_UPLOAD_MAX_BYTES时抛出UploadTooLarge
+    """
+    raw = io.BufferedReader(_SourceReader(source), buffer_size=READ_CHUNK_SIZE)
+    encoding = (content_encoding or '').strip().lower()
+    head = raw.peek(4)[:4]
+
+    if encoding in ('gzip', 'x-gzip') or (not encoding and head.startswith(GZIP_MAGIC)):
+        stream = gzip.GzipFile(fileobj=raw, mode='rb')
+    elif encoding in ('zstd', 'zst') or (not encoding and head.startswith(ZSTD_MAGIC)):
+        try:
+            import zstandard
+        except ImportError:
+            raise UnsupportedEncoding("zstd压缩需要安装zstandard库")
+        stream = zstandard.ZstdDecompressor().stream_reader(raw)
+    elif encoding in ('', 'identity'):
+        stream = raw
+    else:
+        raise UnsupportedEncoding(f"不支持的压缩格式: {content_encoding}")
+
+    return io.BufferedReader(_SourceReader(stream, max_upload_bytes()), buffer_size=READ_CHUNK_SIZE)
+
+
+def open_text_stream(binary: BinaryIO, encoding: str = 'utf-8') -> TextIO:
+    """按行读取的文本流，只以\\n分行，与str.split('\\n')一致"""
+    return io.TextIOWrapper(binary, encoding=encoding, errors='replace', newline='\n')
+
+
+def iter_lines(text: TextIO) -> Iterator[str]:
+    """逐行读取（去掉行尾换行符）"""
+    for line in text:
+        yield line.rstrip('\n')
+
+
+def spool_text(binary: BinaryIO, encoding: str = 'utf-8') -> TextIO:
+    """
+    把解压后的内容写入临时文件，返回可seek的文本流（用于需要多次遍历的日志清洗）
+
+    不超过LOG_UPLOAD_SPOOL_MEMORY的内容留在内存中，更大的内容写入磁盘临时文件，关闭后自动删除
+    """
+    spool = tempfile.SpooledTemporaryFile(max_size=spool_memory_bytes(), mode='w+b')
+    try:
+        shutil.copyfileobj(binary, spool, READ_CHUNK_SIZE)
+    except Exception:
+        spool.close()
+        raise
+    spool.seek(0)
+    return open_text_stream(spool, encoding)
+
+
+def get_upload_source(request, field: str = 'file'):
+    """
+    获取上传内容
+
+    multipart/form-data请求读取名为field的文件（也接受同名的文本字段），其他请求直接读取原始请求体。
+
+    Returns:
+        (支持read(n)的对象, Content-Encoding)，multipart请求中没有该字段时返回(None, None)
+    """
+    if request.content_type == 'multipart/form-data':
+        upload = request.FILES.get(field)
+        if upload is not None:
+            return upload, None
+        if request.POST.get(field):
+            return io.BytesIO(request.POST[field].encode('utf-8')), None
+        return None, None
+    return request, request.headers.get('Content-Encoding')
+
+
+def get_upload_option(request, name: str, default=None):
+    """读取上传接口的参数（multipart表单字段或查询参数）"""
+    if request.content_type == 'multipart/form-data' and name in request.POST:
+        return request.POST[name]
+    return request.GET.get(name, default)
+
+
+def is_true(value) -> bool:
+    return str(value).strip().lower() in ('1', 'true', 'yes', 'on')
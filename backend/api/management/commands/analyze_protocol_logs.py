@@ -0,0 +1,76 @@
+"""
+并行分析多个信令日志文件的流程完整性
+
+    python manage.py analyze_protocol_logs PATH [PATH ...] [--workers 8] [--pattern '*.txt'] [--output results.ndjson]
+
+PATH可以是日志文件（可gzip压缩）或目录（递归查找）。每个文件在独立进程中分析，
+完成一个输出一个，最后汇总各文件的第一个错误，给出最常阻塞的流程。
+"""
+
+import json
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+from api.protocol_batch import (parse_analysis_options, analyze_files, collect_log_files, BatchSummary)
+
+
+class Command(BaseCommand):
+    help = '在进程池中并行分析多个信令日志文件，并汇总最常阻塞的流程'
+
+    def add_arguments(self, parser):
+        parser.add_argument('paths', nargs='+', help='日志文件或目录')
+        parser.add_argument('--workers', type=int, default=getattr(settings, 'PROTOCOL_BATCH_WORKERS', None),
+                            help='进程数（默认CPU核数）')
+        parser.add_argument('--chunksize', type=int, default=getattr(settings, 'PROTOCOL_BATCH_CHUNKSIZE', 1),
+                            help='每次分发给工作进程的文件数')
+        parser.add_argument('--pattern', default=None, help="目录中的文件名匹配模式，如 '*.txt'")
+        parser.add_argument('--mode', choices=['global', 'session'], default='global',
+                            help='global: 整个文件作为一次分析；session: 按UE/小区/接入周期分会话')
+        parser.add_argument('--ue-field', type=int, default=None, help='UE标识所在的字段下标（session模式必需，可由PROTOCOL_SESSION_UE_FIELD配置）')
+        parser.add_argument('--cell-field', type=int, default=None, help='小区标识所在的字段下标（session模式）')
+        parser.add_argument('--detail', action='store_true', help='每个文件的结果包含完整报告')
+        parser.add_argument('--output', default=None, help='把每个文件的结果写入NDJSON文件')
+
+    def handle(self, *args, **options):
+        try:
+            files = collect_log_files(options['paths'], options['pattern'])
+            analysis_options = parse_analysis_options(options.get)
+        except (FileNotFoundError, ValueError) as e:
+            raise CommandError(str(e))
+        if not files:
+            raise CommandError('没有找到日志文件')
+        if options['chunksize'] < 1 or (options['workers'] is not None and options['workers'] < 1):
+            raise CommandError('--workers和--chunksize必须至少为1')
+
+        self.stdout.write(f"分析 {len(files)} 个日志文件...")
+        summary = BatchSummary()
+        output = open(options['output'], 'w', encoding='utf-8') if options['output'] else None
+        try:
+            for result in analyze_files(files, analysis_options, workers=options['workers'],
+                                        chunksize=options['chunksize'], detail=options['detail']):
+                summary.add(result)
+                if output:
+                    output.write(json.dumps(result, ensure_ascii=False) + '\n')
+                self.stdout.write(f"[{summary.files}/{len(files)}] {result['file']}: {self._describe(result)}")
+        finally:
+            if output:
+                output.close()
+
+        totals = summary.to_dict()
+        self.stdout.write(self.style.SUCCESS(
+            f"完成: {totals['files']} 个文件，{totals['entries']} 条日志，失败 {len(totals['failed_files'])} 个"))
+        for item in totals['blocking_flows']:
+            self.stdout.write(f"  {item['flow_name']}: {item['count']}")
+        if totals['most_common_blocking_flow']:
+            self.stdout.write(f"最常阻塞的流程: {totals['most_common_blocking_flow']}")
+
+    @staticmethod
+    def _describe(result):
+        if 'error' in result:
+            return f"失败 ({result['error']})"
+        if 'sessions' in result:
+            return f"{result['session_count']} 个会话，{result['completed_sessions']} 个全部完成"
+        first_error = result['first_error']
+        if first_error['status'] == 'all_flows_completed':
+            return '全部流程完成'
+        return f"阻塞于 {first_error['blocking_flow']}"
@@ -0,0 +1,91 @@
+"""
+把SentenceTransformer模型导出为ONNX并校验与PyTorch输出的一致性
+
+    python manage.py export_onnx_model [--quantize] [--tolerance 0.02] [--samples 200] [--check-only]
+
+需要torch、transformers、sentence-transformers和onnxruntime。
+校验语料为故障库中的日志样本（不足时补充内置示例），结果写入导出目录的manifest.json；
+只有校验通过的模型才会在 LOG_ANALYSIS_BACKEND = 'onnx' 时被加载。
+"""
+
+import os
+from django.core.management.base import BaseCommand, CommandError
+
+from api.onnx_encoder import export_onnx_model, check_parity
+from api.text2vec_integration import LogAnalysisConfig, LogProcessor, FaultDatabase
+
+
+SAMPLE_TEXTS = [
+    'Registration request',
+    'Registration reject cause 5 PLMN not allowed',
+    'PDU session establishment request',
+    'PDU session establishment reject insufficient resources',
+    'RRC connection setup complete',
+    'Authentication failure MAC failure',
+    'Security mode command',
+    'Service request timer T3517 expiry',
+]
+
+
+class Command(BaseCommand):
+    help = '导出ONNX模型（可选int8量化）并校验与PyTorch输出的余弦一致性'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--model-path', default=LogAnalysisConfig.MODEL_PATH,
+                            help='SentenceTransformer模型目录')
+        parser.add_argument('--output', default=LogAnalysisConfig.ONNX_DIR,
+                            help='导出目录（默认api/onnx-model）')
+        parser.add_argument('--quantize', action='store_true', help='同时导出int8动态量化模型')
+        parser.add_argument('--opset', type=int, default=14)
+        parser.add_argument('--tolerance', type=float, default=LogAnalysisConfig.ONNX_PARITY_TOLERANCE,
+                            help='允许的最大余弦距离（1 - 余弦相似度）')
+        parser.add_argument('--samples', type=int, default=200, help='校验语料条数')
+        parser.add_argument('--check-only', action='store_true', help='不重新导出，只校验已有模型')
+
+    def handle(self, *args, **options):
+        model_path = options['model_path']
+        output = options['output']
+        if not os.path.isdir(model_path):
+            raise CommandError(f'模型目录不存在: {model_path}')
+
+        try:
+            if options['check_only']:
+                if not os.path.exists(os.path.join(output, 'manifest.json')):
+                    raise CommandError(f'导出目录中没有manifest.json: {output}')
+            else:
+                manifest = export_onnx_model(model_path, output, quantize=options['quantize'], opset=options['opset'])
+                self.stdout.write(f"已导出: {output}（维度 {manifest['dimension']}，最大长度 {manifest['max_seq_length']}）")
+
+            texts = self._parity_corpus(options['samples'])
+            variants = [False]
+            if options['quantize'] or os.path.exists(os.path.join(output, 'model.int8.onnx')):
+                variants.append(True)
+
+            failed = False
+            for quantized in variants:
+                report = check_parity(model_path, output, texts, options['tolerance'], quantized=quantized)
+                name = 'int8' if quantized else 'fp32'
+                line = (f"{name}: {report['samples']} 条, 最小余弦 {report['min_cosine']:.6f}, "
+                        f"平均余弦 {report['mean_cosine']:.6f}, 容差 {report['tolerance']}")
+                if report['passed']:
+                    self.stdout.write(self.style.SUCCESS(f'{line} - 通过'))
+                else:
+                    failed = True
+                    self.stdout.write(self.style.ERROR(f'{line} - 未通过'))
+        except ImportError as e:
+            raise CommandError(f'缺少依赖: {e}')
+
+        if failed:
+            raise CommandError('一致性校验未通过，运行时不会加载未通过的模型')
+
+    @staticmethod
+    def _parity_corpus(limit: int):
+        processor = LogProcessor()
+        texts = []
+        for record in FaultDatabase().store.iter_records():
+            text = processor.auto_clean_log_text(record.log_sample)
+            if text and text.strip():
+                texts.append(text)
+            if len(texts) >= limit:
+                break
+        return texts + SAMPLE_TEXTS[:max(0, limit - len(texts))]
@@ -0,0 +1,54 @@
+"""
+故障库存储管理命令
+
+    python manage.py fault_store info
+    python manage.py fault_store import-csv [--csv PATH]    （只能导入到尚未初始化的二进制存储）
+    python manage.py fault_store export-csv --csv PATH
+"""
+
+import os
+from django.core.management.base import BaseCommand, CommandError
+
+from api.fault_store import CsvFaultStore, BinaryFaultStore, copy_records
+from api.text2vec_integration import LogAnalysisConfig
+
+
+class Command(BaseCommand):
+    help = '在CSV故障库与二进制列式故障库之间导入/导出记录'
+
+    def add_arguments(self, parser):
+        parser.add_argument('action', choices=['info', 'import-csv', 'export-csv'])
+        parser.add_argument('--csv', dest='csv_path', default=LogAnalysisConfig.DATABASE_PATH,
+                            help='CSV故障库路径（默认fault_database/fault_records.csv）')
+        parser.add_argument('--store-dir', default=LogAnalysisConfig.VECTOR_STORE_DIR,
+                            help='二进制存储目录（默认fault_database/vectors）')
+        parser.add_argument('--batch-size', type=int, default=1000)
+
+    def handle(self, *args, **options):
+        action = options['action']
+        csv_path = options['csv_path']
+        store = BinaryFaultStore(options['store_dir'])
+
+        if action == 'info':
+            stats = store.get_stats()
+            self.stdout.write(f"二进制存储: {options['store_dir']}")
+            self.stdout.write(f"记录总数: {stats['total_records']}")
+            for dim, count in stats['dimension_counts'].items():
+                self.stdout.write(f"  维度 {dim}: {count}")
+            for fault_type, count in stats['fault_type_counts'].items():
+                self.stdout.write(f"  {fault_type}: {count}")
+            return
+
+        if action == 'import-csv':
+            if not os.path.exists(csv_path):
+                raise CommandError(f'CSV文件不存在: {csv_path}')
+            count = store.initialize(CsvFaultStore(csv_path), options['batch_size'])
+            if count is None:
+                raise CommandError(f"二进制存储已初始化: {options['store_dir']}，重新导入请先删除该目录")
+            self.stdout.write(self.style.SUCCESS(f'已导入 {count} 条记录'))
+            return
+
+        if os.path.exists(csv_path):
+            raise CommandError(f'目标文件已存在，请指定新的路径: {csv_path}')
+        count = copy_records(store, CsvFaultStore(csv_path), options['batch_size'])
+        self.stdout.write(self.style.SUCCESS(f'已导出 {count} 条记录到 {csv_path}'))
@@ -0,0 +1,70 @@
+"""
+拟合备用TF-IDF向量化器的词表（未加载SentenceTransformer时使用）
+
+    python manage.py fit_fallback_vectorizer [PATH] [--max-docs 50000]
+
+PATH可以是日志目录或zip/tar压缩包（与ingest_fault_logs相同的来源），
+不指定时使用故障库中已保存的日志样本作为语料。
+词表变化后向量化方法名随之变化，旧的备用向量不会再参与检索，需要重新导入故障日志；
+运行中的服务通过 POST /api/engine-reload/ 加载新词表。
+"""
+
+import os
+from django.core.management.base import BaseCommand, CommandError
+
+from api.fallback_vectorizer import FallbackVectorizer
+from api.fault_ingest import LabelledLogSource
+from api.text2vec_integration import LogAnalysisConfig, LogProcessor, FaultDatabase
+
+
+class Command(BaseCommand):
+    help = '在故障日志语料上拟合一次备用TF-IDF词表并持久化'
+
+    def add_arguments(self, parser):
+        parser.add_argument('path', nargs='?', default=None,
+                            help='日志目录或zip/tar压缩包（默认使用故障库中的日志样本）')
+        parser.add_argument('--output', default=LogAnalysisConfig.FALLBACK_VECTORIZER_PATH,
+                            help='词表保存路径（默认fault_database/fallback_vectorizer.pkl）')
+        parser.add_argument('--max-docs', type=int, default=50000,
+                            help='最多使用的语料条数')
+        parser.add_argument('--encoding', default='utf-8')
+
+    def handle(self, *args, **options):
+        processor = LogProcessor()
+        max_docs = options['max_docs']
+
+        if options['path']:
+            if not os.path.exists(options['path']):
+                raise CommandError(f"路径不存在: {options['path']}")
+            raw_logs = self._read_source(options['path'], options['encoding'], max_docs)
+        else:
+            fault_db = FaultDatabase()
+            raw_logs = []
+            for record in fault_db.store.iter_records():
+                raw_logs.append(record.log_sample)
+                if len(raw_logs) >= max_docs:
+                    break
+
+        corpus = [processor.auto_clean_log_text(text) for text in raw_logs]
+        corpus = [text for text in corpus if text and text.strip()]
+        if not corpus:
+            raise CommandError('没有可用的语料')
+
+        vectorizer = FallbackVectorizer(options['output'])
+        try:
+            method_name = vectorizer.fit(corpus)
+        except ValueError as e:
+            raise CommandError(str(e))
+
+        self.stdout.write(self.style.SUCCESS(f"词表拟合完成: {options['output']}（语料 {len(corpus)} 条）"))
+        self.stdout.write(f"向量化方法: {method_name}")
+        self.stdout.write('之前以备用方法写入的故障记录需要重新导入；运行中的服务请调用 /api/engine-reload/')
+
+    @staticmethod
+    def _read_source(path: str, encoding: str, max_docs: int):
+        with LabelledLogSource(path, encoding=encoding) as source:
+            keys = [key for key, _ in source.list_entries()]
+            if not keys:
+                # 没有标签时使用全部文件
+                keys = [key for key in source._list_files() if not key.endswith('labels.csv')]
+            return [source.read(key) for key in keys[:max_docs]]
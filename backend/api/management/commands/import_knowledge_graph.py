@@ -0,0 +1,49 @@
+"""
+从CSV/JSON知识库批量导入知识图谱
+
+    python manage.py import_knowledge_graph PATH [--format csv|json] [--mode merge|create] [--chunk-size 1000]
+
+文件格式见api/kg_import.py。默认merge模式按name合并已有节点和关系，可以重复导入同一个文件。
+"""
+
+from django.core.management.base import BaseCommand, CommandError
+
+from api.kg_import import load_file, import_knowledge_base
+from api.knowledge_graph import KnowledgeGraphService, BulkWriteError
+
+
+class Command(BaseCommand):
+    help = '从CSV/JSON知识库批量导入故障类型、原因、解决方案及其关系'
+
+    def add_arguments(self, parser):
+        parser.add_argument('path', help='知识库文件（.csv或.json）')
+        parser.add_argument('--format', choices=['csv', 'json'], default=None, help='文件格式（默认按扩展名判断）')
+        parser.add_argument('--mode', choices=['merge', 'create'], default='merge',
+                            help='merge: 按name合并已有节点和关系；create: 总是新建')
+        parser.add_argument('--chunk-size', type=int, default=None,
+                            help='每个写事务包含的记录数（默认NEO4J_BULK_CHUNK_SIZE）')
+        parser.add_argument('--dry-run', action='store_true', help='只解析文件，不写入数据库')
+
+    def handle(self, *args, **options):
+        try:
+            kb = load_file(options['path'], options['format'])
+        except FileNotFoundError as e:
+            raise CommandError(str(e))
+        except ValueError as e:
+            raise CommandError(f"知识库格式错误: {e}")
+
+        counts = kb.counts()
+        self.stdout.write(f"读取 {counts['nodes']} 个节点，{counts['relationships']} 条关系")
+        if options['dry_run']:
+            return
+
+        try:
+            with KnowledgeGraphService() as kg:
+                written = import_knowledge_base(kg, kb, options['mode'], options['chunk_size'])
+        except BulkWriteError as e:
+            raise CommandError(f"导入失败（已提交 {e.written} 条）: {e}")
+        except Exception as e:
+            raise CommandError(f"导入失败: {e}")
+
+        self.stdout.write(self.style.SUCCESS(
+            f"完成: 写入 {written['nodes']} 个节点，{written['relationships']} 条关系"))
@@ -0,0 +1,70 @@
+"""
+批量导入带标签的故障日志
+
+    python manage.py ingest_fault_logs PATH [--chunk-size 1000] [--batch-size 64] [--restart]
+
+PATH可以是目录或zip/tar压缩包，标签来自labels.csv(file,fault_type)或<故障类型>/<日志文件>目录结构。
+每块写入故障库后记录进度，中断后重新执行同一命令会跳过已导入的日志。
+"""
+
+import os
+from django.core.management.base import BaseCommand, CommandError
+
+from api.fault_ingest import LabelledLogSource, IngestCheckpoint, ingest_source
+from api.text2vec_integration import LogAnalysisConfig, get_log_analysis_engine
+
+
+class Command(BaseCommand):
+    help = '从目录或压缩包批量导入带标签的故障日志（分块批量编码，支持断点续传）'
+
+    def add_arguments(self, parser):
+        parser.add_argument('path', help='日志目录或zip/tar压缩包')
+        parser.add_argument('--chunk-size', type=int, default=1000,
+                            help='每次写入故障库的日志数（默认1000）')
+        parser.add_argument('--batch-size', type=int, default=LogAnalysisConfig.ENCODE_BATCH_SIZE,
+                            help='SentenceTransformer编码批大小')
+        parser.add_argument('--state-file', default=None,
+                            help='进度文件路径（默认fault_database/ingest_state/下按来源生成）')
+        parser.add_argument('--restart', action='store_true',
+                            help='忽略已有进度，重新导入全部日志')
+        parser.add_argument('--encoding', default='utf-8')
+
+    def handle(self, *args, **options):
+        path = options['path']
+        if not os.path.exists(path):
+            raise CommandError(f'路径不存在: {path}')
+
+        if options['state_file']:
+            checkpoint = IngestCheckpoint(options['state_file'])
+        else:
+            checkpoint = IngestCheckpoint.for_source(LogAnalysisConfig.INGEST_STATE_DIR, path)
+        if options['restart']:
+            checkpoint.reset()
+
+        engine = get_log_analysis_engine()
+        self.stdout.write(f"向量化方法: {engine.vector_method}, 维度: {engine.vector_dim}")
+
+        def report(stats):
+            done = stats['skipped'] + stats['processed']
+            self.stdout.write(
+                f"[{done}/{stats['total']}] 已写入 {stats['added']}，失败 {len(stats['failed'])}"
+            )
+
+        try:
+            with LabelledLogSource(path, encoding=options['encoding']) as source:
+                stats = ingest_source(
+                    engine, source, checkpoint,
+                    chunk_size=options['chunk_size'],
+                    batch_size=options['batch_size'],
+                    progress=report
+                )
+        except ValueError as e:
+            raise CommandError(str(e))
+
+        if stats['skipped']:
+            self.stdout.write(f"跳过此前已导入的 {stats['skipped']} 条日志")
+        for key in stats['failed']:
+            self.stderr.write(f"导入失败: {key}")
+        self.stdout.write(self.style.SUCCESS(
+            f"导入完成: 共 {stats['total']} 条，本次写入 {stats['added']} 条，失败 {len(stats['failed'])} 条"
+        ))
@@ -0,0 +1,55 @@
+"""
+按kg_config.NODE_SCHEMAS创建知识图谱索引和约束（可重复执行）
+
+    python manage.py migrate_kg_schema [--unique] [--dry-run] [--wait 300]
+
+默认为每个标签的name建立范围索引；--unique改为唯一约束（有重复name的标签跳过并列出重复值）。
+searchable属性建立文本索引，服务模糊搜索的CONTAINS查询。
+"""
+
+from django.core.management.base import BaseCommand, CommandError
+
+from api.kg_schema import plan_migration, apply_migration, await_indexes, index_status
+from api.knowledge_graph import Neo4jClient
+
+
+class Command(BaseCommand):
+    help = '根据NODE_SCHEMAS创建知识图谱的name索引/唯一约束和文本索引'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--unique', action='store_true', help='为必填属性（name）建立唯一约束而不是普通范围索引')
+        parser.add_argument('--dry-run', action='store_true', help='只列出要执行的语句')
+        parser.add_argument('--wait', type=int, default=0, metavar='SECONDS',
+                            help='创建后等待索引填充完成的最长时间（秒），0表示不等待')
+
+    def handle(self, *args, **options):
+        try:
+            client = Neo4jClient()
+            steps = plan_migration(client, unique=options['unique'])
+        except Exception as e:
+            raise CommandError(f"读取Neo4j索引失败: {e}")
+
+        for step in steps:
+            target = f"{step['label']}.{step['property']} ({step['kind']})"
+            if step['action'] == 'skip':
+                self.stdout.write(f"  跳过 {target}: {step['reason']}")
+            elif step['action'] == 'blocked':
+                values = ', '.join(f"{item['value']}×{item['count']}" for item in step['duplicates'])
+                self.stdout.write(self.style.WARNING(f"  无法建立唯一约束 {target}，存在重复值: {values}"))
+            else:
+                self.stdout.write(f"  {step['statement']}")
+
+        if options['dry_run']:
+            return
+
+        try:
+            executed = apply_migration(client, steps)
+            if options['wait'] and executed:
+                await_indexes(client, options['wait'])
+            status = index_status(client)
+        except Exception as e:
+            raise CommandError(f"创建索引失败: {e}")
+
+        self.stdout.write(self.style.SUCCESS(f"完成: 执行 {executed} 条语句"))
+        for item in status:
+            self.stdout.write(f"  {item['label']}.{item['property']} ({item['kind']}): {item['state']}")
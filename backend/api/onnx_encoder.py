@@ -0,0 +1,280 @@
+"""
+ONNX Runtime句向量编码器
+把SentenceTransformer模型（Transformer + Pooling + Normalize）导出为ONNX后用onnxruntime在CPU上推理，
+可选int8动态量化。encode接口与SentenceTransformer.encode一致，可直接替换VectorEngine.model。
+
+导出目录结构:
+    model.onnx        导出的Transformer（输出last_hidden_state）
+    model.int8.onnx   int8动态量化后的模型（可选）
+    tokenizer.json    分词器
+    manifest.json     源模型、池化方式、最大长度以及与PyTorch输出的一致性校验结果
+
+只有manifest中一致性校验通过的模型才会被加载，保证已入库的sentence_transformer向量仍然可用。
+"""
+
+import os
+import json
+import logging
+from datetime import datetime
+from typing import List, Dict, Any, Optional
+import numpy as np
+
+
+MANIFEST_NAME = 'manifest.json'
+MODEL_FILE = 'model.onnx'
+QUANTIZED_MODEL_FILE = 'model.int8.onnx'
+TOKENIZER_FILE = 'tokenizer.json'
+
+
+def read_sentence_transformer_config(model_path: str) -> Dict[str, Any]:
+    """读取SentenceTransformer模型目录中的最大长度、池化方式和是否归一化"""
+    config = {'max_seq_length': 256, 'pooling': 'mean', 'normalize': False}
+
+    path = os.path.join(model_path, 'sentence_bert_config.json')
+    if os.path.exists(path):
+        with open(path, 'r', encoding='utf-8') as f:
+            config['max_seq_length'] = json.load(f).get('max_seq_length', config['max_seq_length'])
+
+    path = os.path.join(model_path, 'modules.json')
+    if os.path.exists(path):
+        with open(path, 'r', encoding='utf-8') as f:
+            modules = json.load(f)
+        for module in modules:
+            module_type = module.get('type', '')
+            if module_type.endswith('.Normalize'):
+                config['normalize'] = True
+            elif module_type.endswith('.Pooling'):
+                pooling_path = os.path.join(model_path, module.get('path', ''), 'config.json')
+                if os.path.exists(pooling_path):
+                    with open(pooling_path, 'r', encoding='utf-8') as f:
+                        pooling = json.load(f)
+                    if pooling.get('pooling_mode_cls_token'):
+                        config['pooling'] = 'cls'
+    return config
+
+
+def load_manifest(onnx_dir: str) -> Optional[Dict[str, Any]]:
+    path = os.path.join(onnx_dir, MANIFEST_NAME)
+    if not os.path.exists(path):
+        return None
+    with open(path, 'r', encoding='utf-8') as f:
+        return json.load(f)
+
+
+def write_manifest(onnx_dir: str, manifest: Dict[str, Any]) -> None:
+    path = os.path.join(onnx_dir, MANIFEST_NAME)
+    tmp_path = path + '.tmp'
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        json.dump(manifest, f, ensure_ascii=False, indent=2)
+    os.replace(tmp_path, path)
+
+
+class OnnxSentenceEncoder:
+    """基于onnxruntime的句向量编码器"""
+
+    def __init__(self, onnx_dir: str, quantized: bool = False, num_threads: int = None):
+        """
+        Args:
+            onnx_dir: 导出目录
+            quantized: 是否使用int8量化模型
+            num_threads: onnxruntime算子内线程数（可选），None时使用onnxruntime默认值
+        """
+        import onnxruntime as ort
+        from tokenizers import Tokenizer
+
+        self.logger = logging.getLogger(__name__)
+        self.onnx_dir = onnx_dir
+        self.quantized = quantized
+        self.manifest = load_manifest(onnx_dir) or {}
+
+        model_file = os.path.join(onnx_dir, QUANTIZED_MODEL_FILE if quantized else MODEL_FILE)
+        if not os.path.exists(model_file):
+            raise FileNotFoundError(f"ONNX模型不存在: {model_file}")
+
+        options = ort.SessionOptions()
+        options.graph_optimization_level = ort.GraphOptimizationLevel.ORT_ENABLE_ALL
+        if num_threads:
+            options.intra_op_num_threads = num_threads
+            options.inter_op_num_threads = 1
+        self.session = ort.InferenceSession(model_file, options, providers=['CPUExecutionProvider'])
+        self.input_names = {item.name for item in self.session.get_inputs()}
+
+        self.max_seq_length = self.manifest.get('max_seq_length', 256)
+        self.pooling = self.manifest.get('pooling', 'mean')
+        self.normalize = self.manifest.get('normalize', False)
+        self.dimension = self.manifest.get('dimension')
+
+        self.tokenizer = Tokenizer.from_file(os.path.join(onnx_dir, TOKENIZER_FILE))
+        self.tokenizer.enable_truncation(max_length=self.max_seq_length)
+        self.tokenizer.no_padding()
+        self._offset_tokenizer = None
+
+    @property
+    def revision(self) -> str:
+        """模型版本标识（源模型快照 + 是否量化）"""
+        source = os.path.basename(os.path.normpath(self.manifest.get('source_model', self.onnx_dir)))
+        return f"{source}+onnx{'-int8' if self.quantized else ''}"
+
+    def parity_report(self) -> Optional[Dict[str, Any]]:
+        """当前模型文件对应的一致性校验结果"""
+        key = 'int8' if self.quantized else 'fp32'
+        return (self.manifest.get('parity') or {}).get(key)
+
+    def get_sentence_embedding_dimension(self) -> Optional[int]:
+        return self.dimension
+
+    def token_offsets(self, text: str) -> List[tuple]:
+        """不截断地分词，返回每个token在text中的字符区间（用于长日志分窗）"""
+        if self._offset_tokenizer is None:
+            from tokenizers import Tokenizer
+            self._offset_tokenizer = Tokenizer.from_file(os.path.join(self.onnx_dir, TOKENIZER_FILE))
+            self._offset_tokenizer.no_truncation()
+            self._offset_tokenizer.no_padding()
+        return self._offset_tokenizer.encode(text, add_special_tokens=False).offsets
+
+    def encode(self, sentences: List[str], batch_size: int = 32, convert_to_numpy: bool = True, **kwargs) -> np.ndarray:
+        """
+        编码句子，接口与SentenceTransformer.encode一致
+
+        Returns:
+            (n, dim) 向量矩阵，顺序与输入一致
+        """
+        if isinstance(sentences, str):
+            sentences = [sentences]
+        if not sentences:
+            return np.empty((0, self.dimension or 0), dtype=np.float32)
+
+        encodings = self.tokenizer.encode_batch(list(sentences))
+        # 按长度排序后分批，减少同一批内的padding
+        order = np.argsort([-len(encoding.ids) for encoding in encodings], kind='stable')
+        outputs: List[Optional[np.ndarray]] = [None] * len(sentences)
+
+        for start in range(0, len(order), batch_size):
+            batch = order[start:start + batch_size]
+            embeddings = self._run([encodings[i] for i in batch])
+            for i, embedding in zip(batch, embeddings):
+                outputs[i] = embedding
+
+        return np.vstack(outputs)
+
+    def _run(self, encodings) -> np.ndarray:
+        length = max(len(encoding.ids) for encoding in encodings)
+        input_ids = np.zeros((len(encodings), length), dtype=np.int64)
+        attention_mask = np.zeros((len(encodings), length), dtype=np.int64)
+        token_type_ids = np.zeros((len(encodings), length), dtype=np.int64)
+        for row, encoding in enumerate(encodings):
+            n = len(encoding.ids)
+            input_ids[row, :n] = encoding.ids
+            attention_mask[row, :n] = encoding.attention_mask
+            token_type_ids[row, :n] = encoding.type_ids
+
+        feeds = {'input_ids': input_ids, 'attention_mask': attention_mask, 'token_type_ids': token_type_ids}
+        feeds = {name: value for name, value in feeds.items() if name in self.input_names}
+        hidden = self.session.run(None, feeds)[0]
+
+        if self.pooling == 'cls':
+            embeddings = hidden[:, 0]
+        else:
+            mask = attention_mask[:, :, None].astype(hidden.dtype)
+            embeddings = (hidden * mask).sum(axis=1) / np.clip(mask.sum(axis=1), 1e-9, None)
+
+        if self.normalize:
+            norms = np.linalg.norm(embeddings, axis=1, keepdims=True)
+            embeddings = embeddings / np.clip(norms, 1e-12, None)
+        return embeddings.astype(np.float32)
+
+
+def export_onnx_model(model_path: str, onnx_dir: str, quantize: bool = False, opset: int = 14) -> Dict[str, Any]:
+    """
+    把SentenceTransformer模型目录中的Transformer导出为ONNX（需要torch和transformers）
+
+    Returns:
+        写入的manifest
+    """
+    import shutil
+    import torch
+    from transformers import AutoModel, AutoTokenizer
+
+    logger = logging.getLogger(__name__)
+    os.makedirs(onnx_dir, exist_ok=True)
+    st_config = read_sentence_transformer_config(model_path)
+
+    tokenizer = AutoTokenizer.from_pretrained(model_path)
+    model = AutoModel.from_pretrained(model_path)
+    model.eval()
+
+    sample = tokenizer(['export sample'], return_tensors='pt')
+    input_names = [name for name in ('input_ids', 'attention_mask', 'token_type_ids') if name in sample]
+    dynamic_axes = {name: {0: 'batch', 1: 'sequence'} for name in input_names}
+    dynamic_axes['last_hidden_state'] = {0: 'batch', 1: 'sequence'}
+
+    model_file = os.path.join(onnx_dir, MODEL_FILE)
+    with torch.no_grad():
+        torch.onnx.export(
+            model,
+            tuple(sample[name] for name in input_names),
+            model_file,
+            input_names=input_names,
+            output_names=['last_hidden_state'],
+            dynamic_axes=dynamic_axes,
+            opset_version=opset,
+            do_constant_folding=True
+        )
+    logger.info(f"ONNX模型导出完成: {model_file}")
+
+    if quantize:
+        from onnxruntime.quantization import quantize_dynamic, QuantType
+        quantize_dynamic(model_file, os.path.join(onnx_dir, QUANTIZED_MODEL_FILE), weight_type=QuantType.QInt8)
+        logger.info("int8动态量化完成")
+
+    shutil.copyfile(os.path.join(model_path, TOKENIZER_FILE), os.path.join(onnx_dir, TOKENIZER_FILE))
+
+    manifest = {
+        'source_model': os.path.abspath(model_path),
+        'exported_at': datetime.now().isoformat(),
+        'opset': opset,
+        'max_seq_length': st_config['max_seq_length'],
+        'pooling': st_config['pooling'],
+        'normalize': st_config['normalize'],
+        'dimension': int(model.config.hidden_size),
+        'quantized': quantize,
+        'parity': {}
+    }
+    write_manifest(onnx_dir, manifest)
+    return manifest
+
+
+def check_parity(model_path: str, onnx_dir: str, texts: List[str], tolerance: float,
+                 quantized: bool = False, batch_size: int = 32) -> Dict[str, Any]:
+    """
+    比较ONNX与PyTorch SentenceTransformer的输出，结果写入manifest
+
+    Args:
+        tolerance: 允许的最大余弦距离（1 - 余弦相似度）
+
+    Returns:
+        校验结果，passed为False时运行时不会加载该模型
+    """
+    from sentence_transformers import SentenceTransformer
+
+    reference = SentenceTransformer(model_path).encode(texts, batch_size=batch_size, convert_to_numpy=True)
+    encoder = OnnxSentenceEncoder(onnx_dir, quantized=quantized)
+    candidate = encoder.encode(texts, batch_size=batch_size)
+
+    reference = reference / np.clip(np.linalg.norm(reference, axis=1, keepdims=True), 1e-12, None)
+    candidate = candidate / np.clip(np.linalg.norm(candidate, axis=1, keepdims=True), 1e-12, None)
+    cosines = np.sum(reference * candidate, axis=1)
+
+    report = {
+        'samples': len(texts),
+        'min_cosine': float(cosines.min()),
+        'mean_cosine': float(cosines.mean()),
+        'tolerance': tolerance,
+        'passed': bool(1.0 - cosines.min() <= tolerance),
+        'checked_at': datetime.now().isoformat()
+    }
+
+    manifest = load_manifest(onnx_dir) or {}
+    manifest.setdefault('parity', {})['int8' if quantized else 'fp32'] = report
+    write_manifest(onnx_dir, manifest)
+    return report
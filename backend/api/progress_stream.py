@@ -0,0 +1,169 @@
+"""
+长时间分析的进度流
+大日志的信令流程分析和批量故障识别在完成前不返回任何内容。请求参数stream=sse或stream=ndjson时，接口改为
+流式响应：分析在响应迭代器中逐步执行，边分析边输出进度事件（已读行数、完成的流程、当前第一个阻塞流程），
+最后输出result事件。客户端断开连接时服务器停止迭代响应，分析随之结束。
+
+    SSE:    event: progress\\ndata: {...}\\n\\n
+    NDJSON: {"event": "progress", ...}\\n
+"""
+
+import json
+import logging
+from typing import Any, Dict, Iterable, Iterator, Tuple
+from django.conf import settings
+from django.core.serializers.json import DjangoJSONEncoder
+from django.http import StreamingHttpResponse
+
+from .protocol_analyzer import SessionProtocolAnalyzer
+from .protocol_batch import analysis_result
+
+
+FORMAT_SSE = 'sse'
+FORMAT_NDJSON = 'ndjson'
+
+CONTENT_TYPES = {
+    FORMAT_SSE: 'text/event-stream',
+    FORMAT_NDJSON: 'application/x-ndjson'
+}
+
+Event = Tuple[str, Dict[str, Any]]
+
+
+def stream_format(value) -> str:
+    """
+    解析stream参数
+
+    Returns:
+        'sse'、'ndjson'，不使用流式响应时为None
+
+    Raises:
+        ValueError: 参数无效
+    """
+    if value is None or value is False or str(value).strip().lower() in ('', '0', 'false', 'no', 'off'):
+        return None
+    value = str(value).strip().lower()
+    if value == FORMAT_SSE:
+        return FORMAT_SSE
+    if value in (FORMAT_NDJSON, '1', 'true', 'yes', 'on'):
+        return FORMAT_NDJSON
+    raise ValueError("stream must be 'sse' or 'ndjson'")
+
+
+def progress_interval() -> int:
+    return getattr(settings, 'ANALYSIS_PROGRESS_INTERVAL', 5000)
+
+
+def encode_event(event: str, data: Dict[str, Any], fmt: str) -> str:
+    if fmt == FORMAT_SSE:
+        return f"event: {event}\ndata: {json.dumps(data, ensure_ascii=False, cls=DjangoJSONEncoder)}\n\n"
+    return json.dumps({'event': event, **data}, ensure_ascii=False, cls=DjangoJSONEncoder) + '\n'
+
+
+def streaming_response(events: Iterable[Event], fmt: str) -> StreamingHttpResponse:
+    """把事件迭代器包装为流式响应，迭代中的异常作为error事件输出"""
+
+    def stream():
+        try:
+            for event, data in events:
+                yield encode_event(event, data, fmt)
+        except Exception as e:
+            logging.getLogger(__name__).error(f"流式分析失败: {e}")
+            yield encode_event('error', {'error': str(e)}, fmt)
+
+    response = StreamingHttpResponse(stream(), content_type=CONTENT_TYPES[fmt])
+    # 禁止缓存和反向代理缓冲，保证进度及时送达
+    response['Cache-Control'] = 'no-cache'
+    response['X-Accel-Buffering'] = 'no'
+    return response
+
+
+def iter_protocol_events(analyzer, lines: Iterable[str], detail: bool = False,
+                         interval: int = None) -> Iterator[Event]:
+    """
+    逐行分析日志并产出进度事件
+
+    事件:
+        progress        每interval行一次：已读行数、有效日志数、流程摘要和当前第一个阻塞流程
+        flow_completed  流程完成时（按会话分析时不输出）：流程名、完成它的日志序号和时间
+        result          全部完成后：与非流式接口相同的结果
+
+    Args:
+        analyzer: ProtocolAnalyzer或SessionProtocolAnalyzer
+        lines: 任意行迭代器
+        detail: 结果是否包含完整报告（按会话分析时）
+        interval: 进度事件间隔行数（默认ANALYSIS_PROGRESS_INTERVAL）
+    """
+    interval = max(1, interval or progress_interval())
+    by_session = isinstance(analyzer, SessionProtocolAnalyzer)
+    parser = analyzer.analyzer if by_session else analyzer
+    if not by_session:
+        analyzer.start_analysis()
+
+    line_count = 0
+    entries = 0
+    for line in lines:
+        line_count += 1
+        log_entry = parser.parse_line(line)
+        if log_entry is not None:
+            entries += 1
+            if by_session:
+                analyzer.feed(log_entry)
+            else:
+                completed = len(analyzer.completed_flows)
+                analyzer.feed(log_entry)
+                for flow_name in analyzer.completed_flows[completed:]:
+                    yield 'flow_completed', {
+                        'flow_name': flow_name,
+                        'seq': log_entry.seq,
+                        'timestamp': log_entry.timestamp.isoformat(),
+                        'lines': line_count
+                    }
+        if line_count % interval == 0:
+            yield 'progress', _protocol_progress(analyzer, line_count, entries)
+
+    if not by_session:
+        analyzer.finalize()
+    if line_count == 0 or line_count % interval:
+        yield 'progress', _protocol_progress(analyzer, line_count, entries)
+    yield 'result', {'entries': entries, **analysis_result(analyzer, detail)}
+
+
+def _protocol_progress(analyzer, line_count: int, entries: int) -> Dict[str, Any]:
+    progress = {'lines': line_count, 'entries': entries}
+    if isinstance(analyzer, SessionProtocolAnalyzer):
+        progress['sessions'] = len(analyzer.active_sessions) + len(analyzer.closed_sessions)
+        return progress
+
+    report = analyzer.build_report(analyzer.completed_flows, analyzer.in_progress_flows())
+    first_error = analyzer.print_first_error(report, list(analyzer.flow_definitions.keys()))
+    progress['summary'] = report['summary']
+    progress['first_blocking_flow'] = first_error.get('blocking_flow')
+    return progress
+
+
+def iter_identification_events(engine, ids: list, log_contents: list, batch_size: int = None,
+                               exact: bool = False, nprobe: int = None) -> Iterator[Event]:
+    """
+    分批识别故障类型并逐批产出结果
+
+    事件:
+        results   每批一次：该批日志的识别结果（带id）
+        progress  每批一次：已完成数/总数
+        result    全部完成后：总数
+    """
+    from .text2vec_integration import LogAnalysisConfig
+
+    step = batch_size or LogAnalysisConfig.ENCODE_BATCH_SIZE
+    if step < 1:
+        raise ValueError('batch_size must be at least 1')
+    total = len(log_contents)
+    for start in range(0, total, step):
+        results = engine.identify_fault_types(
+            log_contents[start:start + step], batch_size=batch_size, exact=exact, nprobe=nprobe
+        )
+        yield 'results', {
+            'results': [{'id': log_id, **result} for log_id, result in zip(ids[start:start + step], results)]
+        }
+        yield 'progress', {'done': min(start + step, total), 'total': total}
+    yield 'result', {'count': total}
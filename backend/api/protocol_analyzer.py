@@ -1,9 +1,260 @@
 from datetime import datetime
-from collections import deque
+from collections import deque, defaultdict
+from functools import lru_cache
+from typing import NamedTuple
 import json
 
+
+TIMESTAMP_FORMAT = "%H:%M:%S.%f %Y-%m-%d"
+
+
+class LogEntry(NamedTuple):
+    """解析后的日志条目（比字典更紧凑，同时支持entry["message"]形式的访问）"""
+    seq: int
+    timestamp: datetime
+    protocol: str
+    direction: str
+    message: str
+    ue: str = None  # UE标识（配置了ue_field时）
+    cell: str = None  # 小区标识（配置了cell_field时）
+
+    def __getitem__(self, key):
+        if isinstance(key, str):
+            return getattr(self, key)
+        return tuple.__getitem__(self, key)
+
+
+@lru_cache(maxsize=4096)
+def _parse_date(date_str: str):
+    """解析YYYY-MM-DD（同一份日志中日期很少变化，结果缓存），日期无效时抛出ValueError"""
+    if len(date_str) != 10 or date_str[4] != '-' or date_str[7] != '-':
+        raise ValueError(date_str)
+    year, month, day = date_str[:4], date_str[5:7], date_str[8:]
+    if not (year + month + day).isdigit():
+        raise ValueError(date_str)
+    # 提前校验日期是否存在（如2月30日），与strptime一致抛出ValueError
+    datetime(int(year), int(month), int(day))
+    return int(year), int(month), int(day)
+
+
+def parse_timestamp(text: str) -> datetime:
+    """
+    解析日志中的复合时间戳字段（格式：09:42:30.804, 2025-04-07）
+
+    按固定位置切片解析整数，日期部分缓存；不符合固定格式的字段回退到datetime.strptime，
+    结果（包括抛出ValueError的情况）与 strptime(text.replace(',', '').strip(), TIMESTAMP_FORMAT) 一致
+    """
+    time_str, sep, date_str = text.partition(', ')
+    if (sep and text.isascii() and 10 <= len(time_str) <= 15 and time_str[2] == ':' and time_str[5] == ':'
+            and time_str[8] == '.' and ',' not in date_str):
+        hour, minute, second, fraction = time_str[:2], time_str[3:5], time_str[6:8], time_str[9:]
+        if (hour + minute + second + fraction).isdigit():
+            try:
+                year, month, day = _parse_date(date_str)
+            except ValueError:
+                pass
+            else:
+                return datetime(year, month, day, int(hour), int(minute), int(second),
+                                int(fraction.ljust(6, '0')))
+    return datetime.strptime(text.replace(',', '').strip(), TIMESTAMP_FORMAT)
+
+
+class CompiledFlows:
+    """
+    编译后的流程定义（与分析状态无关，可在多次分析间复用）
+
+    每个步骤预先计算小写的(协议, 方向)和消息单词序列；按(协议, 方向)建立流程索引，
+    一条日志只需要检查包含该(协议, 方向)步骤的流程
+    """
+
+    def __init__(self, flow_definitions):
+        self.definitions = flow_definitions
+        self.names = list(flow_definitions)
+        self.steps = []
+        self.prerequisites = []
+        self.dependents = defaultdict(list)
+        buckets = defaultdict(list)
+
+        for flow_index, flow_name in enumerate(self.names):
+            flow_def = flow_definitions[flow_name]
+            steps = []
+            for step in flow_def["steps"]:
+                key = (step["protocol"].lower(), step["dir"].lower())
+                words = tuple(step["msg"].lower().replace('[', ' ').split())
+                steps.append((key, words, step))
+                if flow_index not in buckets[key]:
+                    buckets[key].append(flow_index)
+            self.steps.append(steps)
+
+            prerequisites = set(flow_def["prerequisites"])
+            self.prerequisites.append(prerequisites)
+            for prerequisite in prerequisites:
+                self.dependents[prerequisite].append(flow_index)
+
+        # 桶内按流程定义顺序排列
+        self.buckets = {key: tuple(indices) for key, indices in buckets.items()}
+        self.dependents_by_index = [tuple(self.dependents.get(name, ())) for name in self.names]
+        self._lookup_cache = {}
+
+    def lookup(self, protocol: str, direction: str):
+        """
+        按日志的协议和方向查找候选流程（原始字段值到小写键的转换结果会被缓存）
+
+        Returns:
+            (小写的(协议, 方向), 候选流程下标元组或None)
+        """
+        raw = (protocol, direction)
+        result = self._lookup_cache.get(raw)
+        if result is None:
+            key = (protocol.lower(), direction.lower())
+            result = (key, self.buckets.get(key))
+            self._lookup_cache[raw] = result
+        return result
+
+    def advance(self, state, log_entry) -> list:
+        """
+        用一条日志推进流程状态
+
+        只检查当前步骤的(协议, 方向)与日志相同、前置流程已全部完成的流程，按定义顺序依次匹配，
+        同一条日志完成的流程会立即满足后面流程的前置条件（与逐个流程检查的结果一致）
+
+        Returns:
+            本条日志完成的流程下标列表
+        """
+        is_entry = type(log_entry) is LogEntry
+        if is_entry:
+            key, candidates = self.lookup(log_entry.protocol, log_entry.direction)
+        else:
+            key, candidates = self.lookup(log_entry["protocol"], log_entry["direction"])
+        if not candidates:
+            return []
+
+        completed = []
+        message = None
+        for flow_index in candidates:
+            if state.completed[flow_index] or state.pending_prerequisites[flow_index]:
+                continue
+
+            # 检查当前步骤是否匹配
+            steps = self.steps[flow_index]
+            cursor = state.cursors[flow_index]
+            if cursor >= len(steps):
+                continue
+            step_key, words, expected = steps[cursor]
+            if step_key != key:
+                continue
+            if message is None:
+                message = (log_entry.message if is_entry else log_entry["message"]).lower().replace('[', ' ')
+            if not self.match_words(message, words):
+                continue
+
+            # 记录找到的步骤
+            state.record_step(flow_index, expected, log_entry.timestamp if is_entry else log_entry["timestamp"])
+
+            # 标记完成状态
+            if cursor + 1 == len(steps):
+                state.complete(flow_index)
+                completed.append(flow_index)
+        return completed
+
+    def matches_step(self, flow_index: int, step_index: int, log_entry) -> bool:
+        """日志是否与指定流程的指定步骤匹配（不考虑流程状态）"""
+        steps = self.steps[flow_index]
+        if step_index >= len(steps):
+            return False
+        step_key, words, _ = steps[step_index]
+        key, _ = self.lookup(log_entry["protocol"], log_entry["direction"])
+        return key == step_key and self.match_words(log_entry["message"].lower().replace('[', ' '), words)
+
+    @staticmethod
+    def match_words(message: str, words) -> bool:
+        """与contains_in_order相同：words中的单词依次出现在message中（message已转小写并替换方括号）"""
+        current_pos = 0
+        for word in words:
+            idx = message.find(word, current_pos)
+            if idx == -1:
+                return False
+            current_pos = idx + len(word)
+        return True
+
+
+class FlowState:
+    """一次分析的流程状态：各流程已匹配的步骤（游标）、完成标记和尚未完成的前置流程数"""
+
+    def __init__(self, compiled: CompiledFlows, completed_flows=()):
+        self.compiled = compiled
+        self.flow_status = {name: {"found_steps": [], "completed": False} for name in compiled.names}
+        self.found_steps = [self.flow_status[name]["found_steps"] for name in compiled.names]
+        self.cursors = [0] * len(compiled.names)
+        self.completed = [False] * len(compiled.names)
+
+        self.satisfied = set(completed_flows)
+        self.pending_prerequisites = [len(prerequisites - self.satisfied) for prerequisites in compiled.prerequisites]
+
+    def record_step(self, flow_index: int, step, timestamp):
+        self.found_steps[flow_index].append({
+            "step": step,
+            "timestamp": timestamp
+        })
+        self.cursors[flow_index] += 1
+
+    def complete(self, flow_index: int):
+        """标记流程完成，并减少依赖它的流程的待完成前置数"""
+        flow_name = self.compiled.names[flow_index]
+        self.completed[flow_index] = True
+        self.flow_status[flow_name]["completed"] = True
+        if flow_name not in self.satisfied:
+            self.satisfied.add(flow_name)
+            for dependent in self.compiled.dependents[flow_name]:
+                self.pending_prerequisites[dependent] -= 1
+
+
+class SessionState:
+    """单个会话（UE/小区/接入周期）的紧凑流程状态，只记录游标、完成顺序和步骤时间"""
+
+    __slots__ = ('ue', 'cell', 'cycle', 'cursors', 'completed', 'pending_prerequisites',
+                 'completed_order', 'step_times', 'first_seen', 'last_seen', 'entries', '_dependents')
+
+    def __init__(self, compiled: CompiledFlows, ue=None, cell=None, cycle: int = 0):
+        count = len(compiled.names)
+        self.ue = ue
+        self.cell = cell
+        self.cycle = cycle
+        self.cursors = [0] * count
+        self.completed = [False] * count
+        self.pending_prerequisites = [len(prerequisites) for prerequisites in compiled.prerequisites]
+        self.completed_order = []
+        self.step_times = [None] * count
+        self.first_seen = None
+        self.last_seen = None
+        self.entries = 0
+        self._dependents = compiled.dependents_by_index
+
+    def record_step(self, flow_index: int, step, timestamp):
+        times = self.step_times[flow_index]
+        if times is None:
+            self.step_times[flow_index] = [timestamp]
+        else:
+            times.append(timestamp)
+        self.cursors[flow_index] += 1
+
+    def complete(self, flow_index: int):
+        self.completed[flow_index] = True
+        self.completed_order.append(flow_index)
+        for dependent in self._dependents[flow_index]:
+            self.pending_prerequisites[dependent] -= 1
+
+
 class ProtocolAnalyzer:
-    def __init__(self):
+    def __init__(self, ue_field: int = None, cell_field: int = None):
+        """
+        Args:
+            ue_field: UE标识所在的字段下标（可选，用于按会话分析）
+            cell_field: 小区标识所在的字段下标（可选）
+        """
+        self.ue_field = ue_field
+        self.cell_field = cell_field
+
         # 扩展流程模板（包含关键5G流程）
         self.flow_definitions = {
             # 注册请求
@@ -104,6 +355,9 @@ class ProtocolAnalyzer:
         }
 
         # 运行时状态跟踪
+        self._compiled = None
+        self._state = None
+        self.flow_status = {}
         self.active_flows = {}
         self.completed_flows = []
         self.over_flows = []
@@ -111,38 +365,66 @@ class ProtocolAnalyzer:
     def parse_log(self, log_content: str) -> list:
         """解析日志内容（基于制表符分隔的格式）"""
         logs = []
-        for line_num, line in enumerate(log_content.split('\n'), 1):
-            if not line.strip():
-                continue
-                
-            # 严格按制表符拆分字段
-            parts = line.strip().split('\t')
+        for entry in self.iter_parse(log_content.split('\n')):
+            log_entry = entry._asdict()
+            if self.ue_field is None:
+                del log_entry["ue"]
+            if self.cell_field is None:
+                del log_entry["cell"]
+            logs.append(log_entry)
+        return logs
+
+    def iter_parse(self, lines):
+        """
+        流式解析日志，逐条产出LogEntry
+
+        Args:
+            lines: 任意行迭代器（行列表、文件对象等）
+
+        Yields:
+            LogEntry，字段与parse_log返回的字典相同
+        """
+        for line in lines:
+            entry = self.parse_line(line)
+            if entry is not None:
+                yield entry
+
+    def parse_line(self, line: str):
+        """解析单行日志，不是有效日志行时返回None"""
+        if not line.strip():
+            return None
             
-            # 验证字段数量（根据样例日志至少有9个字段）
-            if len(parts) < 9:
-                continue
+        # 严格按制表符拆分字段
+        parts = line.strip().split('\t')
+        
+        # 验证字段数量（根据样例日志至少有9个字段）
+        if len(parts) < 9:
+            return None
+        
+        try:
+            # 解析复合时间戳字段（格式：09:42:30.804, 2025-04-07），使用第一个时间戳作为基准
+            timestamp = parse_timestamp(parts[2])
             
-            try:
-                # 解析复合时间戳字段（格式：09:42:30.804, 2025-04-07）
-                start_time_str = parts[2].replace(',', '').strip()  # 09:42:30.804 2025-04-07
-                
-                # 解析时间戳（使用第一个时间戳作为基准）
-                timestamp = datetime.strptime(start_time_str, "%H:%M:%S.%f %Y-%m-%d")
-                
-                # 构建日志条目
-                log_entry = {
-                    "seq": int(parts[0]),
-                    "timestamp": timestamp,
-                    "protocol": parts[6],  # 第7个字段是协议类型
-                    "direction": parts[5], # 第6个字段是方向(U/D)
-                    "message": parts[8].strip().lower()  # 直接处理原始消息
-                }
-                logs.append(log_entry)
-                
-            except Exception as e:
-                continue
-        return logs
+            # 构建日志条目
+            return LogEntry(
+                seq=int(parts[0]),
+                timestamp=timestamp,
+                protocol=parts[6],  # 第7个字段是协议类型
+                direction=parts[5], # 第6个字段是方向(U/D)
+                message=parts[8].strip().lower(),  # 直接处理原始消息
+                ue=self._field(parts, self.ue_field),
+                cell=self._field(parts, self.cell_field)
+            )
+            
+        except Exception as e:
+            return None
     
+    @staticmethod
+    def _field(parts, index):
+        if index is None or index >= len(parts):
+            return None
+        return parts[index].strip()
+
     def contains_in_order(self, a_str, b_str):
         a_str = a_str.replace('[',' ')  # 替换方括号
         b_str = b_str.replace('[',' ')
@@ -156,61 +438,105 @@ class ProtocolAnalyzer:
         return True  # 所有单词均按顺序找到
 
     def analyze_flow_completeness(self, logs):
-        """分析日志中的流程完整性"""
-        # 初始化所有流程的跟踪状态
-        flow_status = {name: {"found_steps": [], "completed": False} for name in self.flow_definitions}
+        """分析日志中的流程完整性（logs可以是列表，也可以是iter_parse产生的迭代器）"""
+        self.start_analysis()
         
         for log_entry in logs:
-            for flow_name, flow_def in self.flow_definitions.items():
-                # 跳过已完成的流程
-                if flow_status[flow_name]["completed"]:
-                    continue
-                
-                # 检查前置条件是否满足
-                if not all(p in self.completed_flows for p in flow_def["prerequisites"]):
-                    continue
-                
-                # 检查当前步骤是否匹配
-                expected_steps = flow_def["steps"]
-                current_step_index = len(flow_status[flow_name]["found_steps"])
-                
-                if current_step_index < len(expected_steps):
-                    expected = expected_steps[current_step_index]
-                    if (self.contains_in_order(log_entry["message"].lower(), expected["msg"].lower()) and
-                        log_entry["protocol"].lower() == expected["protocol"].lower() and
-                        log_entry["direction"].lower() == expected["dir"].lower()):
-                        
-                        # 记录找到的步骤
-                        flow_status[flow_name]["found_steps"].append({
-                            "step": expected,
-                            "timestamp": log_entry["timestamp"]
-                        })
-                        
-                        # 标记完成状态
-                        if len(flow_status[flow_name]["found_steps"]) == len(expected_steps):
-                            flow_status[flow_name]["completed"] = True
-                            self.completed_flows.append(flow_name)
-                            if flow_name in self.active_flows:
-                                del self.active_flows[flow_name]
-
-        # 更新激活流程状态
+            self.feed(log_entry)
+
+        self.finalize()
+
+    def analyze_stream(self, lines) -> int:
+        """
+        边解析边分析：逐行读取日志并推进流程状态，内存占用只与流程数有关，与日志行数无关
+
+        Args:
+            lines: 任意行迭代器（行列表、文件对象等）
+
+        Returns:
+            解析出的有效日志条数
+        """
+        self.start_analysis()
+        count = 0
+        for log_entry in self.iter_parse(lines):
+            self.feed(log_entry)
+            count += 1
+        self.finalize()
+        return count
+
+    def parse_table(self, lines):
+        """
+        解析日志为列式表（ProtocolLogTable），每行约28字节，适合需要多次查询的大日志
+
+        Args:
+            lines: 任意行迭代器（行列表、文件对象等）
+        """
+        from .protocol_table import ProtocolLogTable
+        return ProtocolLogTable.from_entries(self.iter_parse(lines))
+
+    def analyze_table(self, table) -> int:
+        """
+        分析列式表中的日志：先向量化筛选出可能匹配流程步骤的行，只把这些行交给状态机，结果与逐条分析一致
+
+        Returns:
+            实际检查的行数
+        """
+        self.start_analysis()
+        rows = table.candidate_mask(self.compile_flows()).nonzero()[0]
+        for log_entry in table.iter_entries(rows):
+            self.feed(log_entry)
+        self.finalize()
+        return len(rows)
+
+    def compile_flows(self):
+        """编译流程定义（flow_definitions修改后重新编译）"""
+        if self._compiled is None or self._compiled.definitions is not self.flow_definitions:
+            self._compiled = CompiledFlows(self.flow_definitions)
+        return self._compiled
+
+    def start_analysis(self):
+        """初始化所有流程的跟踪状态"""
+        self._state = FlowState(self.compile_flows(), self.completed_flows)
+        self.flow_status = self._state.flow_status
+
+    def feed(self, log_entry):
+        """用一条日志推进各流程的匹配状态（需先调用start_analysis）"""
+        for flow_index in self._compiled.advance(self._state, log_entry):
+            flow_name = self._compiled.names[flow_index]
+            self.completed_flows.append(flow_name)
+            if flow_name in self.active_flows:
+                del self.active_flows[flow_name]
+
+    def finalize(self):
+        """所有日志处理完后，根据跟踪状态更新进行中的流程"""
+        self.active_flows.update(self.in_progress_flows())
+
+    def in_progress_flows(self) -> dict:
+        """当前已开始但未完成的流程（不修改分析状态，可在两次feed之间调用）"""
+        flow_status = self.flow_status
+        active_flows = {}
         for flow_name in self.flow_definitions:
             if flow_name in self.completed_flows:
                 continue
             if len(flow_status[flow_name]["found_steps"]) > 0:
-                self.active_flows[flow_name] = {
+                active_flows[flow_name] = {
                     "progress": flow_status[flow_name]["found_steps"],
                     "total_steps": len(self.flow_definitions[flow_name]["steps"])
                 }
+        return active_flows
 
     def generate_analysis_report(self):
         """生成分析报告"""
+        return self.build_report(self.completed_flows, self.active_flows)
+
+    def build_report(self, completed_flows, active_flows):
+        """由已完成流程列表和进行中流程生成分析报告"""
         report = {
             "summary": {
                 "total_flows": len(self.flow_definitions),
-                "completed": len(self.completed_flows),
-                "in_progress": len(self.active_flows),
-                "not_started": len(self.flow_definitions) - len(self.completed_flows) - len(self.active_flows)
+                "completed": len(completed_flows),
+                "in_progress": len(active_flows),
+                "not_started": len(self.flow_definitions) - len(completed_flows) - len(active_flows)
             },
             "completed_flows": [],
             "in_progress_flows": [],
@@ -218,7 +544,7 @@ class ProtocolAnalyzer:
         }
 
         # 已完成流程详情
-        for flow_name in self.completed_flows:
+        for flow_name in completed_flows:
             report["completed_flows"].append({
                 "flow_name": flow_name,
                 "steps": self.flow_definitions[flow_name]["steps"],
@@ -226,7 +552,7 @@ class ProtocolAnalyzer:
             })
 
         # 进行中流程详情
-        for flow_name, progress in self.active_flows.items():
+        for flow_name, progress in active_flows.items():
             flow_info = {
                 "flow_name": flow_name,
                 "completed_steps": len(progress["progress"]),
@@ -245,10 +571,10 @@ class ProtocolAnalyzer:
 
         # 问题流程检测（前置条件满足但未启动）
         for flow_name in self.flow_definitions:
-            if flow_name in self.completed_flows or flow_name in self.active_flows:
+            if flow_name in completed_flows or flow_name in active_flows:
                 continue
                 
-            prerequisites_met = all(p in self.completed_flows for p in self.flow_definitions[flow_name]["prerequisites"])
+            prerequisites_met = all(p in completed_flows for p in self.flow_definitions[flow_name]["prerequisites"])
             if prerequisites_met:
                 report["problematic_flows"].append({
                     "flow_name": flow_name,
@@ -307,4 +633,119 @@ class ProtocolAnalyzer:
             return error_info
         
         # 所有流程正常完成
-        return {"status": "all_flows_completed"} 
\ No newline at end of file
+        return {"status": "all_flows_completed"} 
+
+class SessionProtocolAnalyzer:
+    """
+    按会话分析流程完整性
+
+    日志按(UE标识, 小区标识)分流，每个会话独立跟踪流程状态；同一会话在注册请求流程完成后再次出现注册请求时，
+    视为新的接入周期。适用于一个trace中包含大量UE或多次接入的场景。
+    """
+
+    def __init__(self, ue_field: int = None, cell_field: int = None,
+                 cycle_start_flow: str = "Registration Request"):
+        """
+        Args:
+            ue_field: UE标识所在的字段下标（可选），不指定时所有日志属于同一个UE
+            cell_field: 小区标识所在的字段下标（可选）
+            cycle_start_flow: 标志新接入周期开始的流程（其第一步再次出现时开始新周期）
+        """
+        self.analyzer = ProtocolAnalyzer(ue_field, cell_field)
+        self.compiled = self.analyzer.compile_flows()
+        self.cycle_start = (self.compiled.names.index(cycle_start_flow)
+                            if cycle_start_flow in self.compiled.names else None)
+        self.active_sessions = {}
+        self.closed_sessions = []
+
+    def feed(self, log_entry: LogEntry):
+        """用一条日志推进所属会话的流程状态"""
+        key = (log_entry.ue, log_entry.cell)
+        state = self.active_sessions.get(key)
+        if state is None:
+            state = SessionState(self.compiled, log_entry.ue, log_entry.cell)
+            self.active_sessions[key] = state
+        elif (self.cycle_start is not None and state.completed[self.cycle_start] and
+              self.compiled.matches_step(self.cycle_start, 0, log_entry)):
+            # 新的接入周期
+            self.closed_sessions.append(state)
+            state = SessionState(self.compiled, log_entry.ue, log_entry.cell, state.cycle + 1)
+            self.active_sessions[key] = state
+
+        if state.first_seen is None:
+            state.first_seen = log_entry.timestamp
+        state.last_seen = log_entry.timestamp
+        state.entries += 1
+        self.compiled.advance(state, log_entry)
+
+    def analyze_stream(self, lines) -> int:
+        """
+        边解析边分析
+
+        Returns:
+            解析出的有效日志条数
+        """
+        count = 0
+        for log_entry in self.analyzer.iter_parse(lines):
+            self.feed(log_entry)
+            count += 1
+        return count
+
+    def session_report(self, state: SessionState) -> dict:
+        """生成单个会话的分析报告（格式与ProtocolAnalyzer.generate_analysis_report相同）"""
+        compiled = self.compiled
+        completed_flows = [compiled.names[flow_index] for flow_index in state.completed_order]
+        active_flows = {}
+        for flow_index, flow_name in enumerate(compiled.names):
+            times = state.step_times[flow_index]
+            if state.completed[flow_index] or not times:
+                continue
+            steps = compiled.steps[flow_index]
+            active_flows[flow_name] = {
+                "progress": [{"step": steps[i][2], "timestamp": ts} for i, ts in enumerate(times)],
+                "total_steps": len(steps)
+            }
+        return self.analyzer.build_report(completed_flows, active_flows)
+
+    def generate_report(self, detail: bool = False) -> dict:
+        """
+        生成全部会话的分析结果
+
+        Args:
+            detail: 是否包含每个会话的完整报告（会话很多时响应较大）
+        """
+        flow_order = list(self.analyzer.flow_definitions.keys())
+        sessions = self.closed_sessions + list(self.active_sessions.values())
+        sessions.sort(key=lambda state: (state.first_seen, str(state.ue), str(state.cell), state.cycle))
+
+        results = []
+        blocking_flows = {}
+        completed_sessions = 0
+        for state in sessions:
+            report = self.session_report(state)
+            first_error = self.analyzer.print_first_error(report, flow_order)
+            if first_error["status"] == "all_flows_completed":
+                completed_sessions += 1
+            else:
+                blocking_flows[first_error["blocking_flow"]] = blocking_flows.get(first_error["blocking_flow"], 0) + 1
+
+            result = {
+                "ue": state.ue,
+                "cell": state.cell,
+                "cycle": state.cycle,
+                "first_seen": state.first_seen.isoformat(),
+                "last_seen": state.last_seen.isoformat(),
+                "entries": state.entries,
+                "summary": report["summary"],
+                "first_error": first_error
+            }
+            if detail:
+                result["report"] = report
+            results.append(result)
+
+        return {
+            "session_count": len(results),
+            "completed_sessions": completed_sessions,
+            "blocking_flows": blocking_flows,
+            "sessions": results
+        }
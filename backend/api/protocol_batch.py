@@ -0,0 +1,297 @@
+"""
+多文件信令流程并行分析
+把日志文件分发到进程池，每个进程用ProtocolAnalyzer逐行分析一个文件，结果按完成顺序返回，
+同时汇总各文件的第一个错误（哪个流程最常阻塞）。
+
+    for result in analyze_files(paths, workers=8):
+        summary.add(result)
+
+工作进程一律以spawn方式启动：Web进程是多线程的，可能已经持有模型、ONNX会话和Neo4j驱动，fork这样的进程
+可能死锁。Web接口使用进程级共享的进程池(shared_pool)，不为每个请求新建进程池。
+"""
+
+import io
+import os
+import gzip
+import logging
+import threading
+import multiprocessing
+from collections import Counter
+from concurrent.futures import ProcessPoolExecutor, FIRST_COMPLETED, wait
+from concurrent.futures.process import BrokenProcessPool
+from typing import Iterable, Iterator, List, Dict, Any, Callable
+
+from .protocol_analyzer import ProtocolAnalyzer, SessionProtocolAnalyzer
+
+
+GZIP_MAGIC = b'\x1f\x8b'
+
+
+def parse_analysis_options(get_option: Callable[[str], Any]) -> Dict[str, Any]:
+    """
+    读取并校验分析参数
+
+    mode=session时按(UE, 小区, 接入周期)分会话分析，UE/小区标识的字段下标由ue_field/cell_field参数
+    或PROTOCOL_SESSION_UE_FIELD/PROTOCOL_SESSION_CELL_FIELD配置指定。ue_field必须指定：
+    不区分UE时所有日志属于同一个UE，只按注册请求切分接入周期，重注册也会被当成新的接入
+
+    Raises:
+        ValueError: 参数无效
+    """
+    from django.conf import settings
+
+    mode = get_option('mode') or 'global'
+    if mode not in ('global', 'session'):
+        raise ValueError("mode must be 'global' or 'session'")
+
+    options = {'mode': mode, 'ue_field': None, 'cell_field': None}
+    if mode == 'session':
+        for name, setting in (('ue_field', 'PROTOCOL_SESSION_UE_FIELD'), ('cell_field', 'PROTOCOL_SESSION_CELL_FIELD')):
+            value = get_option(name)
+            if value is None or value == '':
+                value = getattr(settings, setting, None)
+            try:
+                options[name] = int(value) if value is not None else None
+            except (TypeError, ValueError):
+                raise ValueError(f'{name} must be a field index')
+        if options['ue_field'] is None:
+            raise ValueError('mode=session requires ue_field (or PROTOCOL_SESSION_UE_FIELD)')
+    return options
+
+
+def create_analyzer(options: Dict[str, Any] = None):
+    """按分析参数创建ProtocolAnalyzer或SessionProtocolAnalyzer"""
+    options = options or {}
+    if options.get('mode') == 'session':
+        return SessionProtocolAnalyzer(options.get('ue_field'), options.get('cell_field'))
+    return ProtocolAnalyzer()
+
+
+def analysis_result(analyzer, detail: bool = False) -> Dict[str, Any]:
+    """由已完成流程分析的分析器生成报告和第一个错误信息"""
+    if isinstance(analyzer, SessionProtocolAnalyzer):
+        return analyzer.generate_report(detail=detail)
+
+    # 生成分析报告
+    report = analyzer.generate_analysis_report()
+
+    # 获取流程顺序
+    flow_order = list(analyzer.flow_definitions.keys())
+
+    # 获取第一个错误信息
+    first_error = analyzer.print_first_error(report, flow_order)
+
+    return {
+        'report': report,
+        'first_error': first_error
+    }
+
+
+def open_log_file(path: str, encoding: str = 'utf-8'):
+    """以文本方式打开日志文件（gzip压缩的文件自动解压），只以\\n分行"""
+    with open(path, 'rb') as f:
+        compressed = f.read(2) == GZIP_MAGIC
+    binary = gzip.open(path, 'rb') if compressed else open(path, 'rb')
+    return io.TextIOWrapper(binary, encoding=encoding, errors='replace', newline='\n')
+
+
+def analyze_log_file(task) -> Dict[str, Any]:
+    """
+    分析单个日志文件（在工作进程中执行）
+
+    Args:
+        task: (文件标识, 文件路径, 分析参数, 是否包含完整报告)
+
+    Returns:
+        {'file', 'entries', 以及analysis_result的内容}，失败时为{'file', 'error'}
+    """
+    key, path, options, detail = task
+    try:
+        analyzer = create_analyzer(options)
+        with open_log_file(path) as f:
+            entries = analyzer.analyze_stream(f)
+        result = analysis_result(analyzer, detail=detail)
+        if not detail and 'report' in result:
+            # 只保留报告摘要，减少进程间传输和响应大小
+            result['summary'] = result.pop('report')['summary']
+        return {'file': key, 'entries': entries, **result}
+    except Exception as e:
+        return {'file': key, 'error': str(e)}
+
+
+def analyze_log_files(tasks: List[tuple]) -> List[Dict[str, Any]]:
+    """在工作进程中依次分析一组文件（chunksize个文件一次分发）"""
+    return [analyze_log_file(task) for task in tasks]
+
+
+def max_workers() -> int:
+    """进程数上限：PROTOCOL_BATCH_WORKERS，未配置时为CPU核数"""
+    from django.conf import settings
+
+    return getattr(settings, 'PROTOCOL_BATCH_WORKERS', None) or os.cpu_count() or 1
+
+
+def spawn_executor(workers: int) -> ProcessPoolExecutor:
+    return ProcessPoolExecutor(max_workers=workers, mp_context=multiprocessing.get_context('spawn'))
+
+
+class SharedProcessPool:
+    """进程级共享的spawn进程池，首次使用时创建，工作进程异常退出后重建"""
+
+    def __init__(self):
+        self._executor = None
+        self._lock = threading.Lock()
+
+    def get(self) -> ProcessPoolExecutor:
+        with self._lock:
+            if self._executor is None:
+                self._executor = spawn_executor(max_workers())
+            return self._executor
+
+    def discard(self, executor: ProcessPoolExecutor) -> None:
+        """丢弃已损坏的进程池，下次get时重建"""
+        with self._lock:
+            if self._executor is executor:
+                self._executor = None
+        executor.shutdown(wait=False, cancel_futures=True)
+
+    def shutdown(self) -> None:
+        with self._lock:
+            executor, self._executor = self._executor, None
+        if executor is not None:
+            executor.shutdown(wait=False, cancel_futures=True)
+
+
+# 进程级单例
+shared_pool = SharedProcessPool()
+
+
+def analyze_files(files: List[tuple], options: Dict[str, Any] = None, workers: int = None,
+                  chunksize: int = 1, detail: bool = False,
+                  executor: ProcessPoolExecutor = None) -> Iterator[Dict[str, Any]]:
+    """
+    并行分析多个日志文件，按完成顺序产出每个文件的结果
+
+    Args:
+        files: (文件标识, 文件路径) 列表
+        options: 分析参数（见parse_analysis_options）
+        workers: 同时分析的任务数，None时为max_workers()；不使用共享进程池且为1时在当前进程中顺序执行
+        chunksize: 每次分发给工作进程的文件数，文件很多且很小时调大可以减少进程间通信
+        detail: 每个文件的结果是否包含完整报告
+        executor: 使用的进程池（如shared_pool.get()），None时创建本次专用的进程池
+    """
+    if chunksize < 1:
+        raise ValueError('chunksize must be at least 1')
+    tasks = [(key, path, options or {}, detail) for key, path in files]
+    workers = min(workers or max_workers(), len(tasks)) if tasks else 1
+
+    if executor is None and workers <= 1:
+        for task in tasks:
+            yield analyze_log_file(task)
+        return
+
+    logging.getLogger(__name__).info(f"并行分析 {len(tasks)} 个日志文件，进程数 {workers}")
+    chunks = [tasks[start:start + chunksize] for start in range(0, len(tasks), chunksize)]
+    if executor is not None:
+        yield from _run_chunks(executor, chunks, workers)
+        return
+    with spawn_executor(workers) as own_executor:
+        yield from _run_chunks(own_executor, chunks, workers)
+
+
+def _run_chunks(executor: ProcessPoolExecutor, chunks: List[List[tuple]], workers: int) -> Iterator[Dict[str, Any]]:
+    """最多同时提交workers块，完成一块补一块；迭代提前结束（如客户端断开）时取消未开始的块"""
+    remaining = iter(chunks)
+    running = set()
+    try:
+        for chunk in remaining:
+            running.add(executor.submit(analyze_log_files, chunk))
+            if len(running) >= workers:
+                break
+        while running:
+            done, running = wait(running, return_when=FIRST_COMPLETED)
+            for future in done:
+                yield from future.result()
+                chunk = next(remaining, None)
+                if chunk is not None:
+                    running.add(executor.submit(analyze_log_files, chunk))
+    except BrokenProcessPool:
+        # 工作进程异常退出，共享进程池下次使用时重建
+        shared_pool.discard(executor)
+        raise
+    finally:
+        for future in running:
+            future.cancel()
+
+
+def collect_log_files(paths: Iterable[str], pattern: str = None) -> List[tuple]:
+    """
+    展开文件和目录（递归），返回按路径排序的(文件标识, 文件路径)列表
+
+    Args:
+        pattern: 文件名匹配模式（可选，如 '*.txt'），只作用于目录中的文件
+    """
+    import fnmatch
+
+    files = []
+    for path in paths:
+        if os.path.isdir(path):
+            for root, dirs, names in os.walk(path):
+                dirs[:] = sorted(d for d in dirs if not d.startswith('.'))
+                for name in sorted(names):
+                    if name.startswith('.') or (pattern and not fnmatch.fnmatch(name, pattern)):
+                        continue
+                    full_path = os.path.join(root, name)
+                    files.append((os.path.relpath(full_path, path), full_path))
+        elif os.path.isfile(path):
+            files.append((os.path.basename(path), path))
+        else:
+            raise FileNotFoundError(f"路径不存在: {path}")
+    return files
+
+
+class BatchSummary:
+    """汇总多文件分析结果：完成/失败文件数，以及各流程作为第一个错误出现的次数"""
+
+    def __init__(self):
+        self.files = 0
+        self.failed = []
+        self.entries = 0
+        self.all_completed = 0
+        self.blocking_flows = Counter()
+        self.statuses = Counter()
+
+    def add(self, result: Dict[str, Any]) -> None:
+        self.files += 1
+        if 'error' in result:
+            self.failed.append(result['file'])
+            return
+        self.entries += result.get('entries', 0)
+
+        if 'sessions' in result:
+            # 按会话分析的结果：每个会话计一次
+            self.all_completed += result['completed_sessions']
+            self.statuses['all_flows_completed'] += result['completed_sessions']
+            for flow_name, count in result['blocking_flows'].items():
+                self.blocking_flows[flow_name] += count
+                self.statuses['blocked'] += count
+            return
+
+        first_error = result['first_error']
+        self.statuses[first_error['status']] += 1
+        if first_error['status'] == 'all_flows_completed':
+            self.all_completed += 1
+        else:
+            self.blocking_flows[first_error['blocking_flow']] += 1
+
+    def to_dict(self) -> Dict[str, Any]:
+        most_common = self.blocking_flows.most_common()
+        return {
+            'files': self.files,
+            'failed_files': self.failed,
+            'entries': self.entries,
+            'all_flows_completed': self.all_completed,
+            'statuses': dict(self.statuses),
+            'blocking_flows': [{'flow_name': name, 'count': count} for name, count in most_common],
+            'most_common_blocking_flow': most_common[0][0] if most_common else None
+        }
@@ -0,0 +1,267 @@
+"""
+列式存储的解析后信令日志
+每条日志用字典保存时要占用数百字节。ProtocolLogTable把seq和时间戳存为NumPy数组，协议/方向/消息等字符串
+列存为类别编码（每个不同的值只保存一次），每行约28字节；流程候选筛选、时间窗口查询和按协议统计都在
+编码数组上向量化完成。
+
+    table = analyzer.parse_table(lines)
+    analyzer.analyze_table(table)
+    table.value_counts('protocol')
+"""
+
+from array import array
+from collections import defaultdict
+from datetime import datetime
+from typing import Dict, Iterable, Iterator, List, Optional
+import numpy as np
+
+from .protocol_analyzer import LogEntry, CompiledFlows
+
+
+STRING_COLUMNS = ('protocol', 'direction', 'message', 'ue', 'cell')
+
+
+class Categories:
+    """字符串列的类别表：值 <-> 编码（None编码为-1）"""
+
+    def __init__(self, values: Iterable[str] = ()):
+        self.values: List[str] = []
+        self.codes: Dict[str, int] = {}
+        for value in values:
+            self.encode(value)
+
+    def encode(self, value: Optional[str]) -> int:
+        if value is None:
+            return -1
+        code = self.codes.get(value)
+        if code is None:
+            code = len(self.values)
+            self.codes[value] = code
+            self.values.append(value)
+        return code
+
+    def decode(self, code: int) -> Optional[str]:
+        return self.values[code] if code >= 0 else None
+
+    def __len__(self):
+        return len(self.values)
+
+
+class ProtocolLogTable:
+    """列式的解析后日志，行顺序与日志顺序一致，每行对应一个LogEntry"""
+
+    # 时间戳先按块收集为datetime列表再转换为datetime64，避免逐行转换
+    BLOCK_SIZE = 65536
+
+    def __init__(self, seq: np.ndarray, timestamp: np.ndarray, codes: Dict[str, np.ndarray],
+                 categories: Dict[str, Categories]):
+        """
+        Args:
+            seq: int64序号数组
+            timestamp: datetime64[us]时间戳数组
+            codes: 字符串列名 -> int32编码数组（ue/cell列可以不存在）
+            categories: 字符串列名 -> 类别表（子表与原表共享）
+        """
+        self.seq = seq
+        self.timestamp = timestamp
+        self.codes = codes
+        self.categories = categories
+
+    @classmethod
+    def from_entries(cls, entries: Iterable[LogEntry]) -> 'ProtocolLogTable':
+        """由LogEntry序列（如ProtocolAnalyzer.iter_parse的结果）构建，只遍历一次"""
+        categories = {name: Categories() for name in STRING_COLUMNS}
+        columns = {name: array('i') for name in STRING_COLUMNS}
+        seq = array('q')
+        timestamp_blocks = []
+        timestamps = []
+        has_ue = has_cell = False
+
+        encode_protocol = categories['protocol'].encode
+        encode_direction = categories['direction'].encode
+        encode_message = categories['message'].encode
+        encode_ue = categories['ue'].encode
+        encode_cell = categories['cell'].encode
+
+        for entry in entries:
+            seq.append(entry.seq)
+            timestamps.append(entry.timestamp)
+            if len(timestamps) >= cls.BLOCK_SIZE:
+                timestamp_blocks.append(np.array(timestamps, dtype='datetime64[us]'))
+                timestamps = []
+            columns['protocol'].append(encode_protocol(entry.protocol))
+            columns['direction'].append(encode_direction(entry.direction))
+            columns['message'].append(encode_message(entry.message))
+            columns['ue'].append(encode_ue(entry.ue))
+            columns['cell'].append(encode_cell(entry.cell))
+            has_ue = has_ue or entry.ue is not None
+            has_cell = has_cell or entry.cell is not None
+
+        timestamp_blocks.append(np.array(timestamps, dtype='datetime64[us]'))
+        codes = {name: np.frombuffer(column, dtype=np.int32).copy() for name, column in columns.items()}
+        # 没有配置UE/小区字段时不保存这两列
+        if not has_ue:
+            del codes['ue']
+        if not has_cell:
+            del codes['cell']
+
+        return cls(np.frombuffer(seq, dtype=np.int64).copy(), np.concatenate(timestamp_blocks), codes, categories)
+
+    def __len__(self) -> int:
+        return len(self.seq)
+
+    @property
+    def nbytes(self) -> int:
+        """数组占用的字节数（不含类别表）"""
+        return self.seq.nbytes + self.timestamp.nbytes + sum(codes.nbytes for codes in self.codes.values())
+
+    def column(self, name: str) -> np.ndarray:
+        """字符串列的编码数组（不存在的列全部为-1）"""
+        codes = self.codes.get(name)
+        if codes is None:
+            return np.full(len(self), -1, dtype=np.int32)
+        return codes
+
+    def entry(self, row: int) -> LogEntry:
+        """第row行的LogEntry"""
+        decode = {name: self.categories[name].decode for name in STRING_COLUMNS}
+        return LogEntry(
+            seq=int(self.seq[row]),
+            timestamp=self.timestamp[row].item(),
+            protocol=decode['protocol'](self.codes['protocol'][row]),
+            direction=decode['direction'](self.codes['direction'][row]),
+            message=decode['message'](self.codes['message'][row]),
+            ue=decode['ue'](self.column('ue')[row]),
+            cell=decode['cell'](self.column('cell')[row])
+        )
+
+    def iter_entries(self, rows: np.ndarray = None) -> Iterator[LogEntry]:
+        """
+        按行产出LogEntry
+
+        Args:
+            rows: 行下标数组（可选），默认全部行
+        """
+        if rows is None:
+            rows = np.arange(len(self))
+        seq = self.seq[rows].tolist()
+        timestamps = self.timestamp[rows].astype(object)
+        strings = []
+        for name in STRING_COLUMNS:
+            values = self.categories[name].values + [None]
+            strings.append([values[code] for code in self.column(name)[rows].tolist()])
+        for fields in zip(seq, timestamps, *strings):
+            yield LogEntry(*fields)
+
+    def __iter__(self) -> Iterator[LogEntry]:
+        return self.iter_entries()
+
+    def to_dicts(self) -> List[dict]:
+        """转换为parse_log格式的字典列表"""
+        logs = []
+        for entry in self:
+            log_entry = entry._asdict()
+            if 'ue' not in self.codes:
+                del log_entry['ue']
+            if 'cell' not in self.codes:
+                del log_entry['cell']
+            logs.append(log_entry)
+        return logs
+
+    def take(self, rows) -> 'ProtocolLogTable':
+        """按行下标或布尔掩码选出子表（与原表共享类别表）"""
+        return ProtocolLogTable(self.seq[rows], self.timestamp[rows],
+                                {name: codes[rows] for name, codes in self.codes.items()}, self.categories)
+
+    def time_mask(self, start: datetime = None, end: datetime = None) -> np.ndarray:
+        """时间戳在[start, end)内的行"""
+        mask = np.ones(len(self), dtype=bool)
+        if start is not None:
+            mask &= self.timestamp >= np.datetime64(start, 'us')
+        if end is not None:
+            mask &= self.timestamp < np.datetime64(end, 'us')
+        return mask
+
+    def time_window(self, start: datetime = None, end: datetime = None) -> 'ProtocolLogTable':
+        """时间戳在[start, end)内的子表"""
+        return self.take(self.time_mask(start, end))
+
+    def value_mask(self, name: str, values: Iterable[str], ignore_case: bool = True) -> np.ndarray:
+        """字符串列取值属于values的行（先在类别表上比较，再按编码筛选）"""
+        categories = self.categories[name]
+        if ignore_case:
+            wanted = {value.lower() for value in values}
+            codes = [code for code, value in enumerate(categories.values) if value.lower() in wanted]
+        else:
+            codes = [categories.codes[value] for value in values if value in categories.codes]
+        return np.isin(self.column(name), np.asarray(codes, dtype=np.int32))
+
+    def value_counts(self, name: str, mask: np.ndarray = None) -> Dict[str, int]:
+        """字符串列各取值的行数（按行数从多到少）"""
+        codes = self.column(name) if mask is None else self.column(name)[mask]
+        codes = codes[codes >= 0]
+        counts = np.bincount(codes, minlength=len(self.categories[name]))
+        order = np.argsort(-counts, kind='stable')
+        values = self.categories[name].values
+        return {values[code]: int(counts[code]) for code in order if counts[code] > 0}
+
+    def protocol_stats(self) -> Dict[str, dict]:
+        """按协议统计行数、上下行数以及首末时间"""
+        protocol_codes = self.codes['protocol']
+        direction_values = [value.lower() for value in self.categories['direction'].values]
+        uplink = np.isin(self.codes['direction'],
+                         np.asarray([code for code, value in enumerate(direction_values) if value == 'u'], dtype=np.int32))
+        count = len(self.categories['protocol'])
+        totals = np.bincount(protocol_codes, minlength=count)
+        uplinks = np.bincount(protocol_codes, weights=uplink, minlength=count)
+
+        stats = {}
+        for code, protocol in enumerate(self.categories['protocol'].values):
+            if not totals[code]:
+                continue
+            times = self.timestamp[protocol_codes == code]
+            stats[protocol] = {
+                'count': int(totals[code]),
+                'uplink': int(uplinks[code]),
+                'downlink': int(totals[code] - uplinks[code]),
+                'first_time': times.min().item().isoformat(),
+                'last_time': times.max().item().isoformat()
+            }
+        return stats
+
+    def candidate_mask(self, compiled: CompiledFlows) -> np.ndarray:
+        """
+        可能匹配某个流程步骤的行
+
+        对每个不同的(协议, 方向, 消息)组合只检查一次：(协议, 方向)必须是某个步骤的键，且消息按顺序包含
+        该键下某个步骤的全部单词。其余行不会推进任何流程，分析时可以直接跳过。
+        """
+        if not len(self):
+            return np.zeros(0, dtype=bool)
+
+        protocols = self.categories['protocol'].values
+        directions = self.categories['direction'].values
+        messages = self.categories['message'].values
+        step_words = defaultdict(list)
+        for steps in compiled.steps:
+            for key, words, _ in steps:
+                if words not in step_words[key]:
+                    step_words[key].append(words)
+
+        # (协议, 方向, 消息)组合编码
+        n_dir, n_msg = len(directions), len(messages)
+        combined = ((self.codes['protocol'].astype(np.int64) * n_dir + self.codes['direction']) * n_msg
+                    + self.codes['message'])
+        unique, inverse = np.unique(combined, return_inverse=True)
+
+        matches = np.zeros(len(unique), dtype=bool)
+        for i, value in enumerate(unique.tolist()):
+            protocol_code, rest = divmod(value, n_dir * n_msg)
+            direction_code, message_code = divmod(rest, n_msg)
+            key, candidates = compiled.lookup(protocols[protocol_code], directions[direction_code])
+            if not candidates:
+                continue
+            message = messages[message_code].lower().replace('[', ' ')
+            matches[i] = any(compiled.match_words(message, words) for words in step_words[key])
+        return matches[inverse.reshape(-1)]
+
@@ -0,0 +1,179 @@
+"""
+持续增长日志的增量信令流程分析
+测试台持续写入信令日志，客户端创建一个分析会话后只追加新写入的内容，分析器状态在两次追加之间保留，
+每次更新只解析新增的行。追加的内容可以在行中间断开，不完整的最后一行留到下一次追加时再解析。
+
+会话保存在进程内存中（多进程部署时需要把同一会话的请求路由到同一进程），超过
+PROTOCOL_TAIL_SESSION_TTL秒未访问的会话被清理，会话数超过PROTOCOL_TAIL_MAX_SESSIONS时淘汰最久未访问的会话。
+不完整的行最长PROTOCOL_TAIL_MAX_LINE_LENGTH个字符，每个会话累计最多接收PROTOCOL_TAIL_MAX_SESSION_BYTES，
+超过时拒绝本次追加（会话状态不变）。
+"""
+
+import time
+import uuid
+import logging
+import threading
+from collections import OrderedDict
+from datetime import datetime
+from typing import Dict, Any, Optional
+from django.conf import settings
+
+from .protocol_analyzer import SessionProtocolAnalyzer
+from .protocol_batch import create_analyzer, analysis_result
+
+
+class TailLimitExceeded(ValueError):
+    """追加的内容超过不完整行长度或会话累计大小的限制"""
+
+
+def max_line_length() -> Optional[int]:
+    return getattr(settings, 'PROTOCOL_TAIL_MAX_LINE_LENGTH', 1024 * 1024)
+
+
+def max_session_bytes() -> Optional[int]:
+    return getattr(settings, 'PROTOCOL_TAIL_MAX_SESSION_BYTES', 256 * 1024 * 1024)
+
+
+class TailSession:
+    """一个增量分析会话：分析器状态 + 未完成的行"""
+
+    def __init__(self, options: Dict[str, Any] = None):
+        self.id = uuid.uuid4().hex
+        self.options = options or {'mode': 'global'}
+        self.analyzer = create_analyzer(self.options)
+        if not isinstance(self.analyzer, SessionProtocolAnalyzer):
+            self.analyzer.start_analysis()
+        self.created_at = datetime.now().isoformat()
+        self.last_access = time.monotonic()
+        self.entries = 0
+        self.lines = 0
+        self.bytes_received = 0
+        self._pending = ''
+        self._lock = threading.Lock()
+
+    def _feed_lines(self, lines) -> int:
+        # 按会话分析时由内部的ProtocolAnalyzer负责解析
+        parser = self.analyzer.analyzer if isinstance(self.analyzer, SessionProtocolAnalyzer) else self.analyzer
+        count = 0
+        for log_entry in parser.iter_parse(lines):
+            self.analyzer.feed(log_entry)
+            count += 1
+        return count
+
+    def append(self, text: str, final: bool = False) -> int:
+        """
+        追加日志内容
+
+        Args:
+            text: 新写入的日志内容（可以在行中间断开）
+            final: 是否把末尾不完整的行也作为完整行解析（日志已写完时使用）
+
+        Returns:
+            本次新解析出的有效日志条数
+
+        Raises:
+            TailLimitExceeded: 会话累计接收的内容或末尾不完整的行超过限制，本次追加被丢弃
+        """
+        with self._lock:
+            limit = max_session_bytes()
+            if limit is not None and self.bytes_received + len(text) > limit:
+                raise TailLimitExceeded(f'Session exceeds the maximum size of {limit} characters')
+            lines = (self._pending + text).split('\n')
+            pending = '' if final else lines.pop()
+            limit = max_line_length()
+            if limit is not None and len(pending) > limit:
+                raise TailLimitExceeded(f'Incomplete line exceeds the maximum length of {limit} characters')
+
+            self.bytes_received += len(text)
+            self._pending = pending
+            self.lines += len(lines)
+            count = self._feed_lines(lines)
+            self.entries += count
+            return count
+
+    def result(self, detail: bool = False) -> Dict[str, Any]:
+        """当前的分析报告和第一个错误（与analyze-protocol接口的返回格式相同）"""
+        with self._lock:
+            analyzer = self.analyzer
+            if isinstance(analyzer, SessionProtocolAnalyzer):
+                return analysis_result(analyzer, detail)
+            report = analyzer.build_report(analyzer.completed_flows, analyzer.in_progress_flows())
+            return {
+                'report': report,
+                'first_error': analyzer.print_first_error(report, list(analyzer.flow_definitions.keys()))
+            }
+
+    def info(self) -> Dict[str, Any]:
+        return {
+            'session_id': self.id,
+            'mode': self.options.get('mode', 'global'),
+            'created_at': self.created_at,
+            'entries': self.entries,
+            'lines': self.lines,
+            'bytes_received': self.bytes_received,
+            'pending_chars': len(self._pending)
+        }
+
+
+class TailSessionRegistry:
+    """进程内的增量分析会话表（按最近访问排序，超时和超量时淘汰）"""
+
+    def __init__(self, ttl: float = None, max_sessions: int = None):
+        self.logger = logging.getLogger(__name__)
+        self._ttl = ttl
+        self._max_sessions = max_sessions
+        self._sessions: 'OrderedDict[str, TailSession]' = OrderedDict()
+        self._lock = threading.Lock()
+
+    @property
+    def ttl(self) -> Optional[float]:
+        return self._ttl if self._ttl is not None else getattr(settings, 'PROTOCOL_TAIL_SESSION_TTL', 3600)
+
+    @property
+    def max_sessions(self) -> int:
+        if self._max_sessions is not None:
+            return self._max_sessions
+        return getattr(settings, 'PROTOCOL_TAIL_MAX_SESSIONS', 100)
+
+    def _evict(self) -> None:
+        """在持有锁的情况下清理超时会话，并把会话数限制在max_sessions以内"""
+        ttl = self.ttl
+        if ttl:
+            deadline = time.monotonic() - ttl
+            while self._sessions:
+                session_id, session = next(iter(self._sessions.items()))
+                if session.last_access >= deadline:
+                    break
+                del self._sessions[session_id]
+                self.logger.info(f"增量分析会话超时清理: {session_id}")
+        while len(self._sessions) > self.max_sessions:
+            session_id, _ = self._sessions.popitem(last=False)
+            self.logger.info(f"增量分析会话数超过上限，淘汰: {session_id}")
+
+    def create(self, options: Dict[str, Any] = None) -> TailSession:
+        session = TailSession(options)
+        with self._lock:
+            self._sessions[session.id] = session
+            self._evict()
+        return session
+
+    def get(self, session_id: str) -> Optional[TailSession]:
+        """获取会话并刷新访问时间，不存在或已过期时返回None"""
+        with self._lock:
+            self._evict()
+            session = self._sessions.get(session_id)
+            if session is not None:
+                session.last_access = time.monotonic()
+                self._sessions.move_to_end(session_id)
+            return session
+
+    def delete(self, session_id: str) -> bool:
+        with self._lock:
+            return self._sessions.pop(session_id, None) is not None
+
+    def __len__(self) -> int:
+        return len(self._sessions)
+
+
+# 进程级单例
+tail_sessions = TailSessionRegistry()
@@ -0,0 +1,183 @@
+"""
+故障库相似度检索
+将故障库向量预先归一化为一个矩阵，单次矩阵-向量乘法即可得到与全部记录的余弦相似度，
+再用argpartition取top-k，支持多条日志的批量检索；
+挂载ANN索引后只对候选记录做精确打分
+"""
+
+from typing import List, Tuple, Optional, Dict, Any
+import numpy as np
+
+
+class SimilaritySearchIndex:
+    """基于归一化矩阵的精确余弦相似度检索"""
+
+    # 参与排名的记录数与返回的不同故障类型数（与原逐条比较的结果保持一致）
+    TOP_RECORDS = 5
+    TOP_TYPES = 3
+
+    # 批量检索时每次参与矩阵乘法的查询数，限制(查询数 × 记录数)相似度矩阵的内存
+    QUERY_CHUNK_SIZE = 256
+
+    def __init__(self, vectors: np.ndarray, fault_types: List[str]):
+        """
+        Args:
+            vectors: (n, dim) 故障库向量矩阵
+            fault_types: 与向量一一对应的故障类型
+        """
+        matrix = np.asarray(vectors, dtype=np.float32)
+        if matrix.ndim != 2 or len(matrix) != len(fault_types):
+            raise ValueError(f"向量矩阵形状 {matrix.shape} 与故障类型数量 {len(fault_types)} 不匹配")
+
+        self.matrix = self._normalize(matrix)
+        self.fault_types = list(fault_types)
+        self.ann_index = None
+        self.nprobe = None
+
+    def attach_ann(self, ann_index, nprobe: int) -> None:
+        """挂载IVF索引，rank时只检索最近nprobe个簇中的记录"""
+        self.ann_index = ann_index
+        self.nprobe = nprobe
+
+    @staticmethod
+    def _normalize(matrix: np.ndarray) -> np.ndarray:
+        """按行L2归一化，零向量保持为零（相似度为0）"""
+        norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+        norms[norms == 0] = 1.0
+        return matrix / norms
+
+    def __len__(self) -> int:
+        return len(self.fault_types)
+
+    @property
+    def dim(self) -> int:
+        return self.matrix.shape[1]
+
+    def similarities(self, query: np.ndarray) -> np.ndarray:
+        """计算查询向量与全部记录的余弦相似度"""
+        query = self._normalize(np.asarray(query, dtype=np.float32).reshape(1, -1))[0]
+        return self.matrix @ query
+
+    def search(self, query: np.ndarray, k: int = TOP_RECORDS) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        检索与查询向量最相似的k条记录
+
+        Returns:
+            (记录下标, 相似度)，按相似度降序
+        """
+        return self._top_k(self.similarities(query), k)
+
+    def search_batch(self, queries: np.ndarray, k: int = TOP_RECORDS) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        批量检索
+
+        Args:
+            queries: (m, dim) 查询向量矩阵
+
+        Returns:
+            (m, k) 记录下标与 (m, k) 相似度，每行按相似度降序
+        """
+        indices, scores = [], []
+        for sims in self._iter_similarity_chunks(queries):
+            for row in sims:
+                idx, score = self._top_k(row, k)
+                indices.append(idx)
+                scores.append(score)
+        k = min(k, len(self))
+        return (np.asarray(indices, dtype=np.int64).reshape(-1, k),
+                np.asarray(scores, dtype=np.float32).reshape(-1, k))
+
+    def _iter_similarity_chunks(self, queries: np.ndarray):
+        queries = self._normalize(np.asarray(queries, dtype=np.float32).reshape(-1, self.dim))
+        for start in range(0, len(queries), self.QUERY_CHUNK_SIZE):
+            yield queries[start:start + self.QUERY_CHUNK_SIZE] @ self.matrix.T
+
+    @staticmethod
+    def _top_k(sims: np.ndarray, k: int) -> Tuple[np.ndarray, np.ndarray]:
+        k = min(k, len(sims))
+        if k <= 0:
+            return np.empty(0, dtype=np.int64), np.empty(0, dtype=np.float32)
+        if k < len(sims):
+            candidates = np.argpartition(-sims, k - 1)[:k]
+        else:
+            candidates = np.arange(len(sims))
+        # 相似度相同时下标小的在前，与np.argmax的选择一致
+        order = np.lexsort((candidates, -sims[candidates]))
+        candidates = candidates[order]
+        return candidates, sims[candidates]
+
+    def rank(self, query: np.ndarray, exact: bool = False, nprobe: int = None) -> Optional[Dict[str, Any]]:
+        """
+        识别单条日志向量的故障类型
+
+        Args:
+            query: 查询向量
+            exact: 为True时忽略ANN索引，精确检索全部记录
+            nprobe: 本次检索的簇数量（可选），越大召回率越高、延迟越大
+
+        Returns:
+            包含predicted_fault/confidence/top_matches的结果，没有任何有效相似度时返回None
+        """
+        if self.ann_index is not None and not exact:
+            result = self._rank_approximate(query, nprobe or self.nprobe)
+            if result is not None:
+                return result
+        return self._rank_from_similarities(self.similarities(query))
+
+    def _rank_approximate(self, query: np.ndarray, nprobe: int) -> Optional[Dict[str, Any]]:
+        """在ANN候选集中精确打分，候选不足时返回None由调用方回退到精确检索"""
+        query = self._normalize(np.asarray(query, dtype=np.float32).reshape(1, -1))[0]
+        candidates = self.ann_index.probe(query, nprobe)
+        candidates = candidates[candidates < len(self)]
+        if len(candidates) < self.TOP_RECORDS:
+            return None
+
+        sims = self.matrix[candidates] @ query
+        if not np.any(sims):
+            return None
+
+        positions, scores = self._top_k(sims, self.TOP_RECORDS)
+        return self.build_result(candidates[positions], scores, self.fault_types)
+
+    def rank_batch(self, queries: np.ndarray, exact: bool = False, nprobe: int = None) -> List[Optional[Dict[str, Any]]]:
+        """批量识别多条日志向量的故障类型"""
+        if self.ann_index is not None and not exact:
+            return [self.rank(query, nprobe=nprobe) for query in np.asarray(queries).reshape(-1, self.dim)]
+
+        results = []
+        for sims in self._iter_similarity_chunks(queries):
+            results.extend(self._rank_from_similarities(row) for row in sims)
+        return results
+
+    def _rank_from_similarities(self, sims: np.ndarray) -> Optional[Dict[str, Any]]:
+        if len(sims) == 0 or not np.any(sims):
+            return None
+
+        indices, scores = self._top_k(sims, self.TOP_RECORDS)
+        return self.build_result(indices, scores, self.fault_types)
+
+    @classmethod
+    def build_result(cls, indices: np.ndarray, scores: np.ndarray, fault_types: List[str]) -> Dict[str, Any]:
+        """由按相似度降序排列的候选记录生成识别结果"""
+        # float32累加误差可能使相似度略大于1
+        scores = np.clip(scores, -1.0, 1.0)
+        top_matches = []
+        seen_types = set()
+        for idx, score in zip(indices, scores):
+            if score <= 0:  # 只包含有效相似度的结果
+                break
+            fault_type = fault_types[idx]
+            if fault_type not in seen_types:
+                top_matches.append({
+                    'fault_type': fault_type,
+                    'similarity': float(score)
+                })
+                seen_types.add(fault_type)
+                if len(top_matches) >= cls.TOP_TYPES:  # 只保留前3个不同类型
+                    break
+
+        return {
+            'predicted_fault': fault_types[indices[0]],
+            'confidence': float(scores[0]),
+            'top_matches': top_matches
+        }
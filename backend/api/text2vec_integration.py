@@ -7,12 +7,21 @@ Text2Vec日志分析集成模块
 import os
 import csv
 import re
+import time
 import logging
-from typing import List, Tuple, Optional, Dict, Any
+import threading
+from typing import List, Tuple, Optional, Dict, Any, Iterable, Iterator, Callable, Union, TextIO
+from datetime import datetime
 from pathlib import Path
 import numpy as np
 import pandas as pd
 from django.conf import settings
+from .fault_store import FaultRecord, CsvFaultStore, BinaryFaultStore, FaultLibraryCache
+from .similarity_search import SimilaritySearchIndex
+from .ann_index import AnnIndexManager
+from .embedding_cache import EmbeddingCache
+from .fallback_vectorizer import FallbackVectorizer, stable_hash_vector
+from .text_chunking import split_windows, pool_vectors, window_similarities
 
 
 class LogAnalysisConfig:
@@ -21,6 +30,61 @@ class LogAnalysisConfig:
     # 数据库路径
     DATABASE_PATH = os.path.join(settings.BASE_DIR, 'fault_database', 'fault_records.csv')
     
+    # 故障库存储后端: 'binary'（列式float32矩阵+元数据表）或 'csv'（原始格式）
+    STORAGE_BACKEND = getattr(settings, 'FAULT_STORE_BACKEND', 'binary')
+    
+    # 二进制存储目录（与fault_records.csv同级）
+    VECTOR_STORE_DIR = os.path.join(os.path.dirname(DATABASE_PATH), 'vectors')
+    
+    # 备用TF-IDF向量化器拟合后的词表路径
+    FALLBACK_VECTORIZER_PATH = getattr(settings, 'FALLBACK_VECTORIZER_PATH', None) or \
+        os.path.join(os.path.dirname(DATABASE_PATH), 'fallback_vectorizer.pkl')
+    
+    # 批量导入故障日志的进度文件目录
+    INGEST_STATE_DIR = os.path.join(os.path.dirname(DATABASE_PATH), 'ingest_state')
+    
+    # 批量向量化时SentenceTransformer的编码批大小
+    ENCODE_BATCH_SIZE = getattr(settings, 'LOG_ANALYSIS_ENCODE_BATCH_SIZE', 32)
+    
+    # 批量接口单次请求允许的最大日志数
+    BATCH_MAX_LOGS = getattr(settings, 'LOG_ANALYSIS_BATCH_MAX_LOGS', 1000)
+    
+    # 向量缓存：内存LRU容量与可选的磁盘缓存目录（None表示不使用磁盘层）
+    EMBEDDING_CACHE_SIZE = getattr(settings, 'LOG_ANALYSIS_EMBEDDING_CACHE_SIZE', 1024)
+    EMBEDDING_CACHE_DIR = getattr(settings, 'LOG_ANALYSIS_EMBEDDING_CACHE_DIR', None)
+    
+    # 故障库缓存检查文件修改的最小间隔（秒）
+    CACHE_CHECK_INTERVAL = getattr(settings, 'FAULT_CACHE_CHECK_INTERVAL', 1.0)
+    
+    # ANN近似检索配置：记录数达到ANN_MIN_RECORDS后使用IVF索引，ANN_NPROBE越大召回率越高、延迟越大
+    ANN_ENABLED = getattr(settings, 'FAULT_ANN_ENABLED', True)
+    ANN_INDEX_DIR = os.path.join(os.path.dirname(DATABASE_PATH), 'ann')
+    ANN_MIN_RECORDS = getattr(settings, 'FAULT_ANN_MIN_RECORDS', 20000)
+    ANN_NLIST = getattr(settings, 'FAULT_ANN_NLIST', None)
+    ANN_NPROBE = getattr(settings, 'FAULT_ANN_NPROBE', 8)
+    
+    # 项目内置的SentenceTransformer模型路径
+    DEFAULT_MODEL_PATH = os.path.join(
+        settings.BASE_DIR, 'api', 'hugface-model',
+        'models--sentence-transformers--all-MiniLM-L6-v2',
+        'snapshots', 'c9745ed1d9f207416be6d2e6f8de32d1f16199bf'
+    )
+    
+    # 自定义模型路径（settings中未配置时使用内置模型）
+    MODEL_PATH = getattr(settings, 'LOG_ANALYSIS_MODEL_PATH', None) or DEFAULT_MODEL_PATH
+    
+    # 推理后端：'torch'（SentenceTransformer）或 'onnx'（onnxruntime，需先执行export_onnx_model命令）
+    VECTOR_BACKEND = getattr(settings, 'LOG_ANALYSIS_BACKEND', 'torch')
+    ONNX_DIR = getattr(settings, 'LOG_ANALYSIS_ONNX_DIR', None) or os.path.join(settings.BASE_DIR, 'api', 'onnx-model')
+    ONNX_QUANTIZED = getattr(settings, 'LOG_ANALYSIS_ONNX_QUANTIZED', False)
+    ONNX_THREADS = getattr(settings, 'LOG_ANALYSIS_ONNX_THREADS', None)
+    ONNX_PARITY_TOLERANCE = getattr(settings, 'LOG_ANALYSIS_ONNX_PARITY_TOLERANCE', 0.02)
+    
+    # 长日志分窗编码：窗口token数（SentenceTransformer使用模型的最大长度）、重叠token数、单条日志最多窗口数
+    CHUNK_WINDOW_TOKENS = getattr(settings, 'LOG_ANALYSIS_CHUNK_WINDOW_TOKENS', 254)
+    CHUNK_OVERLAP_TOKENS = getattr(settings, 'LOG_ANALYSIS_CHUNK_OVERLAP_TOKENS', 32)
+    CHUNK_MAX_WINDOWS = getattr(settings, 'LOG_ANALYSIS_CHUNK_MAX_WINDOWS', 1024)
+    
     # 异常检测阈值
     ANOMALY_THRESHOLD = 0.8
     
@@ -38,49 +102,24 @@ class LogProcessor:
     def __init__(self):
         self.logger = logging.getLogger(__name__)
     
-    def clean_log_text(self, text_lines: List[str]) -> Optional[str]:
+    SIB_MARKER = 'systemInformationBlockType'
+    
+    def clean_log_text(self, text_lines: Iterable[str]) -> Optional[str]:
         """
         清洗日志文本（针对9005日志格式）- 保留原始算法
         
         Args:
-            text_lines: 原始日志行列表
+            text_lines: 原始日志行列表（也可以是逐行读取的迭代器）
             
         Returns:
             清洗后的文本字符串，失败返回None
         """
         try:
-            if not text_lines:
-                raise ValueError("输入的日志文本为空")
-            
-            # 第一步：过滤掉包含 'systemInformationBlockType' 的行
-            filtered_lines = []
-            for i in range(len(text_lines) - 1):
-                line1_parts = text_lines[i].split()
-                line2_parts = text_lines[i + 1].split()
-                
-                if line1_parts and line1_parts[-1] != 'systemInformationBlockType':
-                    filtered_lines.append(line1_parts)
-            
-            # 添加最后一行
-            if text_lines:
-                filtered_lines.append(text_lines[-1].split())
-            
-            # 第二步：提取有效内容（从第11个字段开始）
-            processed_text = []
-            for i in range(len(filtered_lines) - 1):
-                line1 = filtered_lines[i]
-                line2 = filtered_lines[i + 1]
-                
-                # 检查最后一个字段是否不同
-                if line1 and line2 and len(line1) > 10 and len(line2) > 10:
-                    if line1[-1] != line2[-1]:
-                        processed_text.extend(line1[10:])
+            state = {'lines': 0}
+            result = ' '.join(self.iter_9005_tokens(text_lines, state))
             
-            # 添加最后一行的内容
-            if filtered_lines and len(filtered_lines[-1]) > 10:
-                processed_text.extend(filtered_lines[-1][10:])
-            
-            result = ' '.join(processed_text)
+            if not state['lines']:
+                raise ValueError("输入的日志文本为空")
             
             if not result.strip():
                 raise ValueError("处理后的文本为空，可能不是有效的9005日志格式")
@@ -92,6 +131,43 @@ class LogProcessor:
             self.logger.error(f"日志清洗失败: {e}")
             return None
     
+    def iter_9005_tokens(self, text_lines: Iterable[str], state: Dict[str, int] = None) -> Iterator[str]:
+        """
+        逐行清洗9005日志，依次产出保留的字段，只缓存前后两行
+        
+        第一步过滤掉最后一个字段为systemInformationBlockType的行（最后一行总是保留），
+        第二步对相邻两行，字段数都超过10且最后一个字段不同时保留前一行从第11个字段开始的内容，
+        最后一行字段数超过10时同样保留。
+        """
+        if state is None:
+            state = {}
+        state['lines'] = 0
+        
+        previous = None
+        for parts in self._iter_filtered_9005_lines(text_lines, state):
+            if previous is not None and previous and parts and len(previous) > 10 and len(parts) > 10:
+                # 检查最后一个字段是否不同
+                if previous[-1] != parts[-1]:
+                    yield from previous[10:]
+            previous = parts
+        
+        # 添加最后一行的内容
+        if previous is not None and len(previous) > 10:
+            yield from previous[10:]
+    
+    def _iter_filtered_9005_lines(self, text_lines: Iterable[str], state: Dict[str, int]) -> Iterator[List[str]]:
+        """过滤掉包含 'systemInformationBlockType' 的行，产出每行的字段列表"""
+        pending = None
+        for line in text_lines:
+            if pending is not None and pending and pending[-1] != self.SIB_MARKER:
+                yield pending
+            pending = line.split()
+            state['lines'] += 1
+        
+        # 添加最后一行
+        if pending is not None:
+            yield pending
+    
     def clean_log_text_simple(self, log_content: str) -> str:
         """
         简单的日志清洗方法（用于非9005格式日志）
@@ -102,82 +178,104 @@ class LogProcessor:
         Returns:
             清洗后的文本
         """
-        try:
-            lines = log_content.strip().split('\n')
-            processed_text = []
+        return self._clean_simple(lambda: iter(log_content.split('\n')), lambda: log_content)
+    
+    def iter_simple_lines(self, lines: Iterable[str]) -> Iterator[str]:
+        """逐行做简单清洗，产出保留的行"""
+        for line in lines:
+            line = line.strip()
+            if not line:
+                continue
             
-            for line in lines:
-                line = line.strip()
-                if not line:
-                    continue
-                
-                # 移除时间戳
-                line = re.sub(LogAnalysisConfig.LOG_PATTERNS['timestamp'], '', line)
-                
-                # 移除日志级别标识
-                line = re.sub(LogAnalysisConfig.LOG_PATTERNS['level'], '', line)
-                
-                # 移除多余空格
-                line = re.sub(r'\s+', ' ', line).strip()
-                
-                if line and len(line) > 3:  # 过滤过短的行
-                    processed_text.append(line)
+            # 移除时间戳
+            line = re.sub(LogAnalysisConfig.LOG_PATTERNS['timestamp'], '', line)
             
-            result = ' '.join(processed_text)
-            return result if result.strip() else log_content
+            # 移除日志级别标识
+            line = re.sub(LogAnalysisConfig.LOG_PATTERNS['level'], '', line)
+            
+            # 移除多余空格
+            line = re.sub(r'\s+', ' ', line).strip()
+            
+            if line and len(line) > 3:  # 过滤过短的行
+                yield line
+    
+    def _clean_simple(self, open_lines: Callable[[], Iterator[str]], read_all: Callable[[], str]) -> str:
+        try:
+            result = ' '.join(self.iter_simple_lines(open_lines()))
+            return result if result.strip() else read_all()
             
         except Exception as e:
             self.logger.error(f"日志清洗失败: {e}")
-            return log_content
+            return read_all()
     
-    def auto_clean_log_text(self, log_content: str) -> str:
+    def auto_clean_log_text(self, log_content: Union[str, TextIO]) -> str:
         """
         自动选择清洗方法
         
         Args:
-            log_content: 原始日志内容
+            log_content: 原始日志内容，或可seek的文本文件对象（上传的大日志逐行读取，不整体读入内存）
             
         Returns:
             清洗后的文本
         """
+        if isinstance(log_content, str):
+            lines = log_content.split('\n')
+            return self._auto_clean(lambda: iter(lines), lambda: log_content)
+        
+        def open_lines():
+            log_content.seek(0)
+            return (line.rstrip('\n') for line in log_content)
+        
+        def read_all():
+            log_content.seek(0)
+            return log_content.read()
+        
+        return self._auto_clean(open_lines, read_all)
+    
+    def _auto_clean(self, open_lines: Callable[[], Iterator[str]], read_all: Callable[[], str]) -> str:
         try:
-            # 将字符串转为行列表
-            text_lines = [line.strip() for line in log_content.split('\n') if line.strip()]
-            
             # 检查是否为9005格式（简单判断：是否包含特定关键词）
-            is_9005_format = any('9005' in line or 'systemInformationBlockType' in line for line in text_lines)
+            is_9005_format = any('9005' in line or self.SIB_MARKER in line for line in open_lines())
             
-            if is_9005_format and len(text_lines) > 0:
-                # 使用原始的9005清洗算法
-                result = self.clean_log_text(text_lines)
+            if is_9005_format:
+                # 使用原始的9005清洗算法（只处理非空行）
+                result = self.clean_log_text(line.strip() for line in open_lines() if line.strip())
                 if result:
                     return result
             
             # 使用简单清洗方法作为备选
-            return self.clean_log_text_simple(log_content)
+            return self._clean_simple(open_lines, read_all)
             
         except Exception as e:
             self.logger.error(f"自动日志清洗失败: {e}")
-            return log_content
+            return read_all()
 
 
 class VectorEngine:
     """向量化引擎，负责文本向量化和相似度计算（保留原始方法）"""
     
-    def __init__(self, model_path: str = None):
+    def __init__(self, model_path: str = None, fallback_path: str = None, backend: str = 'torch'):
         """
         初始化向量化引擎
         
         Args:
             model_path: SentenceTransformer模型路径
+            fallback_path: 备用TF-IDF词表的保存路径（可选）
+            backend: 推理后端，'torch' 或 'onnx'（ONNX模型不可用时回退到torch）
         """
         self.logger = logging.getLogger(__name__)
         self.model = None
         self.model_path = model_path
         self.use_sentence_transformer = False
+        self.backend = 'torch'
+        
+        # 备用向量化器，维度与SentenceTransformer保持一致
+        self.fallback = FallbackVectorizer(fallback_path, n_features=384)
         
         # 尝试加载SentenceTransformer模型
-        if model_path and os.path.exists(model_path):
+        if backend == 'onnx' and self._load_onnx_model(model_path):
+            pass
+        elif model_path and os.path.exists(model_path):
             self._load_sentence_transformer(model_path)
         else:
             self.logger.info("未找到SentenceTransformer模型，使用备用向量化方法")
@@ -197,6 +295,83 @@ class VectorEngine:
         except Exception as e:
             self.logger.error(f"SentenceTransformer模型加载失败: {e}")
     
+    def _load_onnx_model(self, model_path: str) -> bool:
+        """
+        加载导出的ONNX模型，只接受与model_path对应、一致性校验通过且在ONNX_PARITY_TOLERANCE之内的模型
+        
+        Returns:
+            是否加载成功
+        """
+        try:
+            from .onnx_encoder import OnnxSentenceEncoder
+            
+            encoder = OnnxSentenceEncoder(
+                LogAnalysisConfig.ONNX_DIR,
+                quantized=LogAnalysisConfig.ONNX_QUANTIZED,
+                num_threads=LogAnalysisConfig.ONNX_THREADS
+            )
+            source = encoder.manifest.get('source_model')
+            if model_path and source and os.path.abspath(model_path) != source:
+                raise ValueError(f"ONNX模型导出自 {source}，与当前模型 {model_path} 不一致")
+            
+            parity = encoder.parity_report()
+            if not parity or not parity.get('passed'):
+                raise ValueError("ONNX模型未通过与PyTorch输出的一致性校验，请执行 manage.py export_onnx_model")
+            # 导出时可以用更宽的--tolerance校验，运行时按当前配置的容差重新判断
+            tolerance = LogAnalysisConfig.ONNX_PARITY_TOLERANCE
+            if 1.0 - parity.get('min_cosine', 0.0) > tolerance:
+                raise ValueError(f"ONNX模型最小余弦相似度 {parity.get('min_cosine', 0.0):.4f} "
+                                 f"超出允许的容差 {tolerance}，请重新执行 manage.py export_onnx_model")
+            
+            self.model = encoder
+            self.use_sentence_transformer = True
+            self.backend = 'onnx'
+            self.logger.info(f"ONNX模型加载成功: {encoder.revision}，最小余弦相似度 {parity['min_cosine']:.4f}")
+            return True
+            
+        except ImportError:
+            self.logger.warning("onnxruntime或tokenizers库未安装，使用SentenceTransformer")
+        except Exception as e:
+            self.logger.error(f"ONNX模型加载失败，使用SentenceTransformer: {e}")
+        return False
+    
+    def get_vector_dimension(self) -> Optional[int]:
+        """获取模型输出的向量维度，无法直接获取时返回None"""
+        if self.use_sentence_transformer and self.model is not None:
+            try:
+                return self.model.get_sentence_embedding_dimension()
+            except Exception:
+                return None
+        return self.fallback.n_features
+    
+    def max_window_tokens(self) -> int:
+        """单次编码能覆盖的token数（扣除[CLS]/[SEP]），超出部分会被模型截断"""
+        if self.use_sentence_transformer and self.model is not None:
+            max_length = getattr(self.model, 'max_seq_length', None) or 256
+            return max(1, max_length - 2)
+        return LogAnalysisConfig.CHUNK_WINDOW_TOKENS
+    
+    def token_offsets(self, text: str) -> Optional[List[Tuple[int, int]]]:
+        """
+        用模型的分词器分词（不截断），返回每个token的字符区间
+        
+        Returns:
+            字符区间列表，没有可用的分词器时返回None（调用方按空白分词）
+        """
+        if not (self.use_sentence_transformer and self.model is not None):
+            return None
+        try:
+            if hasattr(self.model, 'token_offsets'):
+                return self.model.token_offsets(text)
+            tokenizer = getattr(self.model, 'tokenizer', None)
+            if tokenizer is not None and getattr(tokenizer, 'is_fast', False):
+                encoded = tokenizer(text, add_special_tokens=False, truncation=False,
+                                    return_offsets_mapping=True, verbose=False)
+                return encoded['offset_mapping']
+        except Exception as e:
+            self.logger.warning(f"分词失败，按空白分窗: {e}")
+        return None
+    
     def text_to_vector(self, text: str) -> Optional[np.ndarray]:
         """
         将文本转换为向量（优先使用SentenceTransformer）
@@ -224,44 +399,52 @@ class VectorEngine:
             self.logger.error(f"文本向量化失败: {e}")
             return None
     
-    def _fallback_vectorization(self, text: str) -> np.ndarray:
-        """备用向量化方法"""
-        try:
-            from sklearn.feature_extraction.text import TfidfVectorizer
-            
-            # 使用字符级别的TF-IDF
-            vectorizer = TfidfVectorizer(
-                analyzer='char_wb', 
-                ngram_range=(2, 4), 
-                max_features=384  # 与SentenceTransformer维度保持一致
-            )
-            
-            # 训练并转换文本
-            vector = vectorizer.fit_transform([text]).toarray()[0]
-            self.logger.debug(f"TF-IDF向量化完成，维度: {vector.shape}")
-            return vector
-            
-        except ImportError:
-            # 如果sklearn不可用，使用简单的哈希方法
-            self.logger.warning("sklearn不可用，使用简单哈希向量化")
-            return self._simple_hash_vector(text, 384)
-    
-    def _simple_hash_vector(self, text: str, vector_size: int = 384) -> np.ndarray:
-        """简单的哈希向量化方法"""
-        words = text.lower().split()
-        vector = np.zeros(vector_size)
+    def texts_to_vectors(self, texts: List[str], batch_size: int = 32) -> List[Optional[np.ndarray]]:
+        """
+        批量将文本转换为向量（SentenceTransformer在一次encode调用中按batch_size分批编码）
         
-        for word in words:
-            hash_val = hash(word) % vector_size
-            vector[hash_val] += 1
+        Args:
+            texts: 输入文本列表
+            batch_size: 编码批大小
+            
+        Returns:
+            与输入顺序一致的向量列表，空文本或失败时对应位置为None
+        """
+        vectors: List[Optional[np.ndarray]] = [None] * len(texts)
+        valid = [i for i, text in enumerate(texts) if text and text.strip()]
+        if not valid:
+            return vectors
         
-        # 归一化
-        norm = np.linalg.norm(vector)
-        if norm > 0:
-            vector = vector / norm
+        if self.use_sentence_transformer and self.model is not None:
+            try:
+                encoded = self.model.encode(
+                    [texts[i] for i in valid], batch_size=batch_size, convert_to_numpy=True
+                )
+                for i, vector in zip(valid, encoded):
+                    vectors[i] = vector
+                self.logger.debug(f"SentenceTransformer批量向量化完成，数量: {len(valid)}")
+            except Exception as e:
+                self.logger.error(f"批量向量化失败: {e}")
+            return vectors
         
+        try:
+            encoded = self.fallback.transform([texts[i] for i in valid])
+            for i, vector in zip(valid, encoded):
+                vectors[i] = vector
+        except Exception as e:
+            self.logger.error(f"批量向量化失败: {e}")
+        return vectors
+    
+    def _fallback_vectorization(self, text: str) -> np.ndarray:
+        """备用向量化方法（拟合一次的TF-IDF词表或无状态哈希编码，维度固定）"""
+        vector = self.fallback.transform([text])[0]
+        self.logger.debug(f"{self.fallback.method_name}向量化完成，维度: {vector.shape}")
         return vector
     
+    def _simple_hash_vector(self, text: str, vector_size: int = 384) -> np.ndarray:
+        """简单的哈希向量化方法"""
+        return stable_hash_vector(text, vector_size)
+    
     def calculate_similarity(self, vector1: np.ndarray, vector2: np.ndarray) -> float:
         """
         计算两个向量的余弦相似度（原始方法）
@@ -297,10 +480,11 @@ class SimpleVectorEngine:
     
     def __init__(self):
         self.logger = logging.getLogger(__name__)
+        self.vectorizer = FallbackVectorizer(n_features=100)
     
     def text_to_vector(self, text: str) -> np.ndarray:
         """
-        将文本转换为向量（使用简单的TF-IDF方法）
+        将文本转换为向量（使用无状态的字符n-gram哈希TF-IDF方法）
         
         Args:
             text: 输入文本
@@ -308,39 +492,20 @@ class SimpleVectorEngine:
         Returns:
             文本向量
         """
-        try:
-            from sklearn.feature_extraction.text import TfidfVectorizer
-            
-            # 使用字符级别的TF-IDF
-            vectorizer = TfidfVectorizer(
-                analyzer='char_wb', 
-                ngram_range=(2, 4), 
-                max_features=100
-            )
-            
-            # 训练并转换文本
-            vector = vectorizer.fit_transform([text]).toarray()[0]
-            return vector
-            
-        except ImportError:
-            # 如果sklearn不可用，使用简单的哈希方法
-            return self._simple_hash_vector(text)
+        return self.vectorizer.transform([text])[0]
+    
+    def texts_to_vectors(self, texts: List[str], batch_size: int = 32) -> List[Optional[np.ndarray]]:
+        """批量将文本转换为向量"""
+        vectors: List[Optional[np.ndarray]] = [None] * len(texts)
+        valid = [i for i, text in enumerate(texts) if text and text.strip()]
+        if valid:
+            for i, vector in zip(valid, self.vectorizer.transform([texts[i] for i in valid])):
+                vectors[i] = vector
+        return vectors
     
     def _simple_hash_vector(self, text: str, vector_size: int = 100) -> np.ndarray:
         """简单的哈希向量化方法"""
-        words = text.lower().split()
-        vector = np.zeros(vector_size)
-        
-        for word in words:
-            hash_val = hash(word) % vector_size
-            vector[hash_val] += 1
-        
-        # 归一化
-        norm = np.linalg.norm(vector)
-        if norm > 0:
-            vector = vector / norm
-        
-        return vector
+        return stable_hash_vector(text, vector_size)
     
     def calculate_similarity(self, vector1: np.ndarray, vector2: np.ndarray) -> float:
         """计算两个向量的余弦相似度"""
@@ -362,41 +527,81 @@ class SimpleVectorEngine:
 class FaultDatabase:
     """故障数据库管理器"""
     
+    # 进程内共享的写锁，多个线程共用同一个引擎时保证追加写入互斥
+    _write_lock = threading.Lock()
+    
+    # 进程级故障库缓存，按存储后端和路径共享
+    _caches: Dict[Tuple[str, str], FaultLibraryCache] = {}
+    
+    # 进程级ANN索引管理器，按索引目录共享
+    _ann_managers: Dict[str, AnnIndexManager] = {}
+    
     def __init__(self):
         self.logger = logging.getLogger(__name__)
         self.database_path = LogAnalysisConfig.DATABASE_PATH
-        self._ensure_database_exists()
+        self.backend = LogAnalysisConfig.STORAGE_BACKEND
+        self.store = self._create_store()
+        self.cache = self._get_cache()
+        self.ann = self._get_ann() if LogAnalysisConfig.ANN_ENABLED else None
     
-    def _ensure_database_exists(self):
-        """确保数据库目录和文件存在"""
-        os.makedirs(os.path.dirname(self.database_path), exist_ok=True)
+    def _create_store(self):
+        """根据配置创建存储后端"""
+        if self.backend == 'csv':
+            return CsvFaultStore(self.database_path)
+        
+        if self.backend != 'binary':
+            raise ValueError(f"未知的故障库存储后端: {self.backend}")
         
-        if not os.path.exists(self.database_path):
-            # 创建空的CSV文件
-            with open(self.database_path, 'w', newline='', encoding='utf-8') as f:
-                writer = csv.writer(f)
-                writer.writerow(['vector', 'fault_type', 'timestamp', 'log_sample', 'vector_dim', 'vector_method'])
+        store = BinaryFaultStore(LogAnalysisConfig.VECTOR_STORE_DIR)
+        if not store.exists():
+            # 首次使用二进制存储时，从已有的CSV故障库导入（跨进程加锁，导入完成后才整体替换到位）
+            source = CsvFaultStore(self.database_path) if os.path.exists(self.database_path) else None
+            count = store.initialize(source)
+            if count:
+                self.logger.info(f"已从CSV故障库导入 {count} 条记录到二进制存储")
+        return store
+    
+    def _get_ann(self) -> AnnIndexManager:
+        """获取本进程共享的ANN索引管理器"""
+        key = LogAnalysisConfig.ANN_INDEX_DIR
+        with self._write_lock:
+            if key not in self._ann_managers:
+                self._ann_managers[key] = AnnIndexManager(
+                    key,
+                    min_records=LogAnalysisConfig.ANN_MIN_RECORDS,
+                    nlist=LogAnalysisConfig.ANN_NLIST,
+                    nprobe=LogAnalysisConfig.ANN_NPROBE
+                )
+            return self._ann_managers[key]
+    
+    def _get_cache(self) -> FaultLibraryCache:
+        """获取本进程共享的故障库缓存"""
+        key = (self.backend, self.database_path)
+        with self._write_lock:
+            if key not in self._caches:
+                self._caches[key] = FaultLibraryCache(self.store, LogAnalysisConfig.CACHE_CHECK_INTERVAL)
+            return self._caches[key]
     
     def add_fault_record(self, vector: np.ndarray, fault_type: str, 
                         log_content: str, timestamp: str = None, vector_method: str = None) -> bool:
         """添加故障记录"""
         try:
             if timestamp is None:
-                from datetime import datetime
                 timestamp = datetime.now().isoformat()
             
             if vector_method is None:
                 vector_method = "unknown"
             
-            # 将向量转换为字符串
-            vector_str = ','.join(map(str, vector))
-            
             # 截取日志样本
             log_sample = log_content[:200] + '...' if len(log_content) > 200 else log_content
             
-            with open(self.database_path, 'a', newline='', encoding='utf-8') as f:
-                writer = csv.writer(f)
-                writer.writerow([vector_str, fault_type, timestamp, log_sample, len(vector), vector_method])
+            record = FaultRecord(np.asarray(vector), fault_type, timestamp, log_sample, vector_method)
+            with self._write_lock:
+                _, offsets = self.cache.append_with_offsets([record])
+            
+            # 增量更新ANN索引（按写入前的记录数定位，已被并发检索补齐时跳过）
+            if self.ann is not None:
+                self.ann.add(vector_method, record.vector, offsets[(vector_method, len(record.vector))])
             
             self.logger.info(f"故障记录添加成功: {fault_type}, 维度: {len(vector)}, 方法: {vector_method}")
             return True
@@ -405,96 +610,105 @@ class FaultDatabase:
             self.logger.error(f"添加故障记录失败: {e}")
             return False
     
+    def add_fault_records(self, entries: List[Tuple[np.ndarray, str, str]], vector_method: str = None) -> int:
+        """
+        批量添加故障记录，一次写入存储
+        
+        Args:
+            entries: (向量, 故障类型, 日志内容) 列表
+            vector_method: 向量化方法
+            
+        Returns:
+            写入的记录数
+        """
+        if not entries:
+            return 0
+        
+        timestamp = datetime.now().isoformat()
+        vector_method = vector_method or "unknown"
+        records = [
+            FaultRecord(
+                np.asarray(vector), fault_type, timestamp,
+                log_content[:200] + '...' if len(log_content) > 200 else log_content,
+                vector_method
+            )
+            for vector, fault_type, log_content in entries
+        ]
+        
+        with self._write_lock:
+            count, offsets = self.cache.append_with_offsets(records)
+        
+        # 增量更新ANN索引（按写入前的记录数定位，已被并发检索补齐时跳过）
+        if self.ann is not None:
+            by_dim: Dict[int, List[np.ndarray]] = {}
+            for record in records:
+                by_dim.setdefault(len(record.vector), []).append(record.vector)
+            for dim, vectors in by_dim.items():
+                self.ann.add(vector_method, np.vstack(vectors), offsets[(vector_method, dim)])
+        
+        self.logger.info(f"批量添加故障记录成功: {count} 条, 方法: {vector_method}")
+        return count
+    
     def load_fault_records(self, target_dim: int = None, vector_method: str = None) -> Tuple[List[np.ndarray], List[str]]:
         """加载所有故障记录，支持维度过滤"""
-        vectors = []
-        fault_types = []
-        
         try:
-            if not os.path.exists(self.database_path):
-                return vectors, fault_types
-            
-            with open(self.database_path, 'r', encoding='utf-8') as f:
-                reader = csv.reader(f)
-                header = next(reader, None)  # 读取标题行
-                
-                for row in reader:
-                    if len(row) >= 2:
-                        try:
-                            # 解析向量
-                            vector_str = row[0]
-                            vector = np.array([float(x) for x in vector_str.split(',')])
-                            fault_type = row[1]
-                            
-                            # 检查维度匹配
-                            if target_dim is not None and len(vector) != target_dim:
-                                self.logger.debug(f"跳过维度不匹配的记录: {len(vector)} != {target_dim}")
-                                continue
-                            
-                            # 检查向量化方法匹配（如果有的话）
-                            if len(row) >= 6 and vector_method is not None:
-                                record_method = row[5]
-                                if record_method != vector_method:
-                                    self.logger.debug(f"跳过方法不匹配的记录: {record_method} != {vector_method}")
-                                    continue
-                            
-                            vectors.append(vector)
-                            fault_types.append(fault_type)
-                            
-                        except (ValueError, IndexError) as e:
-                            self.logger.warning(f"跳过无效记录: {e}")
-                            continue
-            
+            vectors, fault_types = self.store.load_records(target_dim, vector_method)
             self.logger.info(f"成功加载 {len(vectors)} 条故障记录 (目标维度: {target_dim})")
             return vectors, fault_types
             
         except Exception as e:
             self.logger.error(f"加载故障记录失败: {e}")
-            return vectors, fault_types
+            return [], []
+    
+    def load_fault_matrix(self, target_dim: int, vector_method: str = None) -> Tuple[np.ndarray, List[str]]:
+        """加载指定维度的故障记录，向量以(n, dim)矩阵返回"""
+        try:
+            matrix, fault_types = self.cache.load_matrix(target_dim, vector_method)
+            self.logger.debug(f"成功加载 {len(fault_types)} 条故障记录 (目标维度: {target_dim})")
+            return matrix, fault_types
+            
+        except Exception as e:
+            self.logger.error(f"加载故障记录失败: {e}")
+            return np.empty((0, target_dim), dtype=np.float32), []
+    
+    def get_search_index(self, target_dim: int, vector_method: str = None) -> Optional[SimilaritySearchIndex]:
+        """获取缓存的相似度检索索引，没有匹配维度的记录时返回None"""
+        def build():
+            matrix, fault_types = self.load_fault_matrix(target_dim, vector_method)
+            return SimilaritySearchIndex(matrix, fault_types) if len(fault_types) else None
+        
+        return self.cache.get_derived(('search', target_dim, vector_method), build)
+    
+    def get_ann_index(self, vector_method: str, normalized_matrix: np.ndarray):
+        """获取与故障库同步的ANN索引，未启用或记录数不足时返回None"""
+        if self.ann is None:
+            return None
+        return self.ann.get_index(vector_method, normalized_matrix)
+    
+    def count_records(self) -> int:
+        """获取故障记录总数"""
+        return self.get_database_info()['total_records']
     
     def get_database_info(self) -> Dict[str, Any]:
         """获取数据库统计信息"""
         try:
-            from collections import Counter
-            
-            if not os.path.exists(self.database_path):
-                return {'total_records': 0, 'fault_types': [], 'dimensions': {}}
-            
-            fault_type_counts = Counter()
-            dimension_counts = Counter()
-            total_records = 0
-            
-            with open(self.database_path, 'r', encoding='utf-8') as f:
-                reader = csv.reader(f)
-                header = next(reader, None)  # 跳过标题行
-                
-                for row in reader:
-                    if len(row) >= 2:
-                        fault_type_counts[row[1]] += 1
-                        total_records += 1
-                        
-                        # 统计维度信息
-                        if len(row) >= 5:
-                            try:
-                                dim = int(row[4])
-                                dimension_counts[dim] += 1
-                            except (ValueError, IndexError):
-                                pass
+            stats = self.cache.get_stats()
             
             fault_types = [
                 {'name': fault_type, 'count': count}
-                for fault_type, count in fault_type_counts.items()
+                for fault_type, count in stats['fault_type_counts'].items()
             ]
             
             dimensions = [
                 {'dim': dim, 'count': count}
-                for dim, count in dimension_counts.items()
+                for dim, count in stats['dimension_counts'].items()
             ]
             
             return {
-                'total_records': total_records,
+                'total_records': stats['total_records'],
                 'fault_types': fault_types,
-                'dimensions': dimensions
+                'dimensions': dimensions,
+                'storage_backend': self.backend
             }
             
         except Exception as e:
@@ -515,24 +729,23 @@ class LogAnalysisEngine:
         self.logger = logging.getLogger(__name__)
         self.log_processor = LogProcessor()
         
+        # 未指定时使用配置的SentenceTransformer模型路径
+        if model_path is None:
+            model_path = LogAnalysisConfig.MODEL_PATH
+        self.model_path = model_path
+        
         # 尝试使用高级向量化引擎，失败则使用简单版本
         try:
-            # 检查是否有SentenceTransformer模型路径配置
-            if model_path is None:
-                # 使用项目中的SentenceTransformer模型路径
-                project_model_path = os.path.join(
-                    settings.BASE_DIR, 'api', 'hugface-model', 
-                    'models--sentence-transformers--all-MiniLM-L6-v2', 
-                    'snapshots', 'c9745ed1d9f207416be6d2e6f8de32d1f16199bf'
-                )
-                if os.path.exists(project_model_path):
-                    model_path = project_model_path
-                    self.logger.info(f"找到项目中的SentenceTransformer模型: {model_path}")
-                else:
-                    self.logger.warning(f"SentenceTransformer模型未找到: {project_model_path}")
+            if os.path.exists(model_path):
+                self.logger.info(f"找到SentenceTransformer模型: {model_path}")
+            else:
+                self.logger.warning(f"SentenceTransformer模型未找到: {model_path}")
             
-            self.vector_engine = VectorEngine(model_path)
-            self.logger.info(f"使用高级向量化引擎，SentenceTransformer: {self.vector_engine.use_sentence_transformer}")
+            self.vector_engine = VectorEngine(
+                model_path, LogAnalysisConfig.FALLBACK_VECTORIZER_PATH, backend=LogAnalysisConfig.VECTOR_BACKEND
+            )
+            self.logger.info(f"使用高级向量化引擎，SentenceTransformer: {self.vector_engine.use_sentence_transformer}，"
+                             f"后端: {self.vector_engine.backend}")
         except Exception as e:
             self.vector_engine = SimpleVectorEngine()
             self.logger.warning(f"使用简单向量化引擎: {e}")
@@ -542,6 +755,13 @@ class LogAnalysisEngine:
         # 记录当前向量化方法信息
         self.vector_method = self._get_vector_method()
         self.vector_dim = self._get_vector_dimension()
+        self.model_revision = self._get_model_revision()
+        
+        # 按清洗后文本内容缓存向量
+        self.embedding_cache = EmbeddingCache(
+            max_entries=LogAnalysisConfig.EMBEDDING_CACHE_SIZE,
+            disk_dir=LogAnalysisConfig.EMBEDDING_CACHE_DIR
+        )
     
     def _get_vector_method(self) -> str:
         """获取当前使用的向量化方法"""
@@ -550,17 +770,88 @@ class LogAnalysisEngine:
         elif isinstance(self.vector_engine, SimpleVectorEngine):
             return "simple_tfidf"
         else:
-            return "advanced_tfidf"
+            return self.vector_engine.fallback.method_name
     
     def _get_vector_dimension(self) -> int:
         """获取向量维度"""
-        # 测试向量化以确定维度
+        if hasattr(self.vector_engine, 'get_vector_dimension'):
+            dim = self.vector_engine.get_vector_dimension()
+            if dim:
+                return dim
+        
+        # 无法直接获取时，测试向量化以确定维度
         test_vector = self.vector_engine.text_to_vector("test")
         return len(test_vector) if test_vector is not None else 100
     
+    def _get_model_revision(self) -> str:
+        """模型版本标识（模型快照目录名），作为向量缓存键的一部分"""
+        if self.vector_method == "sentence_transformer" and getattr(self.vector_engine, 'backend', None) == 'onnx':
+            # ONNX输出与PyTorch只在容差内一致，缓存中的向量按后端区分
+            return self.vector_engine.model.revision
+        if self.vector_method == "sentence_transformer" and self.model_path:
+            return os.path.basename(os.path.normpath(self.model_path))
+        return ''
+    
+    def encode_text(self, text: str) -> Optional[np.ndarray]:
+        """将清洗后的文本转换为向量（优先读取向量缓存）"""
+        return self.encode_texts([text])[0]
+    
+    def encode_texts(self, texts: List[str], batch_size: int = None) -> List[Optional[np.ndarray]]:
+        """
+        批量将清洗后的文本转换为向量，只对未命中缓存的文本调用向量化引擎
+        
+        Args:
+            texts: 清洗后的文本列表
+            batch_size: 编码批大小（可选，默认LogAnalysisConfig.ENCODE_BATCH_SIZE）
+            
+        Returns:
+            与输入顺序一致的向量列表，失败时对应位置为None
+        """
+        vectors: List[Optional[np.ndarray]] = [None] * len(texts)
+        keys = [EmbeddingCache.make_key(text or '', self.vector_method, self.model_revision) for text in texts]
+        
+        # 同一批次中的重复文本只查询和编码一次
+        positions: Dict[str, List[int]] = {}
+        for i, key in enumerate(keys):
+            positions.setdefault(key, []).append(i)
+        
+        missing: Dict[str, List[int]] = {}
+        for key, indices in positions.items():
+            vector = self.embedding_cache.get(key)
+            if vector is None:
+                missing[key] = indices
+            else:
+                for i in indices:
+                    vectors[i] = vector
+        
+        if missing:
+            unique_keys = list(missing)
+            encoded = self.vector_engine.texts_to_vectors(
+                [texts[missing[key][0]] for key in unique_keys],
+                batch_size or LogAnalysisConfig.ENCODE_BATCH_SIZE
+            )
+            for key, vector in zip(unique_keys, encoded):
+                if vector is None:
+                    continue
+                self.embedding_cache.put(key, vector)
+                for i in missing[key]:
+                    vectors[i] = vector
+        
+        return vectors
+    
     def detect_anomaly(self, normal_log: str, test_log: str, 
-                      threshold: float = None) -> Dict[str, Any]:
-        """异常检测"""
+                      threshold: float = None, chunked: bool = False,
+                      pooling: str = 'mean') -> Dict[str, Any]:
+        """
+        异常检测
+        
+        Args:
+            normal_log: 正常日志（字符串或可seek的文本文件对象）
+            test_log: 待检测日志（字符串或可seek的文本文件对象）
+            threshold: 相似度阈值（可选）
+            chunked: 是否分窗编码，长日志超出模型最大长度的部分也参与比较，并按窗口定位异常
+            pooling: 分窗时窗口向量的池化方式，'mean' 或 'max'
+        """
         if threshold is None:
             threshold = LogAnalysisConfig.ANOMALY_THRESHOLD
         
@@ -569,9 +860,11 @@ class LogAnalysisEngine:
             normal_text = self.log_processor.auto_clean_log_text(normal_log)
             test_text = self.log_processor.auto_clean_log_text(test_log)
             
+            if chunked:
+                return self._detect_anomaly_chunked(normal_text, test_text, threshold, pooling)
+            
             # 向量化
-            normal_vector = self.vector_engine.text_to_vector(normal_text)
-            test_vector = self.vector_engine.text_to_vector(test_text)
+            normal_vector, test_vector = self.encode_texts([normal_text, test_text])
             
             if normal_vector is None or test_vector is None:
                 raise ValueError("向量化失败")
@@ -602,91 +895,200 @@ class LogAnalysisEngine:
             self.logger.error(f"异常检测失败: {e}")
             raise
     
-    def identify_fault_type(self, log_content: str) -> Dict[str, Any]:
-        """故障类型识别"""
+    def split_text_windows(self, text: str) -> List[Tuple[int, int]]:
+        """按模型的token长度把清洗后的文本切分为有重叠的窗口（字符区间）"""
+        offsets_fn = getattr(self.vector_engine, 'token_offsets', None)
+        window_fn = getattr(self.vector_engine, 'max_window_tokens', None)
+        window = window_fn() if window_fn else LogAnalysisConfig.CHUNK_WINDOW_TOKENS
+        return split_windows(
+            text, window,
+            overlap=LogAnalysisConfig.CHUNK_OVERLAP_TOKENS,
+            token_offsets=offsets_fn(text) if offsets_fn else None
+        )
+    
+    def _detect_anomaly_chunked(self, normal_text: str, test_text: str,
+                                threshold: float, pooling: str) -> Dict[str, Any]:
+        """分窗异常检测：全部窗口一次批量编码，池化后比较整体相似度，并给出每个测试窗口的相似度"""
+        if pooling not in ('mean', 'max'):
+            raise ValueError(f"不支持的池化方式: {pooling}")
+        
+        max_windows = LogAnalysisConfig.CHUNK_MAX_WINDOWS
+        normal_spans = self.split_text_windows(normal_text)
+        test_spans = self.split_text_windows(test_text)
+        truncated = len(normal_spans) > max_windows or len(test_spans) > max_windows
+        normal_spans, test_spans = normal_spans[:max_windows], test_spans[:max_windows]
+        if not normal_spans or not test_spans:
+            raise ValueError("向量化失败")
+        
+        windows = [normal_text[a:b] for a, b in normal_spans] + [test_text[a:b] for a, b in test_spans]
+        vectors = self.encode_texts(windows)
+        if any(vector is None for vector in vectors):
+            raise ValueError("向量化失败")
+        
+        normal_vectors = np.vstack(vectors[:len(normal_spans)])
+        test_vectors = np.vstack(vectors[len(normal_spans):])
+        similarity = self.vector_engine.calculate_similarity(
+            pool_vectors(normal_vectors, pooling), pool_vectors(test_vectors, pooling)
+        )
+        scores, best = window_similarities(test_vectors, normal_vectors)
+        
+        window_results = []
+        for i, ((start, end), score, match) in enumerate(zip(test_spans, scores, best)):
+            window_results.append({
+                'index': i,
+                'start': start,
+                'end': end,
+                'similarity': float(score),
+                'best_match': int(match),
+                'is_anomaly': bool(score < threshold),
+                'preview': test_text[start:end][:100]
+            })
+        anomalous = [w['index'] for w in window_results if w['is_anomaly']]
+        
+        is_anomaly = similarity < threshold or bool(anomalous)
+        description = f"日志相似度为 {similarity:.4f}（{len(test_spans)} 个窗口，{pooling}池化），"
+        if similarity < threshold:
+            description += f"低于阈值 {threshold}，检测到异常。"
+        elif anomalous:
+            description += f"高于阈值 {threshold}，但有 {len(anomalous)} 个窗口低于阈值，检测到局部异常。"
+        else:
+            description += f"高于阈值 {threshold}，日志正常。"
+        
+        return {
+            'similarity': similarity,
+            'threshold': threshold,
+            'is_anomaly': is_anomaly,
+            'description': description,
+            'chunked': True,
+            'pooling': pooling,
+            'window_count': {'normal': len(normal_spans), 'test': len(test_spans)},
+            'windows_truncated': truncated,
+            'min_window_similarity': float(scores.min()),
+            'anomalous_windows': anomalous,
+            'windows': window_results
+        }
+    
+    def _prepare_search_index(self, dim: int, exact: bool = False) -> Tuple[Optional[SimilaritySearchIndex], Optional[Dict[str, Any]]]:
+        """
+        获取匹配维度的故障库检索索引（进程内缓存）
+        
+        Returns:
+            (检索索引, None)；故障库中没有可比较的记录时返回(None, 提示结果)
+        """
+        search_index = self.fault_db.get_search_index(
+            target_dim=dim,
+            vector_method=self.vector_method
+        )
+        
+        if search_index is None:
+            # 如果没有匹配维度的记录，检查故障库是否为空
+            total_records = self.fault_db.count_records()
+            
+            if not total_records:
+                return None, {
+                    'predicted_fault': '故障库为空',
+                    'confidence': 0.0,
+                    'top_matches': [],
+                    'warning': '故障库中没有记录，请先添加故障样本'
+                }
+            
+            # 尝试重新向量化已有记录以匹配当前维度
+            self.logger.warning(f"故障库中没有匹配维度({dim})的记录，总记录数: {total_records}")
+            return None, {
+                'predicted_fault': '维度不匹配',
+                'confidence': 0.0,
+                'top_matches': [],
+                'warning': f'故障库中的向量维度与当前不匹配。请清空故障库后重新添加记录，或确保使用相同的向量化方法。'
+            }
+        
+        # 故障库较大时挂载ANN索引，只对候选记录打分
+        if not exact:
+            ann_index = self.fault_db.get_ann_index(self.vector_method, search_index.matrix)
+            if ann_index is not None:
+                search_index.attach_ann(ann_index, LogAnalysisConfig.ANN_NPROBE)
+        
+        return search_index, None
+    
+    @staticmethod
+    def _no_match_result() -> Dict[str, Any]:
+        return {
+            'predicted_fault': '无匹配记录',
+            'confidence': 0.0,
+            'top_matches': [],
+            'warning': '没有找到维度匹配的故障记录'
+        }
+    
+    def identify_fault_type(self, log_content: str, exact: bool = False, nprobe: int = None) -> Dict[str, Any]:
+        """
+        故障类型识别
+        
+        Args:
+            log_content: 日志内容（字符串或可seek的文本文件对象）
+            exact: 为True时不使用ANN索引，精确检索全部故障记录
+            nprobe: ANN检索的簇数量（可选，默认LogAnalysisConfig.ANN_NPROBE）
+        """
         try:
             # 预处理日志 - 使用自动清洗方法
             test_text = self.log_processor.auto_clean_log_text(log_content)
-            test_vector = self.vector_engine.text_to_vector(test_text)
+            test_vector = self.encode_text(test_text)
             
             if test_vector is None:
                 raise ValueError("向量化失败")
             
-            # 加载匹配维度的故障记录
-            fault_vectors, fault_types = self.fault_db.load_fault_records(
-                target_dim=len(test_vector),
-                vector_method=self.vector_method
-            )
+            search_index, empty_result = self._prepare_search_index(len(test_vector), exact)
+            if search_index is None:
+                return empty_result
             
-            if not fault_vectors:
-                # 如果没有匹配维度的记录，尝试加载所有记录并进行维度转换
-                all_vectors, all_types = self.fault_db.load_fault_records()
-                
-                if not all_vectors:
-                    return {
-                        'predicted_fault': '故障库为空',
-                        'confidence': 0.0,
-                        'top_matches': [],
-                        'warning': '故障库中没有记录，请先添加故障样本'
-                    }
-                
-                # 尝试重新向量化已有记录以匹配当前维度
-                self.logger.warning(f"故障库中没有匹配维度({len(test_vector)})的记录，总记录数: {len(all_vectors)}")
-                return {
-                    'predicted_fault': '维度不匹配',
-                    'confidence': 0.0,
-                    'top_matches': [],
-                    'warning': f'故障库中的向量维度与当前不匹配。请清空故障库后重新添加记录，或确保使用相同的向量化方法。'
-                }
+            result = search_index.rank(test_vector, exact=exact, nprobe=nprobe)
+            return result if result is not None else self._no_match_result()
             
-            # 计算与每个故障记录的相似度
-            similarities = []
-            for fault_vector in fault_vectors:
-                if len(fault_vector) == len(test_vector):
-                    similarity = self.vector_engine.calculate_similarity(test_vector, fault_vector)
-                    similarities.append(similarity)
-                else:
-                    # 跳过维度不匹配的向量
-                    similarities.append(0.0)
+        except Exception as e:
+            self.logger.error(f"故障类型识别失败: {e}")
+            raise
+    
+    def identify_fault_types(self, log_contents: List[str], batch_size: int = None,
+                             exact: bool = False, nprobe: int = None) -> List[Dict[str, Any]]:
+        """
+        批量故障类型识别：一次批量编码全部日志，并在一次矩阵运算中与故障库比较
+        
+        Args:
+            log_contents: 日志内容列表
+            batch_size: SentenceTransformer编码批大小（可选，默认LogAnalysisConfig.ENCODE_BATCH_SIZE）
+            exact: 为True时不使用ANN索引
+            nprobe: ANN检索的簇数量（可选）
             
-            if not any(similarities):
-                return {
-                    'predicted_fault': '无匹配记录',
-                    'confidence': 0.0,
-                    'top_matches': [],
-                    'warning': '没有找到维度匹配的故障记录'
-                }
+        Returns:
+            与输入顺序一致的识别结果列表，向量化失败的日志返回包含error的结果
+        """
+        try:
+            texts = [self.log_processor.auto_clean_log_text(log) for log in log_contents]
+            vectors = self.encode_texts(texts, batch_size)
+            
+            results: List[Optional[Dict[str, Any]]] = [None] * len(log_contents)
+            by_dim: Dict[int, List[int]] = {}
+            for i, vector in enumerate(vectors):
+                if vector is None:
+                    results[i] = {'error': '向量化失败'}
+                else:
+                    by_dim.setdefault(len(vector), []).append(i)
             
-            # 找到最相似的故障类型
-            max_similarity_idx = np.argmax(similarities)
-            predicted_fault = fault_types[max_similarity_idx]
-            max_similarity = similarities[max_similarity_idx]
-            
-            # 生成排名
-            sorted_indices = np.argsort(similarities)[::-1]
-            top_matches = []
-            
-            seen_types = set()
-            for idx in sorted_indices[:5]:  # 前5个结果
-                if similarities[idx] > 0:  # 只包含有效相似度的结果
-                    fault_type = fault_types[idx]
-                    if fault_type not in seen_types:
-                        top_matches.append({
-                            'fault_type': fault_type,
-                            'similarity': similarities[idx]
-                        })
-                        seen_types.add(fault_type)
-                        if len(top_matches) >= 3:  # 只保留前3个不同类型
-                            break
+            for dim, positions in by_dim.items():
+                search_index, empty_result = self._prepare_search_index(dim, exact)
+                if search_index is None:
+                    for i in positions:
+                        results[i] = dict(empty_result)
+                    continue
+                
+                ranked = search_index.rank_batch(
+                    np.vstack([vectors[i] for i in positions]), exact=exact, nprobe=nprobe
+                )
+                for i, result in zip(positions, ranked):
+                    results[i] = result if result is not None else self._no_match_result()
             
-            return {
-                'predicted_fault': predicted_fault,
-                'confidence': max_similarity,
-                'top_matches': top_matches
-            }
+            return results
             
         except Exception as e:
-            self.logger.error(f"故障类型识别失败: {e}")
+            self.logger.error(f"批量故障类型识别失败: {e}")
             raise
     
     def add_fault_record(self, log_content: str, fault_type: str) -> bool:
@@ -696,7 +1098,7 @@ class LogAnalysisEngine:
             processed_text = self.log_processor.auto_clean_log_text(log_content)
             
             # 向量化
-            vector = self.vector_engine.text_to_vector(processed_text)
+            vector = self.encode_text(processed_text)
             
             if vector is None:
                 raise ValueError("向量化失败")
@@ -711,6 +1113,41 @@ class LogAnalysisEngine:
             self.logger.error(f"添加故障记录失败: {e}")
             return False
     
+    def add_fault_records(self, items: List[Tuple[str, str]], batch_size: int = None) -> Dict[str, Any]:
+        """
+        批量添加故障记录：批量编码后一次写入故障库
+        
+        Args:
+            items: (日志内容, 故障类型) 列表
+            batch_size: SentenceTransformer编码批大小（可选，默认LogAnalysisConfig.ENCODE_BATCH_SIZE）
+            
+        Returns:
+            {'added': 写入条数, 'failed': 失败条目在items中的下标列表}
+        """
+        entries, failed = self.encode_fault_records(items, batch_size)
+        added = self.fault_db.add_fault_records(entries, vector_method=self.vector_method)
+        return {'added': added, 'failed': failed}
+    
+    def encode_fault_records(self, items: List[Tuple[str, str]],
+                             batch_size: int = None) -> Tuple[List[Tuple[np.ndarray, str, str]], List[int]]:
+        """
+        批量编码待添加的故障记录（不写入故障库）
+        
+        Returns:
+            (可写入FaultDatabase.add_fault_records的(向量, 故障类型, 日志内容)列表, 失败条目在items中的下标列表)
+        """
+        texts = [self.log_processor.auto_clean_log_text(log_content) for log_content, _ in items]
+        vectors = self.encode_texts(texts, batch_size)
+        
+        entries = []
+        failed = []
+        for i, ((log_content, fault_type), vector) in enumerate(zip(items, vectors)):
+            if vector is None or not fault_type:
+                failed.append(i)
+            else:
+                entries.append((vector, fault_type, log_content))
+        return entries, failed
+    
     def get_fault_database_info(self) -> Dict[str, Any]:
         """获取故障库信息"""
         info = self.fault_db.get_database_info()
@@ -723,3 +1160,139 @@ class LogAnalysisEngine:
         }
         
         return info
+
+
+class LogAnalysisEngineRegistry:
+    """
+    进程级日志分析引擎注册表
+    
+    每个worker进程只加载一次SentenceTransformer模型，所有请求共享同一个
+    LogAnalysisEngine实例；支持启动时预加载、首次使用时懒加载以及模型路径
+    变化时的显式热重载。
+    """
+    
+    STATE_UNLOADED = 'unloaded'
+    STATE_LOADING = 'loading'
+    STATE_READY = 'ready'
+    STATE_FAILED = 'failed'
+    
+    def __init__(self):
+        self.logger = logging.getLogger(__name__)
+        self._lock = threading.RLock()
+        self._engine = None
+        self._state = self.STATE_UNLOADED
+        self._model_path = None
+        self._error = None
+        self._loaded_at = None
+        self._load_seconds = None
+    
+    def _build_engine(self, model_path: str) -> LogAnalysisEngine:
+        """构建新的引擎实例并记录加载耗时"""
+        start = time.perf_counter()
+        engine = LogAnalysisEngine(model_path)
+        self._load_seconds = round(time.perf_counter() - start, 3)
+        return engine
+    
+    def get_engine(self, model_path: str = None) -> LogAnalysisEngine:
+        """
+        获取共享的日志分析引擎，首次调用时加载模型
+        
+        Args:
+            model_path: 模型路径（可选），与已加载的路径不同时触发重载
+            
+        Returns:
+            LogAnalysisEngine实例
+        """
+        engine = self._engine
+        if engine is not None and (model_path is None or model_path == self._model_path):
+            return engine
+        
+        with self._lock:
+            # 双重检查，避免并发请求重复加载模型
+            if self._engine is not None and (model_path is None or model_path == self._model_path):
+                return self._engine
+            return self._load(model_path)
+    
+    def reload(self, model_path: str = None) -> LogAnalysisEngine:
+        """
+        热重载引擎
+        
+        新引擎构建完成前，正在处理的请求继续使用旧引擎；构建失败时保留旧引擎并抛出异常。
+        
+        Args:
+            model_path: 新的模型路径（可选），默认沿用当前路径
+            
+        Returns:
+            新的LogAnalysisEngine实例
+        """
+        with self._lock:
+            return self._load(model_path or self._model_path)
+    
+    def _load(self, model_path: str = None) -> LogAnalysisEngine:
+        """在持有锁的情况下加载引擎"""
+        if model_path is None:
+            model_path = LogAnalysisConfig.MODEL_PATH
+        
+        self._state = self.STATE_LOADING
+        try:
+            self.logger.info(f"正在加载日志分析引擎: {model_path}")
+            engine = self._build_engine(model_path)
+        except Exception as e:
+            self._error = str(e)
+            # 已有可用引擎时继续使用旧引擎
+            self._state = self.STATE_READY if self._engine is not None else self.STATE_FAILED
+            self.logger.error(f"日志分析引擎加载失败: {e}")
+            raise
+        
+        self._engine = engine
+        self._model_path = model_path
+        self._error = None
+        self._loaded_at = datetime.now().isoformat()
+        self._state = self.STATE_READY
+        self.logger.info(f"日志分析引擎加载完成，耗时 {self._load_seconds}s")
+        return engine
+    
+    def warm_up(self) -> bool:
+        """预加载引擎（用于AppConfig.ready），失败时只记录日志不抛出异常"""
+        try:
+            self.get_engine()
+            return True
+        except Exception as e:
+            self.logger.error(f"日志分析引擎预加载失败: {e}")
+            return False
+    
+    @property
+    def is_ready(self) -> bool:
+        return self._state == self.STATE_READY
+    
+    def status(self) -> Dict[str, Any]:
+        """获取引擎的健康/就绪状态"""
+        engine = self._engine
+        status = {
+            'state': self._state,
+            'ready': self.is_ready,
+            'model_path': self._model_path,
+            'loaded_at': self._loaded_at,
+            'load_seconds': self._load_seconds,
+            'error': self._error,
+            'engine': None
+        }
+        if engine is not None:
+            status['engine'] = {
+                'vector_method': engine.vector_method,
+                'vector_dimension': engine.vector_dim,
+                'engine_type': type(engine.vector_engine).__name__,
+                'backend': getattr(engine.vector_engine, 'backend', None),
+                'model_revision': engine.model_revision,
+                'embedding_cache': engine.embedding_cache.stats()
+            }
+        return status
+
+
+# 进程级单例
+engine_registry = LogAnalysisEngineRegistry()
+
+
+def get_log_analysis_engine() -> LogAnalysisEngine:
+    """获取进程内共享的日志分析引擎"""
+    return engine_registry.get_engine()
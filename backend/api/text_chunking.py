@@ -0,0 +1,82 @@
+"""
+长日志分窗
+SentenceTransformer只编码前max_seq_length个token，超出部分被直接截断。
+把清洗后的文本按token切成有重叠的窗口，每个窗口单独编码后再池化，长日志的全部内容都参与比较，
+同时可以按窗口定位异常位置。
+"""
+
+from typing import List, Tuple, Optional, Sequence
+import numpy as np
+
+
+def _spans_from_offsets(offsets: Sequence[Tuple[int, int]], window: int, overlap: int) -> List[Tuple[int, int]]:
+    step = max(1, window - overlap)
+    spans = []
+    for start in range(0, len(offsets), step):
+        end = min(start + window, len(offsets))
+        spans.append((offsets[start][0], offsets[end - 1][1]))
+        if end >= len(offsets):
+            break
+    return spans
+
+
+def word_offsets(text: str) -> List[Tuple[int, int]]:
+    """按空白分词的字符区间"""
+    offsets = []
+    position = 0
+    for word in text.split():
+        start = text.index(word, position)
+        position = start + len(word)
+        offsets.append((start, position))
+    return offsets
+
+
+def split_windows(text: str, window: int, overlap: int = 0,
+                  token_offsets: Optional[Sequence[Tuple[int, int]]] = None) -> List[Tuple[int, int]]:
+    """
+    把文本切分为有重叠的窗口
+
+    Args:
+        text: 清洗后的文本
+        window: 每个窗口的token数
+        overlap: 相邻窗口重叠的token数
+        token_offsets: 分词器给出的每个token的字符区间（可选），没有时按空白分词
+
+    Returns:
+        每个窗口在text中的(起始, 结束)字符位置
+    """
+    if not text or not text.strip():
+        return []
+    offsets = [span for span in (token_offsets or word_offsets(text)) if span[1] > span[0]]
+    if not offsets:
+        return [(0, len(text))]
+    return _spans_from_offsets(offsets, max(1, window), max(0, min(overlap, window - 1)))
+
+
+def pool_vectors(vectors: np.ndarray, pooling: str = 'mean') -> np.ndarray:
+    """把窗口向量池化为一个向量（先按行归一化，避免长短窗口权重不同）"""
+    matrix = np.asarray(vectors, dtype=np.float32)
+    norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+    norms[norms == 0] = 1.0
+    matrix = matrix / norms
+    if pooling == 'max':
+        return matrix.max(axis=0)
+    return matrix.mean(axis=0)
+
+
+def window_similarities(test_vectors: np.ndarray, normal_vectors: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    每个测试窗口与最相似正常窗口的余弦相似度
+
+    Returns:
+        (相似度, 最相似的正常窗口下标)
+    """
+    def normalize(matrix):
+        matrix = np.asarray(matrix, dtype=np.float32)
+        norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+        norms[norms == 0] = 1.0
+        return matrix / norms
+
+    sims = normalize(test_vectors) @ normalize(normal_vectors).T
+    best = sims.argmax(axis=1)
+    return np.clip(sims[np.arange(len(best)), best], -1.0, 1.0), best
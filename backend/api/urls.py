@@ -4,23 +4,42 @@ from . import views
 urlpatterns = [
     # 信令流程分析
     path('analyze-protocol/', views.analyze_protocol, name='analyze_protocol'),
+    path('analyze-protocol/upload/', views.analyze_protocol_upload, name='analyze_protocol_upload'),
+    path('analyze-protocol/batch/', views.analyze_protocol_batch, name='analyze_protocol_batch'),
+    path('analyze-protocol/sessions/', views.create_protocol_session, name='create_protocol_session'),
+    path('analyze-protocol/sessions/<str:session_id>/', views.protocol_session, name='protocol_session'),
+    path('analyze-protocol/sessions/<str:session_id>/append/', views.append_protocol_session,
+         name='append_protocol_session'),
     
     # 日志异常检测和故障识别
     path('anomaly-detection/', views.anomaly_detection, name='anomaly_detection'),
+    path('anomaly-detection/upload/', views.anomaly_detection_upload, name='anomaly_detection_upload'),
     path('fault-identification/', views.fault_identification, name='fault_identification'),
+    path('fault-identification/upload/', views.fault_identification_upload, name='fault_identification_upload'),
+    path('fault-identification/batch/', views.fault_identification_batch, name='fault_identification_batch'),
     path('add-fault-record/', views.add_fault_record, name='add_fault_record'),
+    path('add-fault-record/batch/', views.add_fault_records_batch, name='add_fault_records_batch'),
     path('fault-database-info/', views.fault_database_info, name='fault_database_info'),
     
+    # 日志分析引擎状态与热重载
+    path('engine-status/', views.engine_status, name='engine_status'),
+    path('engine-reload/', views.engine_reload, name='engine_reload'),
+    
     # 知识图谱节点操作
     path('kg/nodes/', views.get_nodes, name='get_nodes'),
     path('kg/nodes/create/', views.create_node, name='create_node'),
     path('kg/nodes/update/', views.update_node, name='update_node'),
     path('kg/nodes/delete/', views.delete_node, name='delete_node'),
+    path('kg/nodes/bulk/', views.bulk_nodes, name='bulk_nodes'),
     
     # 知识图谱关系操作
     path('kg/relationships/', views.get_relationships, name='get_relationships'),
     path('kg/relationships/create/', views.create_relationship, name='create_relationship'),
     path('kg/relationships/delete/', views.delete_relationship, name='delete_relationship'),
+    path('kg/relationships/bulk/', views.bulk_relationships, name='bulk_relationships'),
+    
+    # 知识图谱整图（一次查询返回全部节点和关系）
+    path('kg/graph/', views.get_knowledge_graph, name='get_knowledge_graph'),
     
     # 知识图谱架构
     path('kg/schema/', views.get_knowledge_graph_schema, name='get_knowledge_graph_schema'),
@@ -1,9 +1,14 @@
+from django.conf import settings
 from django.http import JsonResponse
 from django.views.decorators.csrf import csrf_exempt
 from django.views.decorators.http import require_http_methods
 import json
-from .protocol_analyzer import ProtocolAnalyzer
-from .knowledge_graph import KnowledgeGraphService
+import os
+from .protocol_batch import parse_analysis_options, create_analyzer, analysis_result
+from .progress_stream import stream_format, streaming_response, iter_protocol_events
+from .knowledge_graph import KnowledgeGraphService, BulkWriteError
+from .kg_config import VALID_NODE_LABELS, VALID_RELATIONSHIPS
+from .kg_schema import index_status
 import traceback
 
 @csrf_exempt
@@ -20,37 +25,304 @@ def analyze_protocol(request):
             }, status=400)
         
         # 创建分析器实例
-        analyzer = ProtocolAnalyzer()
+        try:
+            analyzer = create_analyzer(parse_analysis_options(data.get))
+            fmt = stream_format(data.get('stream'))
+        except ValueError as e:
+            return JsonResponse({'error': str(e)}, status=400)
         
-        # 解析日志
-        logs = analyzer.parse_log(log_content)
+        # 流式响应：边分析边输出进度事件
+        if fmt:
+            return streaming_response(
+                iter_protocol_events(analyzer, log_content.split('\n'), bool(data.get('detail', False))), fmt
+            )
         
-        # 分析流程完整性
-        analyzer.analyze_flow_completeness(logs)
+        # 边解析边分析流程完整性
+        analyzer.analyze_stream(log_content.split('\n'))
         
-        # 生成分析报告
-        report = analyzer.generate_analysis_report()
+        return JsonResponse(analysis_result(analyzer, bool(data.get('detail', False))))
         
-        # 获取流程顺序
-        flow_order = list(analyzer.flow_definitions.keys())
+    except json.JSONDecodeError:
+        return JsonResponse({
+            'error': 'Invalid JSON in request body'
+        }, status=400)
+    except Exception as e:
+        return JsonResponse({
+            'error': str(e)
+        }, status=500)
+
+
+def _upload_error_response(e):
+    """上传接口的错误响应（包括解析multipart请求体时的错误）"""
+    from django.core.exceptions import RequestDataTooBig, SuspiciousOperation
+    from django.http.multipartparser import MultiPartParserError
+    from .log_upload import UploadTooLarge, UnsupportedEncoding
+    
+    if isinstance(e, (UploadTooLarge, RequestDataTooBig)):
+        return JsonResponse({'error': str(e)}, status=413)
+    if isinstance(e, UnsupportedEncoding):
+        return JsonResponse({'error': str(e)}, status=415)
+    if isinstance(e, (MultiPartParserError, SuspiciousOperation)):
+        return JsonResponse({'error': f'Malformed upload: {e}'}, status=400)
+    return JsonResponse({'error': str(e)}, status=500)
+
+
+def _positive_int(value, name):
+    """读取可选的正整数参数，未提供时返回None
+
+    Raises:
+        ValueError: 不是整数或小于1
+    """
+    if value is None or value == '':
+        return None
+    try:
+        number = int(value)
+    except (TypeError, ValueError):
+        raise ValueError(f'{name} must be an integer')
+    if number < 1:
+        raise ValueError(f'{name} must be at least 1')
+    return number
+
+
+@csrf_exempt
+@require_http_methods(["POST"])
+def analyze_protocol_upload(request):
+    """信令流程分析API（流式上传）- multipart文件字段file或原始请求体，可gzip/zstd压缩，边读边解析"""
+    from .log_upload import (get_upload_source, get_upload_option, open_binary_stream, open_text_stream,
+                             iter_lines, is_true)
+    
+    try:
+        try:
+            analyzer = create_analyzer(parse_analysis_options(lambda name: get_upload_option(request, name)))
+            fmt = stream_format(get_upload_option(request, 'stream'))
+        except ValueError as e:
+            return JsonResponse({'error': str(e)}, status=400)
+        detail = is_true(get_upload_option(request, 'detail', False))
         
-        # 获取第一个错误信息
-        first_error = analyzer.print_first_error(report, flow_order)
+        source, content_encoding = get_upload_source(request, 'file')
+        if source is None:
+            return JsonResponse({
+                'error': 'No log file provided'
+            }, status=400)
         
-        return JsonResponse({
-            'report': report,
-            'first_error': first_error
-        })
+        if fmt:
+            text = open_text_stream(open_binary_stream(source, content_encoding))
+            
+            def events():
+                with text:
+                    yield from iter_protocol_events(analyzer, iter_lines(text), detail)
+            
+            return streaming_response(events(), fmt)
         
+        with open_text_stream(open_binary_stream(source, content_encoding)) as text:
+            analyzer.analyze_stream(iter_lines(text))
+        
+        return JsonResponse(analysis_result(analyzer, detail))
+
+    except Exception as e:
+        return _upload_error_response(e)
+
+
+@csrf_exempt
+@require_http_methods(["POST"])
+def analyze_protocol_batch(request):
+    """
+    多文件信令流程分析API - multipart上传多个files字段（可gzip压缩），在进程池中并行分析
+
+    以NDJSON流式返回：每个文件完成后输出一行结果，最后一行为{"summary": 汇总}
+    """
+    import tempfile
+    from django.http import StreamingHttpResponse
+    from .log_upload import get_upload_option, is_true, max_upload_bytes
+    from .protocol_batch import analyze_files, BatchSummary, max_workers, shared_pool
+
+    try:
+        uploads = request.FILES.getlist('files')
+        if not uploads:
+            return JsonResponse({
+                'error': 'No log files provided'
+            }, status=400)
+
+        options = parse_analysis_options(lambda name: get_upload_option(request, name))
+        # 客户端指定的并发数不能超过PROTOCOL_BATCH_WORKERS（未配置时为CPU核数）
+        workers = min(_positive_int(get_upload_option(request, 'workers'), 'workers') or max_workers(), max_workers())
+        chunksize = _positive_int(get_upload_option(request, 'chunksize'), 'chunksize') or \
+            getattr(settings, 'PROTOCOL_BATCH_CHUNKSIZE', 1)
+        detail = is_true(get_upload_option(request, 'detail', False))
+    except ValueError as e:
+        return JsonResponse({'error': str(e)}, status=400)
+    except Exception as e:
+        return _upload_error_response(e)
+
+    limit = max_upload_bytes()
+    for upload in uploads:
+        if limit is not None and upload.size > limit:
+            return JsonResponse({'error': f"日志超过允许的最大大小 {limit} 字节: {upload.name}"}, status=413)
+
+    # 工作进程按路径读取文件，上传内容先写入临时文件
+    files = []
+    try:
+        for i, upload in enumerate(uploads):
+            with tempfile.NamedTemporaryFile(delete=False, suffix='.log') as f:
+                for chunk in upload.chunks():
+                    f.write(chunk)
+            files.append((upload.name or f'file{i}', f.name))
+    except Exception as e:
+        for _, path in files:
+            os.unlink(path)
+        return JsonResponse({'error': str(e)}, status=500)
+
+    def stream():
+        summary = BatchSummary()
+        try:
+            for result in analyze_files(files, options, workers=workers, chunksize=chunksize, detail=detail,
+                                        executor=shared_pool.get()):
+                summary.add(result)
+                yield json.dumps(result, ensure_ascii=False) + '\n'
+            yield json.dumps({'summary': summary.to_dict()}, ensure_ascii=False) + '\n'
+        finally:
+            for _, path in files:
+                if os.path.exists(path):
+                    os.unlink(path)
+
+    return StreamingHttpResponse(stream(), content_type='application/x-ndjson')
+
+
+def _read_tail_request(request):
+    """
+    读取增量分析请求：JSON请求体（log_content/final/detail及分析参数），或原始文本请求体（参数放在查询参数中）
+
+    Returns:
+        (日志内容, 参数读取函数)
+    """
+    if request.content_type == 'application/json':
+        data = json.loads(request.body or b'{}')
+        if not isinstance(data, dict):
+            raise ValueError('Request body must be a JSON object')
+        return data.get('log_content', '') or '', lambda name: data.get(name, request.GET.get(name))
+    return request.body.decode('utf-8', errors='replace'), request.GET.get
+
+
+@csrf_exempt
+@require_http_methods(["POST"])
+def create_protocol_session(request):
+    """创建增量信令分析会话 - 可选mode/ue_field/cell_field参数和初始日志内容log_content"""
+    from .log_upload import is_true
+    from .protocol_tail import tail_sessions, TailLimitExceeded
+
+    try:
+        log_content, get_option = _read_tail_request(request)
+        options = parse_analysis_options(get_option)
+    except json.JSONDecodeError:
+        return JsonResponse({
+            'error': 'Invalid JSON in request body'
+        }, status=400)
+    except ValueError as e:
+        return JsonResponse({'error': str(e)}, status=400)
+
+    try:
+        session = tail_sessions.create(options)
+        try:
+            appended = session.append(log_content, final=is_true(get_option('final') or False)) if log_content else 0
+        except TailLimitExceeded as e:
+            tail_sessions.delete(session.id)
+            return JsonResponse({'error': str(e)}, status=413)
+        return JsonResponse({
+            'appended': appended,
+            **session.info(),
+            **session.result(is_true(get_option('detail') or False))
+        }, status=201)
+    except Exception as e:
+        return JsonResponse({
+            'error': str(e)
+        }, status=500)
+
+
+@csrf_exempt
+@require_http_methods(["POST"])
+def append_protocol_session(request, session_id):
+    """
+    向增量分析会话追加日志 - 只解析新增内容，返回更新后的报告和第一个错误
+
+    内容可以在行中间断开，不完整的最后一行等下一次追加；final=true时立即解析（日志已写完）
+    """
+    from .log_upload import is_true
+    from .protocol_tail import tail_sessions, TailLimitExceeded
+
+    session = tail_sessions.get(session_id)
+    if session is None:
+        return JsonResponse({
+            'error': 'Session not found or expired'
+        }, status=404)
+
+    try:
+        log_content, get_option = _read_tail_request(request)
     except json.JSONDecodeError:
         return JsonResponse({
             'error': 'Invalid JSON in request body'
         }, status=400)
+    except ValueError as e:
+        return JsonResponse({'error': str(e)}, status=400)
+
+    try:
+        try:
+            appended = session.append(log_content, final=is_true(get_option('final') or False))
+        except TailLimitExceeded as e:
+            return JsonResponse({'error': str(e), **session.info()}, status=413)
+        return JsonResponse({
+            'appended': appended,
+            **session.info(),
+            **session.result(is_true(get_option('detail') or False))
+        })
     except Exception as e:
         return JsonResponse({
             'error': str(e)
         }, status=500)
 
+
+@csrf_exempt
+@require_http_methods(["GET", "DELETE"])
+def protocol_session(request, session_id):
+    """获取增量分析会话的当前报告（GET，可选detail查询参数）或关闭会话（DELETE）"""
+    from .log_upload import is_true
+    from .protocol_tail import tail_sessions
+
+    if request.method == 'DELETE':
+        if not tail_sessions.delete(session_id):
+            return JsonResponse({
+                'error': 'Session not found or expired'
+            }, status=404)
+        return JsonResponse({'success': True, 'session_id': session_id})
+
+    session = tail_sessions.get(session_id)
+    if session is None:
+        return JsonResponse({
+            'error': 'Session not found or expired'
+        }, status=404)
+    try:
+        return JsonResponse({**session.info(), **session.result(is_true(request.GET.get('detail', False)))})
+    except Exception as e:
+        return JsonResponse({
+            'error': str(e)
+        }, status=500)
+
+def _conditional_json(request, payload):
+    """
+    带ETag的JSON响应：ETag为响应内容的哈希，请求的If-None-Match与之相同时返回304
+    
+    Cache-Control: no-cache要求浏览器每次都带ETag重新验证，图谱未变化时不再重新传输
+    """
+    import hashlib
+    from django.utils.cache import get_conditional_response
+    from django.utils.http import quote_etag
+    
+    response = JsonResponse(payload)
+    etag = quote_etag(hashlib.sha1(response.content).hexdigest())
+    response['ETag'] = etag
+    response['Cache-Control'] = 'no-cache'
+    return get_conditional_response(request, etag=etag, response=response)
+
+
 @csrf_exempt
 @require_http_methods(["GET"])
 def get_nodes(request):
@@ -84,7 +356,7 @@ def get_nodes(request):
                 node_data['__labels__'] = item['node_labels']
             processed_nodes.append({'n': node_data})
         
-        return JsonResponse({
+        return _conditional_json(request, {
             'success': True,
             'data': processed_nodes
         })
@@ -208,6 +480,64 @@ def delete_node(request):
         }, status=500)
 
 
+def _bulk_error(e):
+    """批量写入异常转换为响应：参数错误400，写入中途失败时返回已提交的记录数"""
+    if isinstance(e, json.JSONDecodeError):
+        return JsonResponse({'success': False, 'error': 'Invalid JSON in request body'}, status=400)
+    if isinstance(e, ValueError):
+        return JsonResponse({'success': False, 'error': str(e)}, status=400)
+    if isinstance(e, BulkWriteError):
+        return JsonResponse({'success': False, 'error': str(e), 'written': e.written}, status=500)
+    return JsonResponse({'success': False, 'error': str(e)}, status=500)
+
+
+@csrf_exempt
+@require_http_methods(["POST"])
+def bulk_nodes(request):
+    """
+    批量写入节点（每NEO4J_BULK_CHUNK_SIZE条一个事务）
+
+    请求体:
+        label: 节点类型
+        mode: create（默认）/merge（按key合并，已存在时更新属性）/delete（每项是匹配条件）
+        nodes: 节点属性或匹配条件列表
+        key: merge时的匹配属性，默认name
+        chunk_size: 每个事务的记录数（可选）
+    """
+    try:
+        data = json.loads(request.body)
+        label = data.get('label', '')
+        mode = data.get('mode', 'create')
+        nodes = data.get('nodes')
+        chunk_size = _positive_int(data.get('chunk_size'), 'chunk_size')
+
+        if label not in VALID_NODE_LABELS:
+            return JsonResponse({
+                'success': False,
+                'error': f'Invalid label. Must be one of: {VALID_NODE_LABELS}'
+            }, status=400)
+        if mode not in ('create', 'merge', 'delete'):
+            return JsonResponse({'success': False, 'error': "mode must be 'create', 'merge' or 'delete'"}, status=400)
+        if not isinstance(nodes, list) or not all(isinstance(node, dict) for node in nodes):
+            return JsonResponse({'success': False, 'error': 'nodes must be a list of objects'}, status=400)
+
+        with KnowledgeGraphService() as kg:
+            if mode == 'create':
+                count = kg.nodes.bulk_create(label, nodes, chunk_size=chunk_size)
+            elif mode == 'merge':
+                count = kg.nodes.bulk_merge(label, nodes, key=data.get('key', 'name'), chunk_size=chunk_size)
+            else:
+                count = kg.nodes.bulk_delete(label, nodes, chunk_size=chunk_size)
+
+        return JsonResponse({
+            'success': True,
+            'count': count
+        })
+
+    except Exception as e:
+        return _bulk_error(e)
+
+
 @csrf_exempt
 @require_http_methods(["GET"])
 def get_relationships(request):
@@ -251,7 +581,7 @@ def get_relationships(request):
                 'b': to_node
             })
         
-        return JsonResponse({
+        return _conditional_json(request, {
             'success': True,
             'data': processed_relationships
         })
@@ -263,6 +593,34 @@ def get_relationships(request):
         }, status=500)
 
 
+@csrf_exempt
+@require_http_methods(["GET"])
+def get_knowledge_graph(request):
+    """
+    一次请求获取整个知识图谱（type→reason→solution）
+    
+    节点为{id, labels, properties}，关系为{id, type, source, target, properties}，source/target引用节点id
+    """
+    try:
+        with KnowledgeGraphService() as kg:
+            graph = kg.get_full_graph()
+        
+        return _conditional_json(request, {
+            'success': True,
+            'data': {
+                **graph,
+                'node_count': len(graph['nodes']),
+                'relationship_count': len(graph['relationships'])
+            }
+        })
+        
+    except Exception as e:
+        return JsonResponse({
+            'success': False,
+            'error': str(e)
+        }, status=500)
+
+
 @csrf_exempt
 @require_http_methods(["POST"])
 def create_relationship(request):
@@ -318,6 +676,59 @@ def create_relationship(request):
         }, status=500)
 
 
+@csrf_exempt
+@require_http_methods(["POST"])
+def bulk_relationships(request):
+    """
+    批量写入同一类型的关系（每NEO4J_BULK_CHUNK_SIZE条一个事务）
+
+    请求体:
+        from_label, to_label, rel_type: 与create_relationship相同
+        mode: create（默认）/merge（已存在的关系不重复创建）/delete
+        relationships: [{'from': 起始节点条件, 'to': 目标节点条件, 'properties': 关系属性}]
+        chunk_size: 每个事务的记录数（可选）
+    """
+    try:
+        data = json.loads(request.body)
+        from_label = data.get('from_label', '')
+        to_label = data.get('to_label', '')
+        rel_type = data.get('rel_type', '')
+        mode = data.get('mode', 'create')
+        relationships = data.get('relationships')
+        chunk_size = _positive_int(data.get('chunk_size'), 'chunk_size')
+
+        if (from_label, to_label) not in VALID_RELATIONSHIPS:
+            return JsonResponse({
+                'success': False,
+                'error': f'Invalid relationship. Valid relationships: {list(VALID_RELATIONSHIPS.keys())}'
+            }, status=400)
+        if rel_type != VALID_RELATIONSHIPS[(from_label, to_label)]:
+            return JsonResponse({
+                'success': False,
+                'error': f'Invalid relationship type for {from_label}->{to_label}. Expected: {VALID_RELATIONSHIPS[(from_label, to_label)]}'
+            }, status=400)
+        if mode not in ('create', 'merge', 'delete'):
+            return JsonResponse({'success': False, 'error': "mode must be 'create', 'merge' or 'delete'"}, status=400)
+        if not isinstance(relationships, list) or not all(isinstance(rel, dict) for rel in relationships):
+            return JsonResponse({'success': False, 'error': 'relationships must be a list of objects'}, status=400)
+
+        with KnowledgeGraphService() as kg:
+            bulk = {
+                'create': kg.relationships.bulk_create,
+                'merge': kg.relationships.bulk_merge,
+                'delete': kg.relationships.bulk_delete
+            }[mode]
+            count = bulk(from_label, to_label, rel_type, relationships, chunk_size=chunk_size)
+
+        return JsonResponse({
+            'success': True,
+            'count': count
+        })
+
+    except Exception as e:
+        return _bulk_error(e)
+
+
 @csrf_exempt
 @require_http_methods(["DELETE"])
 def delete_relationship(request):
@@ -369,7 +780,9 @@ def delete_relationship(request):
 @csrf_exempt
 @require_http_methods(["GET"])
 def get_knowledge_graph_schema(request):
-    """获取知识图谱的架构信息"""
+    """获取知识图谱的架构信息 - ?indexes=1时附带索引状态（需要连接Neo4j）"""
+    from .log_upload import is_true
+
     try:
         schema = {
             'node_types': [
@@ -408,6 +821,15 @@ def get_knowledge_graph_schema(request):
             ]
         }
         
+        # 索引状态（由migrate_kg_schema创建）按需查询，数据库不可用时为None
+        if is_true(request.GET.get('indexes', False)):
+            try:
+                with KnowledgeGraphService() as kg:
+                    schema['indexes'] = index_status(kg.client)
+            except Exception as e:
+                schema['indexes'] = None
+                schema['index_error'] = str(e)
+        
         return JsonResponse({
             'success': True,
             'data': schema
@@ -434,11 +856,20 @@ def anomaly_detection(request):
                 'error': 'Normal log and test log content are required'
             }, status=400)
         
+        if data.get('pooling', 'mean') not in ('mean', 'max'):
+            return JsonResponse({
+                'error': "pooling must be 'mean' or 'max'"
+            }, status=400)
+        
         # 使用集成的text2vec功能
-        from .text2vec_integration import LogAnalysisEngine
+        from .text2vec_integration import get_log_analysis_engine
         
-        engine = LogAnalysisEngine()
-        result = engine.detect_anomaly(normal_log, test_log)
+        engine = get_log_analysis_engine()
+        result = engine.detect_anomaly(
+            normal_log, test_log,
+            chunked=bool(data.get('chunked', False)),
+            pooling=data.get('pooling', 'mean')
+        )
         
         return JsonResponse(result)
         
@@ -465,10 +896,19 @@ def fault_identification(request):
                 'error': 'Log content is required'
             }, status=400)
           # 使用集成的text2vec功能
-        from .text2vec_integration import LogAnalysisEngine
+        from .text2vec_integration import get_log_analysis_engine
         
-        engine = LogAnalysisEngine()
-        result = engine.identify_fault_type(log_content)
+        try:
+            nprobe = _positive_int(data.get('nprobe'), 'nprobe')
+        except ValueError as e:
+            return JsonResponse({'error': str(e)}, status=400)
+        
+        engine = get_log_analysis_engine()
+        result = engine.identify_fault_type(
+            log_content,
+            exact=bool(data.get('exact', False)),
+            nprobe=nprobe
+        )
         
         return JsonResponse(result)
         
@@ -482,6 +922,153 @@ def fault_identification(request):
         }, status=500)
 
 
+@csrf_exempt
+@require_http_methods(["POST"])
+def anomaly_detection_upload(request):
+    """异常检测API（流式上传）- multipart文件字段normal_log和test_log，可gzip/zstd压缩"""
+    from .log_upload import get_upload_source, get_upload_option, open_binary_stream, spool_text, is_true
+    
+    if request.content_type != 'multipart/form-data':
+        return JsonResponse({
+            'error': 'multipart/form-data with normal_log and test_log files is required'
+        }, status=400)
+    
+    try:
+        pooling = get_upload_option(request, 'pooling', 'mean')
+        if pooling not in ('mean', 'max'):
+            return JsonResponse({
+                'error': "pooling must be 'mean' or 'max'"
+            }, status=400)
+        
+        normal_source, _ = get_upload_source(request, 'normal_log')
+        test_source, _ = get_upload_source(request, 'test_log')
+        if normal_source is None or test_source is None:
+            return JsonResponse({
+                'error': 'Normal log and test log content are required'
+            }, status=400)
+        
+        from .text2vec_integration import get_log_analysis_engine
+        
+        engine = get_log_analysis_engine()
+        with spool_text(open_binary_stream(normal_source)) as normal_log, \
+                spool_text(open_binary_stream(test_source)) as test_log:
+            result = engine.detect_anomaly(
+                normal_log, test_log,
+                chunked=is_true(get_upload_option(request, 'chunked', False)),
+                pooling=pooling
+            )
+        
+        return JsonResponse(result)
+        
+    except Exception as e:
+        return _upload_error_response(e)
+
+
+@csrf_exempt
+@require_http_methods(["POST"])
+def fault_identification_upload(request):
+    """故障类型识别API（流式上传）- multipart文件字段file或原始请求体，可gzip/zstd压缩"""
+    from .log_upload import get_upload_source, get_upload_option, open_binary_stream, spool_text, is_true
+    
+    try:
+        source, content_encoding = get_upload_source(request, 'file')
+        if source is None:
+            return JsonResponse({
+                'error': 'Log content is required'
+            }, status=400)
+        
+        try:
+            nprobe = _positive_int(get_upload_option(request, 'nprobe'), 'nprobe')
+        except ValueError as e:
+            return JsonResponse({'error': str(e)}, status=400)
+        
+        from .text2vec_integration import get_log_analysis_engine
+        
+        engine = get_log_analysis_engine()
+        with spool_text(open_binary_stream(source, content_encoding)) as log_file:
+            result = engine.identify_fault_type(
+                log_file,
+                exact=is_true(get_upload_option(request, 'exact', False)),
+                nprobe=nprobe
+            )
+        
+        return JsonResponse(result)
+        
+    except Exception as e:
+        return _upload_error_response(e)
+
+
+@csrf_exempt
+@require_http_methods(["POST"])
+def fault_identification_batch(request):
+    """批量故障类型识别API - 一次请求识别多条日志"""
+    try:
+        data = json.loads(request.body)
+        logs = data.get('logs', [])
+        
+        if not isinstance(logs, list) or not logs:
+            return JsonResponse({
+                'error': 'A non-empty list of logs is required'
+            }, status=400)
+        
+        from .text2vec_integration import get_log_analysis_engine, LogAnalysisConfig
+        
+        if len(logs) > LogAnalysisConfig.BATCH_MAX_LOGS:
+            return JsonResponse({
+                'error': f'Too many logs in one request (max {LogAnalysisConfig.BATCH_MAX_LOGS})'
+            }, status=400)
+        
+        # 每条日志可以是字符串，或包含id和log_content的对象
+        ids = []
+        log_contents = []
+        for i, item in enumerate(logs):
+            if isinstance(item, dict):
+                ids.append(item.get('id', i))
+                log_contents.append(item.get('log_content', ''))
+            else:
+                ids.append(i)
+                log_contents.append(item if isinstance(item, str) else '')
+        
+        # 参数在开始流式响应之前校验
+        try:
+            fmt = stream_format(data.get('stream'))
+            batch_size = _positive_int(data.get('batch_size'), 'batch_size')
+            nprobe = _positive_int(data.get('nprobe'), 'nprobe')
+        except ValueError as e:
+            return JsonResponse({'error': str(e)}, status=400)
+        
+        engine = get_log_analysis_engine()
+        if fmt:
+            from .progress_stream import iter_identification_events
+            return streaming_response(iter_identification_events(
+                engine, ids, log_contents,
+                batch_size=batch_size,
+                exact=bool(data.get('exact', False)),
+                nprobe=nprobe
+            ), fmt)
+        
+        results = engine.identify_fault_types(
+            log_contents,
+            batch_size=batch_size,
+            exact=bool(data.get('exact', False)),
+            nprobe=nprobe
+        )
+        
+        return JsonResponse({
+            'count': len(results),
+            'results': [{'id': log_id, **result} for log_id, result in zip(ids, results)]
+        })
+        
+    except json.JSONDecodeError:
+        return JsonResponse({
+            'error': 'Invalid JSON in request body'
+        }, status=400)
+    except Exception as e:
+        return JsonResponse({
+            'error': str(e)
+        }, status=500)
+
+
 @csrf_exempt
 @require_http_methods(["POST"])
 def add_fault_record(request):
@@ -497,9 +1084,9 @@ def add_fault_record(request):
             }, status=400)
         
         # 使用集成的text2vec功能
-        from .text2vec_integration import LogAnalysisEngine
+        from .text2vec_integration import get_log_analysis_engine
         
-        engine = LogAnalysisEngine()
+        engine = get_log_analysis_engine()
         success = engine.add_fault_record(log_content, fault_type)
         
         if success:
@@ -523,15 +1110,69 @@ def add_fault_record(request):
         }, status=500)
 
 
+@csrf_exempt
+@require_http_methods(["POST"])
+def add_fault_records_batch(request):
+    """批量添加故障记录到故障库"""
+    try:
+        data = json.loads(request.body)
+        records = data.get('records', [])
+        
+        if not isinstance(records, list) or not records:
+            return JsonResponse({
+                'error': 'A non-empty list of records is required'
+            }, status=400)
+        
+        from .text2vec_integration import get_log_analysis_engine, LogAnalysisConfig
+        
+        if len(records) > LogAnalysisConfig.BATCH_MAX_LOGS:
+            return JsonResponse({
+                'error': f'Too many records in one request (max {LogAnalysisConfig.BATCH_MAX_LOGS})'
+            }, status=400)
+        
+        items = [
+            (str(item.get('log_content', '')), str(item.get('fault_type', '')).strip())
+            if isinstance(item, dict) else ('', '')
+            for item in records
+        ]
+        
+        try:
+            batch_size = _positive_int(data.get('batch_size'), 'batch_size')
+        except ValueError as e:
+            return JsonResponse({'error': str(e)}, status=400)
+        
+        engine = get_log_analysis_engine()
+        result = engine.add_fault_records(
+            items,
+            batch_size=batch_size
+        )
+        
+        return JsonResponse({
+            'success': not result['failed'],
+            'added': result['added'],
+            'failed': result['failed'],
+            'message': f"故障记录已添加: {result['added']} 条"
+        })
+        
+    except json.JSONDecodeError:
+        return JsonResponse({
+            'error': 'Invalid JSON in request body'
+        }, status=400)
+    except Exception as e:
+        return JsonResponse({
+            'error': str(e)
+        }, status=500)
+
+
 @csrf_exempt
 @require_http_methods(["GET"])
 def fault_database_info(request):
     """获取故障库信息"""
     try:
         # 使用集成的text2vec功能
-        from .text2vec_integration import LogAnalysisEngine
+        from .text2vec_integration import get_log_analysis_engine
         
-        engine = LogAnalysisEngine()
+        engine = get_log_analysis_engine()
         result = engine.get_fault_database_info()
         
         return JsonResponse(result)
@@ -540,3 +1181,61 @@ def fault_database_info(request):
         return JsonResponse({
             'error': str(e)
         }, status=500)
+
+
+@csrf_exempt
+@require_http_methods(["GET"])
+def engine_status(request):
+    """获取日志分析引擎的健康/就绪状态，warm=1时触发懒加载"""
+    try:
+        from .text2vec_integration import engine_registry
+        
+        if request.GET.get('warm') in ('1', 'true') and not engine_registry.is_ready:
+            engine_registry.warm_up()
+        
+        status = engine_registry.status()
+        return JsonResponse(status, status=200 if status['ready'] else 503)
+        
+    except Exception as e:
+        return JsonResponse({
+            'error': str(e)
+        }, status=500)
+
+
+@require_http_methods(["POST"])
+def engine_reload(request):
+    """
+    热重载日志分析引擎（仅限staff用户，需要CSRF token）
+
+    请求体可选model：LOG_ANALYSIS_RELOAD_MODELS中配置的模型名，不指定时按当前模型路径重新加载。
+    不接受客户端传入的路径。
+    """
+    if not (request.user.is_authenticated and request.user.is_staff):
+        return JsonResponse({
+            'error': 'Staff login required'
+        }, status=403)
+    
+    try:
+        data = json.loads(request.body) if request.body else {}
+        model = data.get('model') or None
+        
+        allowed_models = getattr(settings, 'LOG_ANALYSIS_RELOAD_MODELS', {}) or {}
+        if model is not None and model not in allowed_models:
+            return JsonResponse({
+                'error': f'Unknown model. Must be one of: {sorted(allowed_models)}'
+            }, status=400)
+        
+        from .text2vec_integration import engine_registry
+        
+        engine_registry.reload(allowed_models[model] if model is not None else None)
+        
+        return JsonResponse(engine_registry.status())
+        
+    except json.JSONDecodeError:
+        return JsonResponse({
+            'error': 'Invalid JSON in request body'
+        }, status=400)
+    except Exception as e:
+        return JsonResponse({
+            'error': str(e)
+        }, status=500)
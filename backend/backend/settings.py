@@ -127,3 +127,41 @@ DEFAULT_AUTO_FIELD = "django.db.models.BigAutoField"
 # CORS设置
 CORS_ALLOW_ALL_ORIGINS = True  # 仅在开发环境中使用
 CORS_ALLOW_CREDENTIALS = True
+
+# 日志分析引擎设置
+LOG_ANALYSIS_MODEL_PATH = None  # None表示使用api/hugface-model中的内置模型
+LOG_ANALYSIS_EAGER_LOAD = False  # True时在AppConfig.ready()中预加载模型
+LOG_ANALYSIS_RELOAD_MODELS = {}  # engine-reload接口可切换的模型：{名称: 模型目录}，接口只接受这里配置的名称
+FAULT_STORE_BACKEND = 'binary'  # 'binary': float32矩阵+元数据表（首次启动自动导入CSV）；'csv': 原始格式
+FAULT_ANN_ENABLED = True  # 故障库记录数达到FAULT_ANN_MIN_RECORDS后使用IVF近似检索
+FAULT_ANN_MIN_RECORDS = 20000
+FAULT_ANN_NLIST = None  # IVF簇数量，None时约为4*sqrt(记录数)
+FAULT_ANN_NPROBE = 8  # 每次检索的簇数量，越大召回率越高、延迟越大
+FAULT_CACHE_CHECK_INTERVAL = 1.0  # 故障库缓存检查文件修改的最小间隔（秒）
+LOG_ANALYSIS_ENCODE_BATCH_SIZE = 32  # 批量识别/导入时SentenceTransformer的编码批大小
+LOG_ANALYSIS_BATCH_MAX_LOGS = 1000  # 批量接口单次请求允许的最大日志数
+LOG_ANALYSIS_EMBEDDING_CACHE_SIZE = 1024  # 内存中缓存的日志向量数（按清洗后文本内容哈希）
+LOG_ANALYSIS_EMBEDDING_CACHE_DIR = None  # 磁盘向量缓存目录，例如 BASE_DIR / 'fault_database' / 'embedding_cache'
+FALLBACK_VECTORIZER_PATH = None  # 备用TF-IDF词表路径，None时为fault_database/fallback_vectorizer.pkl（由fit_fallback_vectorizer命令生成）
+LOG_ANALYSIS_BACKEND = 'torch'  # 推理后端：'torch'（SentenceTransformer）或 'onnx'（onnxruntime，需先执行export_onnx_model）
+LOG_ANALYSIS_ONNX_DIR = None  # ONNX模型导出目录，None时为api/onnx-model
+LOG_ANALYSIS_ONNX_QUANTIZED = False  # 是否使用int8动态量化模型
+LOG_ANALYSIS_ONNX_THREADS = None  # onnxruntime算子内线程数，None使用默认值
+LOG_ANALYSIS_ONNX_PARITY_TOLERANCE = 0.02  # ONNX与PyTorch输出允许的最大余弦距离
+LOG_ANALYSIS_CHUNK_WINDOW_TOKENS = 254  # 分窗异常检测的窗口token数（SentenceTransformer按模型最大长度）
+LOG_ANALYSIS_CHUNK_OVERLAP_TOKENS = 32  # 相邻窗口重叠的token数
+LOG_ANALYSIS_CHUNK_MAX_WINDOWS = 1024  # 单条日志最多编码的窗口数
+LOG_UPLOAD_MAX_BYTES = 1024 * 1024 * 1024  # 上传接口允许的最大日志大小（解压后，字节），None表示不限制
+LOG_UPLOAD_SPOOL_MEMORY = 8 * 1024 * 1024  # 上传日志解压后小于该大小时留在内存中，否则写入临时文件
+PROTOCOL_SESSION_UE_FIELD = None  # 按会话分析(mode=session)时UE标识所在的字段下标（制表符分隔，从0开始），未配置时mode=session需要传ue_field
+PROTOCOL_SESSION_CELL_FIELD = None  # 按会话分析时小区标识所在的字段下标
+PROTOCOL_BATCH_WORKERS = None  # 多文件信令分析的进程数，None时为CPU核数
+PROTOCOL_BATCH_CHUNKSIZE = 1  # 每次分发给工作进程的文件数，文件多且小时可调大
+PROTOCOL_TAIL_SESSION_TTL = 3600  # 增量分析会话超过该秒数未访问时清理，None表示不按时间清理
+PROTOCOL_TAIL_MAX_SESSIONS = 100  # 每个进程最多保留的增量分析会话数，超过时淘汰最久未访问的会话
+PROTOCOL_TAIL_MAX_LINE_LENGTH = 1024 * 1024  # 增量分析会话中不完整的行允许的最大字符数，超过时拒绝追加，None表示不限制
+PROTOCOL_TAIL_MAX_SESSION_BYTES = 256 * 1024 * 1024  # 每个增量分析会话累计允许接收的最大字符数，None表示不限制
+ANALYSIS_PROGRESS_INTERVAL = 5000  # 流式分析（stream=sse/ndjson）每隔多少行输出一次进度事件
+NEO4J_EAGER_CONNECT = False  # True时在AppConfig.ready()中创建共享的Neo4j驱动（连接池配置见api/kg_config.py中的NEO4J_*环境变量）
+KG_CACHE_TTL = 30  # 知识图谱查询结果缓存的有效期（秒），0表示不缓存；本进程内的写操作会立即使缓存失效
+KG_CACHE_MAX_ENTRIES = 256  # 最多缓存的知识图谱查询数
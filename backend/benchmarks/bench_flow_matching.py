@@ -0,0 +1,129 @@
+"""
+流程匹配性能测试：逐流程扫描（原实现） vs 编译后的(协议, 方向)索引
+
+    python benchmarks/bench_flow_matching.py [--lines 1000000] [--seed 0]
+
+生成合成信令日志（大部分为与流程无关的消息，穿插注册/PDU/SIP流程，SIP注册缺少最后一步），
+分别统计纯流程匹配和解析+匹配的耗时，并校验两种实现的分析报告一致。
+"""
+
+import os
+import sys
+import time
+import random
+import argparse
+from datetime import datetime, timedelta
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+from api.protocol_analyzer import ProtocolAnalyzer  # noqa: E402
+
+
+class LegacyProtocolAnalyzer(ProtocolAnalyzer):
+    """原实现：每条日志检查全部流程"""
+
+    def start_analysis(self):
+        self.flow_status = {name: {"found_steps": [], "completed": False} for name in self.flow_definitions}
+
+    def feed(self, log_entry):
+        flow_status = self.flow_status
+        for flow_name, flow_def in self.flow_definitions.items():
+            if flow_status[flow_name]["completed"]:
+                continue
+            if not all(p in self.completed_flows for p in flow_def["prerequisites"]):
+                continue
+            expected_steps = flow_def["steps"]
+            current_step_index = len(flow_status[flow_name]["found_steps"])
+            if current_step_index < len(expected_steps):
+                expected = expected_steps[current_step_index]
+                if (self.contains_in_order(log_entry["message"].lower(), expected["msg"].lower()) and
+                        log_entry["protocol"].lower() == expected["protocol"].lower() and
+                        log_entry["direction"].lower() == expected["dir"].lower()):
+                    flow_status[flow_name]["found_steps"].append({
+                        "step": expected,
+                        "timestamp": log_entry["timestamp"]
+                    })
+                    if len(flow_status[flow_name]["found_steps"]) == len(expected_steps):
+                        flow_status[flow_name]["completed"] = True
+                        self.completed_flows.append(flow_name)
+                        if flow_name in self.active_flows:
+                            del self.active_flows[flow_name]
+
+
+NOISE = [
+    ('nrrrc', 'D', 'systemInformationBlockType1'),
+    ('nrrrc', 'D', 'paging'),
+    ('nrrrc', 'U', 'measurementReport'),
+    ('nas', 'D', 'Configuration update command'),
+    ('mac', 'U', 'BSR'),
+    ('rlc', 'D', 'STATUS PDU'),
+    ('sip', 'D', '200 [REGISTER]'),
+]
+
+
+def generate_trace(lines: int, seed: int = 0):
+    """生成合成日志行（制表符分隔，与parse_log的格式一致）"""
+    rng = random.Random(seed)
+    flows = list(ProtocolAnalyzer().flow_definitions.values())
+    # 最后一个流程缺少最后一步，模拟卡住的流程（每条日志都要继续检查它）
+    flow_messages = [
+        (step["protocol"], step["dir"].upper(), step["msg"])
+        for flow in flows
+        for step in flow["steps"]
+        if step is not flows[-1]["steps"][-1]
+    ]
+    start = datetime(2025, 4, 7, 9, 42, 30)
+    out = []
+    cursor = 0
+    for seq in range(1, lines + 1):
+        # 约5%的日志属于流程消息，按定义顺序循环出现
+        if rng.random() < 0.05:
+            protocol, direction, message = flow_messages[cursor % len(flow_messages)]
+            cursor += 1
+        else:
+            protocol, direction, message = rng.choice(NOISE)
+        ts = start + timedelta(milliseconds=seq)
+        time_field = f"{ts.strftime('%H:%M:%S')}.{ts.microsecond // 1000:03d}, {ts.strftime('%Y-%m-%d')}"
+        out.append('\t'.join([str(seq), '0', time_field, '0', '0', direction, protocol, '-', message]))
+    return out
+
+
+def timed(label, fn):
+    begin = time.perf_counter()
+    result = fn()
+    elapsed = time.perf_counter() - begin
+    print(f"{label:<36}{elapsed:>10.3f}s")
+    return result, elapsed
+
+
+def report_of(analyzer):
+    report = analyzer.generate_analysis_report()
+    return report, analyzer.print_first_error(report, list(analyzer.flow_definitions))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--lines', type=int, default=1000000)
+    parser.add_argument('--seed', type=int, default=0)
+    args = parser.parse_args()
+
+    print(f"生成 {args.lines} 行合成日志...")
+    trace = generate_trace(args.lines, args.seed)
+    entries = list(ProtocolAnalyzer().iter_parse(trace))
+
+    legacy = LegacyProtocolAnalyzer()
+    _, legacy_match = timed('原实现 流程匹配', lambda: legacy.analyze_flow_completeness(entries))
+    compiled = ProtocolAnalyzer()
+    _, compiled_match = timed('编译索引 流程匹配', lambda: compiled.analyze_flow_completeness(entries))
+
+    legacy_stream = LegacyProtocolAnalyzer()
+    _, legacy_total = timed('原实现 解析+匹配', lambda: legacy_stream.analyze_stream(trace))
+    compiled_stream = ProtocolAnalyzer()
+    _, compiled_total = timed('编译索引 解析+匹配', lambda: compiled_stream.analyze_stream(trace))
+
+    assert report_of(legacy) == report_of(compiled) == report_of(compiled_stream), '两种实现的分析结果不一致'
+    print(f"流程匹配加速: {legacy_match / compiled_match:.1f}x，解析+匹配加速: {legacy_total / compiled_total:.1f}x")
+
+
+if __name__ == '__main__':
+    main()
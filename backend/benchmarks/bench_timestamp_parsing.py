@@ -0,0 +1,71 @@
+"""
+时间戳解析性能测试：datetime.strptime（原实现） vs parse_timestamp（固定格式切片解析 + 日期缓存）
+
+    python benchmarks/bench_timestamp_parsing.py [--lines 1000000] [--seed 0]
+
+分别统计单独解析时间戳字段和完整parse_line的耗时，并校验两种实现解析出的时间完全一致。
+"""
+
+import os
+import sys
+import time
+import argparse
+from datetime import datetime
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+from api.protocol_analyzer import ProtocolAnalyzer, LogEntry, parse_timestamp, TIMESTAMP_FORMAT  # noqa: E402
+from bench_flow_matching import generate_trace, timed  # noqa: E402
+
+
+def strptime_timestamp(text):
+    """原实现"""
+    return datetime.strptime(text.replace(',', '').strip(), TIMESTAMP_FORMAT)
+
+
+class LegacyProtocolAnalyzer(ProtocolAnalyzer):
+    """原实现：每行调用strptime"""
+
+    def parse_line(self, line):
+        if not line.strip():
+            return None
+        parts = line.strip().split('\t')
+        if len(parts) < 9:
+            return None
+        try:
+            return LogEntry(
+                seq=int(parts[0]),
+                timestamp=strptime_timestamp(parts[2]),
+                protocol=parts[6],
+                direction=parts[5],
+                message=parts[8].strip().lower(),
+                ue=self._field(parts, self.ue_field),
+                cell=self._field(parts, self.cell_field)
+            )
+        except Exception:
+            return None
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--lines', type=int, default=1000000)
+    parser.add_argument('--seed', type=int, default=0)
+    args = parser.parse_args()
+
+    print(f"生成 {args.lines} 行合成日志...")
+    trace = generate_trace(args.lines, args.seed)
+    fields = [line.split('\t')[2] for line in trace]
+
+    legacy_times, legacy_ts = timed('strptime 时间戳', lambda: [strptime_timestamp(f) for f in fields])
+    fast_times, fast_ts = timed('parse_timestamp 时间戳', lambda: [parse_timestamp(f) for f in fields])
+    assert legacy_times == fast_times, '两种实现解析出的时间不一致'
+
+    legacy_entries, legacy_parse = timed('原实现 parse_line', lambda: list(LegacyProtocolAnalyzer().iter_parse(trace)))
+    entries, parse = timed('parse_timestamp parse_line', lambda: list(ProtocolAnalyzer().iter_parse(trace)))
+    assert legacy_entries == entries, '两种实现的解析结果不一致'
+
+    print(f"时间戳解析加速: {legacy_ts / fast_ts:.1f}x，整行解析加速: {legacy_parse / parse:.1f}x")
+
+
+if __name__ == '__main__':
+    main()